@@ -0,0 +1,132 @@
+import {randomBytes} from 'node:crypto'
+import {appendFileSync} from 'node:fs'
+import http from 'node:http'
+import https from 'node:https'
+import fetch from 'node-fetch'
+
+// Shared keep-alive connection pools, so consecutive tool calls reuse TCP+TLS connections
+// to the Blockscout instance instead of handshaking on every request.
+// Settings are read on first use so that values from .env (loaded by index.ts) apply.
+const RETRY_BASE_DELAY_MS = 500
+const RETRY_MAX_DELAY_MS = 30_000
+const RETRYABLE_STATUSES = new Set([429, 500, 502, 503, 504])
+const RETRYABLE_ERROR_CODES = new Set(['ECONNRESET', 'ECONNREFUSED', 'ETIMEDOUT', 'EPIPE', 'EAI_AGAIN'])
+
+let agents: {http: http.Agent, https: https.Agent} | undefined
+
+function getAgent(parsedUrl: URL): http.Agent {
+  if (!agents) {
+    const maxSockets = Number(process.env.BLOCKSCOUT_MAX_SOCKETS) || 16
+    const options = {keepAlive: true, keepAliveMsecs: 10_000, maxSockets, maxFreeSockets: maxSockets}
+    agents = {http: new http.Agent(options), https: new https.Agent(options)}
+  }
+  return parsedUrl.protocol === 'http:' ? agents.http : agents.https
+}
+
+function maxRetries(): number {
+  const retries = Number(process.env.BLOCKSCOUT_MAX_RETRIES || 3)
+  return Number.isInteger(retries) && retries >= 0 ? retries : 3
+}
+
+export interface RequestOptions {
+  method: string
+  headers: Record<string, string>
+  body?: string
+}
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms))
+
+// Retry-After is either delta-seconds or an HTTP date
+function retryAfterMs(header: string | null): number | undefined {
+  if (!header) return undefined
+  const seconds = Number(header)
+  if (!Number.isNaN(seconds)) return seconds * 1000
+  const date = Date.parse(header)
+  return Number.isNaN(date) ? undefined : Math.max(0, date - Date.now())
+}
+
+function backoffMs(attempt: number): number {
+  const delay = RETRY_BASE_DELAY_MS * 2 ** attempt
+  return Math.min(delay + Math.random() * delay * 0.25, RETRY_MAX_DELAY_MS)
+}
+
+// With BLOCKSCOUT_TRACE_FILE set, every request is appended to that file as an `http` span line
+// in the format of blockscout_agent/tracing.py, so agent traces show the time spent upstream.
+function recordSpan(url: URL, method: string, start: number, attributes: Record<string, unknown>, error?: string) {
+  const traceFile = process.env.BLOCKSCOUT_TRACE_FILE
+  if (!traceFile) return
+  const end = Date.now() / 1000
+  const span = {
+    name: `${method} ${url.pathname}`,
+    kind: 'http',
+    trace_id: randomBytes(16).toString('hex'),
+    span_id: randomBytes(8).toString('hex'),
+    parent_id: null,
+    start,
+    end,
+    attributes,
+    error: error ?? null,
+    duration_ms: (end - start) * 1000,
+  }
+  try {
+    appendFileSync(traceFile, JSON.stringify(span) + '\n')
+  } catch (e: any) {
+    console.error(`Could not write span to ${traceFile}: ${e.message}`)
+  }
+}
+
+/**
+ * GETs (or PATCHes) a URL through the pooled agents and returns the decoded JSON body.
+ * GET requests are retried with exponential backoff on 429/5xx and transient network errors,
+ * waiting at least as long as the server's Retry-After header asks for.
+ */
+export async function fetchJson(url: URL, options: RequestOptions): Promise<any> {
+  const start = Date.now() / 1000
+  const attributes: Record<string, unknown> = {endpoint: url.pathname}
+  try {
+    const body = await fetchWithRetries(url, options, attributes)
+    recordSpan(url, options.method, start, attributes)
+    return body
+  } catch (error: any) {
+    recordSpan(url, options.method, start, attributes, String(error?.message ?? error))
+    throw error
+  }
+}
+
+async function fetchWithRetries(url: URL, options: RequestOptions, attributes: Record<string, unknown>): Promise<any> {
+  const retries = options.method === 'GET' ? maxRetries() : 0
+  for (let attempt = 0; ; attempt++) {
+    attributes.attempts = attempt + 1
+    let response
+    try {
+      response = await fetch(url.toString(), {
+        ...options,
+        agent: getAgent,
+      })
+    } catch (error: any) {
+      if (attempt < retries && RETRYABLE_ERROR_CODES.has(error.code)) {
+        await sleep(backoffMs(attempt))
+        continue
+      }
+      throw error
+    }
+
+    attributes.status = response.status
+    if (response.ok) {
+      const text = await response.text()
+      attributes.output_bytes = Buffer.byteLength(text)
+      return JSON.parse(text)
+    }
+    const errorText = await response.text()
+    if (attempt < retries && RETRYABLE_STATUSES.has(response.status)) {
+      const delay = Math.min(
+        Math.max(retryAfterMs(response.headers.get('retry-after')) ?? 0, backoffMs(attempt)),
+        RETRY_MAX_DELAY_MS,
+      )
+      console.error(`Blockscout returned ${response.status} for ${url.pathname}, retrying in ${Math.round(delay)}ms`)
+      await sleep(delay)
+      continue
+    }
+    throw new Error(`HTTP error! status: ${response.status}, body: ${errorText}`)
+  }
+}
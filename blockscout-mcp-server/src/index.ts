@@ -5,7 +5,6 @@ import {StdioServerTransport} from '@modelcontextprotocol/sdk/server/stdio.js'
 import {CallToolRequestSchema, ListToolsRequestSchema} from '@modelcontextprotocol/sdk/types.js'
 import {z} from 'zod'
 import {zodToJsonSchema} from 'zod-to-json-schema'
-import fetch from 'node-fetch'
 import dotenv from 'dotenv'
 import {
   SearchSchema,
@@ -47,15 +46,43 @@ import {
   GetTokenTransfersListSchema,
   GetTokenCountersSchema,
   GetWithdrawalsSchema,
+  MAX_PAGES_PER_CALL,
+  BatchCallSchema,
 } from './zodSchemas.js'
+import {fetchJson} from './http.js'
+import {VERSION} from './version.js'
+import {largestFitting, MIN_MAX_BYTES, projectResponse, ProjectionOptions, resolveMaxBytes} from './projection.js'
 
 dotenv.config()
 
+type PageParams = Record<string, string | number | boolean | null>
+
+// Accepts next_page_params as an object or as its JSON string (some models stringify nested args)
+function parsePageParams(value: unknown): PageParams {
+  if (!value) return {}
+  if (typeof value === 'string') {
+    try {
+      return JSON.parse(value) as PageParams
+    } catch {
+      throw new Error('next_page_params must be the next_page_params object from a previous response')
+    }
+  }
+  return value as PageParams
+}
+
+function applyPageParams(queryParams: URLSearchParams, pageParams: PageParams) {
+  for (const [key, value] of Object.entries(pageParams)) {
+    if (value !== null && value !== undefined) {
+      queryParams.set(key, String(value))
+    }
+  }
+}
+
 // Create server instance
 const server = new Server(
   {
     name: 'blockscout-mcp',
-    version: '1.0.0',
+    version: VERSION,
   },
   {
     capabilities: {
@@ -64,6 +91,163 @@ const server = new Server(
   },
 )
 
+interface LogFilters {
+  topics: (string | undefined)[]
+  fromBlock?: number
+  toBlock?: number
+}
+
+// Max logs per getLogs call (Blockscout's RPC API limit)
+const GET_LOGS_PAGE_SIZE = 1000
+// getLogs pages read per call; with more matches the newest ones are found by the local fallback
+const GET_LOGS_MAX_PAGES = 10
+// Logs per page of filtered results, like the REST pages
+const FILTERED_PAGE_SIZE = 50
+// Pages of /addresses/{hash}/logs scanned per call when filtering locally
+const LOCAL_FILTER_MAX_PAGES = 50
+
+function normalizeTopic(topic: unknown): string | undefined {
+  if (typeof topic !== 'string' || !topic) return undefined
+  const hex = topic.toLowerCase().replace(/^0x/, '')
+  return '0x' + hex.padStart(64, '0')
+}
+
+function parseLogFilters(args: Record<string, unknown>): LogFilters | null {
+  const topics = [args.topic0, args.topic1, args.topic2, args.topic3].map(normalizeTopic)
+  const fromBlock = args.from_block === undefined ? undefined : Number(args.from_block)
+  const toBlock = args.to_block === undefined ? undefined : Number(args.to_block)
+  if (topics.every(topic => topic === undefined) && fromBlock === undefined && toBlock === undefined) {
+    return null
+  }
+  return {topics, fromBlock, toBlock}
+}
+
+function logMatches(log: any, filters: LogFilters): boolean {
+  const blockNumber = Number(log.block_number)
+  if (filters.fromBlock !== undefined && blockNumber < filters.fromBlock) return false
+  if (filters.toBlock !== undefined && blockNumber > filters.toBlock) return false
+  const topics: (string | null)[] = log.topics ?? []
+  return filters.topics.every((topic, i) => topic === undefined || topics[i]?.toLowerCase() === topic)
+}
+
+// Etherscan-style RPC API root served by Blockscout next to the REST API (…/api)
+function rpcApiUrl(baseUrl: string): string {
+  return baseUrl.replace(/\/v2\/$/, '').replace(/\/api$/, '') + '/api'
+}
+
+// Converts a getLogs result entry into the shape of a REST v2 log item
+function fromGetLogsEntry(entry: any) {
+  return {
+    address: {hash: entry.address},
+    topics: entry.topics,
+    data: entry.data,
+    block_number: parseInt(entry.blockNumber, 16),
+    block_hash: entry.blockHash,
+    transaction_hash: entry.transactionHash,
+    index: parseInt(entry.logIndex, 16),
+  }
+}
+
+// One page of getLogs (oldest first), with the filters pushed down so only matching logs are transferred.
+async function fetchGetLogsPage(baseUrl: string, address: string, filters: LogFilters, page: number): Promise<any[]> {
+  const queryParams = new URLSearchParams({
+    module: 'logs',
+    action: 'getLogs',
+    address,
+    fromBlock: String(filters.fromBlock ?? 0),
+    toBlock: filters.toBlock === undefined ? 'latest' : String(filters.toBlock),
+    page: String(page),
+    offset: String(GET_LOGS_PAGE_SIZE),
+  })
+  const set = filters.topics.map((topic, i) => [topic, i] as const).filter(([topic]) => topic !== undefined)
+  for (const [topic, i] of set) {
+    queryParams.set(`topic${i}`, topic as string)
+  }
+  for (let a = 0; a < set.length; a++) {
+    for (let b = a + 1; b < set.length; b++) {
+      queryParams.set(`topic${set[a][1]}_${set[b][1]}_opr`, 'and')
+    }
+  }
+
+  const url = new URL(rpcApiUrl(baseUrl))
+  url.search = queryParams.toString()
+  const data = await fetchJson(url, {method: 'GET', headers: {'Accept': 'application/json'}})
+  if (data?.status !== '1' && !/no (records|logs) found/i.test(data?.message ?? '')) {
+    throw new Error(`getLogs failed: ${data?.message ?? 'unexpected response'}`)
+  }
+  return Array.isArray(data.result) ? data.result : []
+}
+
+// The REST keyset cursor of /addresses/{hash}/logs: logs strictly older than (block_number, index)
+function logCursor(pageParams: PageParams): {blockNumber: number, index: number} | null {
+  if (!('block_number' in pageParams) || !('index' in pageParams)) return null
+  return {blockNumber: Number(pageParams.block_number), index: Number(pageParams.index)}
+}
+
+// Filtered logs newest first, like the REST endpoint, paged with the same keyset cursor so that
+// either path can continue a listing started by the other. getLogs returns the oldest logs
+// first, so all matches up to the cursor are read and sorted here.
+async function getLogsFiltered(baseUrl: string, address: string, filters: LogFilters, pageParams: PageParams) {
+  const cursor = logCursor(pageParams)
+  const toBlock = cursor ? Math.min(cursor.blockNumber, filters.toBlock ?? cursor.blockNumber) : filters.toBlock
+  const entries: any[] = []
+  for (let page = 1; ; page++) {
+    if (page > GET_LOGS_MAX_PAGES) {
+      throw new Error(`more than ${GET_LOGS_MAX_PAGES * GET_LOGS_PAGE_SIZE} matching logs`)
+    }
+    const pageEntries = await fetchGetLogsPage(baseUrl, address, {...filters, toBlock}, page)
+    entries.push(...pageEntries)
+    if (pageEntries.length < GET_LOGS_PAGE_SIZE) break
+  }
+
+  const logs = entries
+    .map(fromGetLogsEntry)
+    .filter(log => !cursor || log.block_number < cursor.blockNumber ||
+      (log.block_number === cursor.blockNumber && log.index < cursor.index))
+    .sort((a, b) => b.block_number - a.block_number || b.index - a.index)
+  const items = logs.slice(0, FILTERED_PAGE_SIZE)
+  const last = items[items.length - 1]
+  return {
+    items,
+    next_page_params: logs.length > items.length
+      ? {block_number: last.block_number, index: last.index, items_count: Number(pageParams.items_count ?? 0) + items.length}
+      : null,
+    source: 'getLogs',
+  }
+}
+
+// Fallback: pages through the REST logs (newest first) and filters them here.
+async function getLogsFilteredLocally(baseUrl: string, address: string, filters: LogFilters, pageParams: PageParams) {
+  const url = new URL(`addresses/${address}/logs`, baseUrl)
+  let nextPageParams: PageParams | null = pageParams
+  const items: any[] = []
+  for (let page = 0; page < LOCAL_FILTER_MAX_PAGES && nextPageParams; page++) {
+    const queryParams = new URLSearchParams()
+    applyPageParams(queryParams, nextPageParams)
+    url.search = queryParams.toString()
+    const data = await fetchJson(url, {method: 'GET', headers: {'Accept': 'application/json'}})
+    const pageItems: any[] = data.items ?? []
+    items.push(...pageItems.filter(log => logMatches(log, filters)))
+    nextPageParams = data.next_page_params ?? null
+    const oldest = pageItems[pageItems.length - 1]
+    if (filters.fromBlock !== undefined && oldest && Number(oldest.block_number) < filters.fromBlock) {
+      nextPageParams = null // everything further back is older than from_block
+    }
+  }
+  return {items, next_page_params: nextPageParams, source: 'local_filter'}
+}
+
+async function getFilteredAddressLogs(baseUrl: string, address: string, filters: LogFilters, pageParams: PageParams) {
+  // Both paths page newest first with the same cursor, so a listing resumes where it stopped
+  // even when getLogs fails (or has too many matches) in the middle of it
+  try {
+    return await getLogsFiltered(baseUrl, address, filters, pageParams)
+  } catch (error: any) {
+    console.error(`getLogs unavailable (${error.message}), filtering /addresses/${address}/logs locally`)
+  }
+  return getLogsFilteredLocally(baseUrl, address, filters, logCursor(pageParams) ? pageParams : {})
+}
+
 // Handle list tools request
 server.setRequestHandler(ListToolsRequestSchema, async () => {
   return {
@@ -185,7 +369,7 @@ server.setRequestHandler(ListToolsRequestSchema, async () => {
       },
       {
         name: 'get_address_logs',
-        description: 'Get address logs',
+        description: 'Get address logs. Filter by topic0-topic3 (e.g. event signature hash, indexed address) and from_block/to_block to only fetch matching logs',
         inputSchema: zodToJsonSchema(GetAddressLogsSchema),
       },
       {
@@ -263,12 +447,20 @@ server.setRequestHandler(ListToolsRequestSchema, async () => {
         description: 'Get withdrawals',
         inputSchema: zodToJsonSchema(GetWithdrawalsSchema),
       },
+      {
+        name: 'batch_call',
+        description: 'Run many of the other tools in one call (e.g. get_transaction_logs for a list of transactions). Calls run concurrently; returns one result or error per call, in order',
+        inputSchema: zodToJsonSchema(BatchCallSchema),
+      },
     ],
   }
 })
 
-// Handle tool calls
-server.setRequestHandler(CallToolRequestSchema, async (request) => {
+type ToolResult = {content: {type: 'text', text: string}[]}
+type ToolRequest = {params: {name: string, arguments?: Record<string, unknown>}}
+
+// Runs a single Blockscout tool
+async function callTool(request: ToolRequest): Promise<ToolResult> {
   try {
     if (!request.params?.name) {
       throw new Error('Missing tool name')
@@ -427,6 +619,12 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
         break
       }
       case 'get_address_logs': {
+        const filters = parseLogFilters(request.params.arguments)
+        if (filters) {
+          const pageParams = parsePageParams(request.params.arguments.next_page_params)
+          const data = await getFilteredAddressLogs(baseUrl, request.params.arguments.address_hash as string, filters, pageParams)
+          return {content: [{type: 'text', text: projectResponse(request.params.name, data, request.params.arguments as ProjectionOptions)}]}
+        }
         endpoint = `/addresses/${request.params.arguments.address_hash}/logs`
         break
       }
@@ -564,6 +762,9 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
         throw new Error(`Unknown method: ${request.params.name}`)
     }
 
+    applyPageParams(queryParams, parsePageParams(request.params.arguments.next_page_params))
+    const maxPages = Math.min(Math.max(Number(request.params.arguments.max_pages) || 1, 1), MAX_PAGES_PER_CALL)
+
     const url = new URL(endpoint.startsWith('/') ? endpoint.slice(1) : endpoint, baseUrl)
     url.search = queryParams.toString()
 
@@ -577,20 +778,24 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
     }
 
     try {
-      const response = await fetch(url.toString(), {
+      const init = {
         method,
         headers,
         body: method === 'PATCH' ? JSON.stringify({
           recaptcha_response: request.params.arguments.recaptcha_response
         }) : undefined
-      })
-
-      if (!response.ok) {
-        const errorText = await response.text()
-        throw new Error(`HTTP error! status: ${response.status}, body: ${errorText}`)
       }
+      let data = await fetchJson(url, init)
 
-      const data = await response.json()
+      // Follow the cursor for up to max_pages pages, merging items. The last page's
+      // next_page_params is returned so the caller can continue from there.
+      for (let page = 1; page < maxPages && Array.isArray(data?.items) && data.next_page_params; page++) {
+        const nextQueryParams = new URLSearchParams(queryParams)
+        applyPageParams(nextQueryParams, data.next_page_params)
+        url.search = nextQueryParams.toString()
+        const nextPage = await fetchJson(url, init)
+        data = {...nextPage, items: [...data.items, ...(nextPage.items ?? [])]}
+      }
 
       // Format the response based on the data structure
       let formattedResponse = ''
@@ -625,7 +830,7 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
           formattedResponse = 'No results found.'
         }
       } else {
-        formattedResponse = JSON.stringify(data, null, 2)
+        formattedResponse = projectResponse(request.params.name, data, request.params.arguments as ProjectionOptions)
       }
 
       return {content: [{type: 'text', text: formattedResponse}]}
@@ -641,6 +846,74 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
     }
     throw new Error(`API call failed: ${error.message}`)
   }
+}
+
+// Runs the calls of a batch_call with bounded concurrency. A failing call doesn't fail the batch.
+// The byte budget covers the whole response: each call gets an equal share, and trailing results
+// that still don't fit are omitted with a notice.
+async function runBatchCall(args: Record<string, unknown> | undefined): Promise<ToolResult> {
+  const {calls, concurrency, max_bytes} = BatchCallSchema.parse(args ?? {})
+  const maxBytes = resolveMaxBytes(max_bytes)
+  const share = Math.max(Math.floor(maxBytes / calls.length), MIN_MAX_BYTES)
+  const results: Record<string, unknown>[] = new Array(calls.length)
+  let nextCall = 0
+
+  async function worker() {
+    while (nextCall < calls.length) {
+      const index = nextCall++
+      const {tool, args: toolArgs} = calls[index]
+      try {
+        if (tool === 'batch_call') {
+          throw new Error('batch_call cannot be nested')
+        }
+        const callMaxBytes = Math.min(Number(toolArgs?.max_bytes) || share, share)
+        const result = await callTool({params: {name: tool, arguments: {...toolArgs, max_bytes: callMaxBytes}}})
+        const text = result.content.map(part => part.text).join('\n')
+        let parsed: unknown = text
+        try {
+          parsed = JSON.parse(text)
+        } catch {
+          // plain-text results (e.g. search) are returned as is
+        }
+        results[index] = {tool, args: toolArgs ?? {}, ok: true, result: parsed}
+      } catch (error: any) {
+        results[index] = {tool, args: toolArgs ?? {}, ok: false, error: error.message}
+      }
+    }
+  }
+
+  const workers = Math.min(concurrency ?? (Number(process.env.BLOCKSCOUT_BATCH_CONCURRENCY) || 8), calls.length)
+  await Promise.all(Array.from({length: workers}, worker))
+
+  const text = JSON.stringify({results})
+  if (text.length <= maxBytes) {
+    return {content: [{type: 'text', text}]}
+  }
+  const withNotice = (count: number) => JSON.stringify({
+    results: results.slice(0, count),
+    truncated: {
+      returned_calls: count,
+      calls: calls.length,
+      hint: `Response exceeded the size budget; the results of the last ${calls.length - count} calls were omitted. ` +
+        'Run them in another batch_call, request fewer fields, or raise max_bytes',
+    },
+  })
+  return {content: [{type: 'text', text: withNotice(largestFitting(results.length, count => withNotice(count).length <= maxBytes))}]}
+}
+
+// Handle tool calls
+server.setRequestHandler(CallToolRequestSchema, async (request) => {
+  if (request.params?.name === 'batch_call') {
+    try {
+      return await runBatchCall(request.params.arguments)
+    } catch (error: any) {
+      if (error instanceof z.ZodError) {
+        throw new Error(`Invalid input: ${JSON.stringify(error.errors)}`)
+      }
+      throw error
+    }
+  }
+  return callTool(request)
 })
 
 // Start server
@@ -0,0 +1,181 @@
+// Shrinks Blockscout responses before they are returned to the model.
+//
+// - slim (default): address objects become their hash, token objects keep address/symbol/decimals,
+//   icons, raw input and empty values are dropped, and list items keep the tool's profile fields.
+// - compact: slim, plus list items encoded as {columns, rows} tuples.
+// - full: the raw Blockscout JSON.
+// A byte budget is enforced on the serialized output by dropping trailing items; other payloads
+// that are too large are returned as a truncated preview string, so the output is always valid JSON.
+
+export type ProjectionFormat = 'slim' | 'compact' | 'full'
+
+export interface ProjectionOptions {
+  fields?: string[]
+  format?: ProjectionFormat
+  max_bytes?: number
+}
+
+const DEFAULT_MAX_BYTES = 24_000
+// Smallest budget a tool accepts (see ProjectionSchema)
+export const MIN_MAX_BYTES = 1000
+
+export function resolveMaxBytes(maxBytes?: number): number {
+  return maxBytes ?? (Number(process.env.BLOCKSCOUT_MAX_RESPONSE_BYTES) || DEFAULT_MAX_BYTES)
+}
+
+const LOG_FIELDS = ['transaction_hash', 'block_number', 'index', 'address', 'topics', 'data', 'decoded']
+const TRANSACTION_FIELDS = ['hash', 'block_number', 'timestamp', 'from', 'to', 'value', 'status', 'method', 'fee', 'result', 'decoded_input']
+const TOKEN_TRANSFER_FIELDS = ['transaction_hash', 'block_number', 'timestamp', 'from', 'to', 'token', 'total', 'type']
+const INTERNAL_TX_FIELDS = ['transaction_hash', 'block_number', 'timestamp', 'from', 'to', 'value', 'type', 'success', 'error']
+
+// Fields kept for the items of each list tool in the slim/compact formats
+const ITEM_PROFILES: Record<string, string[]> = {
+  get_address_logs: LOG_FIELDS,
+  get_transaction_logs: LOG_FIELDS,
+  get_transactions: TRANSACTION_FIELDS,
+  get_address_transactions: TRANSACTION_FIELDS,
+  get_block_transactions: TRANSACTION_FIELDS,
+  get_main_page_transactions: TRANSACTION_FIELDS,
+  get_token_transfers: TOKEN_TRANSFER_FIELDS,
+  get_address_token_transfers: TOKEN_TRANSFER_FIELDS,
+  get_transaction_token_transfers: TOKEN_TRANSFER_FIELDS,
+  get_token_transfers_list: TOKEN_TRANSFER_FIELDS,
+  get_internal_transactions: INTERNAL_TX_FIELDS,
+  get_address_internal_transactions: INTERNAL_TX_FIELDS,
+  get_transaction_internal_txs: INTERNAL_TX_FIELDS,
+}
+
+// Keyset cursors that can be rebuilt from the last returned item when a page is truncated.
+// Only used for pages that are themselves keyset-paged: a page-numbered cursor ({page}) keeps its own.
+const CURSOR_BUILDERS: Record<string, (item: any, itemsCount: number) => Record<string, unknown>> = {
+  get_address_logs: (item, itemsCount) => ({block_number: item.block_number, index: item.index, items_count: itemsCount}),
+  get_transaction_logs: (item, itemsCount) => ({block_number: item.block_number, index: item.index, items_count: itemsCount}),
+}
+
+const DROPPED_KEYS = new Set(['icon_url', 'raw_input', 'token_type_icon', 'metadata', 'private_tags', 'public_tags', 'watchlist_names', 'ens_domain_name', 'implementations'])
+
+function isAddressObject(value: any): boolean {
+  return value && typeof value === 'object' && typeof value.hash === 'string' && 'is_contract' in value
+}
+
+function slimValue(value: any): any {
+  if (Array.isArray(value)) {
+    return value.map(slimValue)
+  }
+  if (!value || typeof value !== 'object') {
+    return value
+  }
+  if (isAddressObject(value)) {
+    return value.name ? `${value.hash} (${value.name})` : value.hash
+  }
+  if ('method_call' in value && Array.isArray(value.parameters)) {
+    // decoded input/log: keep the call and name=value pairs
+    return {
+      method_call: value.method_call,
+      parameters: Object.fromEntries(value.parameters.map((p: any) => [p.name, slimValue(p.value)])),
+    }
+  }
+  const slim: Record<string, unknown> = {}
+  for (const [key, entry] of Object.entries(value)) {
+    if (DROPPED_KEYS.has(key) || entry === null || entry === undefined) continue
+    if (key === 'token' && entry && typeof entry === 'object') {
+      const token = entry as any
+      slim.token = {address: token.address ?? token.address_hash, symbol: token.symbol, decimals: token.decimals}
+      continue
+    }
+    const slimEntry = slimValue(entry)
+    if (Array.isArray(slimEntry) && slimEntry.length === 0) continue
+    slim[key] = slimEntry
+  }
+  return slim
+}
+
+function pick(item: any, fields: string[]): Record<string, unknown> {
+  const picked: Record<string, unknown> = {}
+  for (const field of fields) {
+    if (item && item[field] !== undefined) picked[field] = item[field]
+  }
+  return picked
+}
+
+function toTuples(items: Record<string, unknown>[]): {columns: string[], rows: unknown[][]} {
+  const columns = [...new Set(items.flatMap(item => Object.keys(item)))]
+  return {columns, rows: items.map(item => columns.map(column => item[column] ?? null))}
+}
+
+// Largest n in [0, max] with fits(n), for a predicate that holds up to some n and fails after it
+export function largestFitting(max: number, fits: (n: number) => boolean): number {
+  let low = 0
+  let high = max
+  while (low < high) {
+    const mid = Math.ceil((low + high) / 2)
+    if (fits(mid)) low = mid
+    else high = mid - 1
+  }
+  return low
+}
+
+// A JSON object with the start of `text` as a string, within maxBytes
+function truncatedPreview(text: string, maxBytes: number): string {
+  const encode = (length: number) => JSON.stringify({
+    truncated: {bytes: text.length, hint: 'Response exceeded the size budget; request specific fields or raise max_bytes'},
+    preview: text.slice(0, length),
+  })
+  return encode(largestFitting(text.length, length => encode(length).length <= maxBytes))
+}
+
+/**
+ * Projects a tool's Blockscout JSON according to `options` and serializes it, staying under
+ * the byte budget. Truncated pages say so and carry a cursor (or hint) to continue.
+ */
+export function projectResponse(tool: string, data: any, options: ProjectionOptions = {}): string {
+  const format = options.format ?? 'slim'
+  const maxBytes = resolveMaxBytes(options.max_bytes)
+  if (format === 'full') {
+    return JSON.stringify(data, null, 2)
+  }
+
+  const isPage = data && typeof data === 'object' && Array.isArray(data.items)
+  if (!isPage) {
+    const slim = slimValue(data)
+    const projected = options.fields && slim && typeof slim === 'object' ? pick(slim, options.fields) : slim
+    const text = JSON.stringify(projected)
+    return text.length <= maxBytes ? text : truncatedPreview(text, maxBytes)
+  }
+
+  const fields = options.fields ?? ITEM_PROFILES[tool]
+  const items: Record<string, unknown>[] = data.items.map((item: any) => {
+    const slim = slimValue(item)
+    return fields ? pick(slim, fields) : slim
+  })
+  const encode = (count: number, extra: Record<string, unknown> = {}) => {
+    const {items: _items, ...rest} = data
+    const kept = items.slice(0, count)
+    const body = format === 'compact' ? {...slimValue(rest), ...toTuples(kept)} : {...slimValue(rest), items: kept}
+    return JSON.stringify({...body, ...extra})
+  }
+
+  const text = encode(items.length)
+  if (text.length <= maxBytes) {
+    return text
+  }
+
+  // Binary search for the largest prefix of items that fits, including the truncation notice
+  const keysetPaged = !(data.next_page_params && 'page' in data.next_page_params)
+  const withNotice = (count: number) => {
+    const lastItem = data.items[count - 1]
+    const cursor = count > 0 && keysetPaged && CURSOR_BUILDERS[tool] ? CURSOR_BUILDERS[tool](lastItem, count) : null
+    return encode(count, {
+      next_page_params: cursor ?? data.next_page_params ?? null,
+      truncated: {
+        returned_items: count,
+        page_items: items.length,
+        hint: cursor
+          ? 'Response exceeded the size budget; call again with next_page_params to get the remaining items'
+          : `Response exceeded the size budget; ${items.length - count} items of this page were omitted. ` +
+            'Request fewer fields, use format "compact", or raise max_bytes to see them',
+      },
+    })
+  }
+  return withNotice(largestFitting(items.length, count => withNotice(count).length <= maxBytes))
+}
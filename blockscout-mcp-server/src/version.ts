@@ -1 +1 @@
-export const VERSION = '1.0.0'
\ No newline at end of file
+export const VERSION = '1.1.0'
\ No newline at end of file
@@ -1,6 +1,28 @@
 import { z } from "zod"
 
 // Zod schemas for Blockscout API endpoints
+
+// Cursor pagination shared by every list endpoint. Blockscout returns `next_page_params`
+// with each page; passing it back fetches the following page.
+export const MAX_PAGES_PER_CALL = 10
+
+// Output shaping shared by the list tools (see projection.ts)
+export const ProjectionSchema = z.object({
+  fields: z.array(z.string()).optional()
+    .describe('Only return these fields of each item (e.g. ["transaction_hash", "decoded"])'),
+  format: z.enum(['slim', 'compact', 'full']).optional()
+    .describe('slim (default): trimmed items; compact: items as {columns, rows} tuples; full: raw Blockscout JSON'),
+  max_bytes: z.number().int().min(1000).optional()
+    .describe('Size budget for the response; larger pages are truncated with a hint on how to continue'),
+})
+
+export const PaginationSchema = z.object({
+  next_page_params: z.record(z.union([z.string(), z.number(), z.boolean(), z.null()])).optional()
+    .describe('Cursor for the next page: pass the next_page_params object from the previous response unchanged'),
+  max_pages: z.number().int().min(1).max(MAX_PAGES_PER_CALL).optional()
+    .describe(`Fetch up to this many pages in one call and merge their items (default 1, max ${MAX_PAGES_PER_CALL})`),
+}).merge(ProjectionSchema)
+
 export const SearchSchema = z.object({ 
   q: z.string().describe('Search query'),
 })
@@ -9,13 +31,13 @@ export const GetTransactionsSchema = z.object({
   filter: z.string().optional().describe('Filter: pending | validated'),
   type: z.string().optional().describe('Transaction type: token_transfer,contract_creation,contract_call,coin_transfer,token_creation'),
   method: z.string().optional().describe('Method: approve,transfer,multicall,mint,commit'),
-})
+}).merge(PaginationSchema)
 
 export const GetBlocksSchema = z.object({
   type: z.string().optional().describe('Block type: block | uncle | reorg'),
-})
+}).merge(PaginationSchema)
 
-export const GetTokenTransfersSchema = z.object({})
+export const GetTokenTransfersSchema = PaginationSchema
 
 export const GetStatsSchema = z.object({})
 
@@ -26,15 +48,15 @@ export const GetTransactionInfoSchema = z.object({
 export const GetTransactionTokenTransfersSchema = z.object({
   transaction_hash: z.string().describe('Transaction hash'),
   type: z.string().optional().describe('Token type: ERC-20,ERC-721,ERC-1155'),
-})
+}).merge(PaginationSchema)
 
 export const GetTransactionInternalTxsSchema = z.object({
   transaction_hash: z.string().describe('Transaction hash'),
-})
+}).merge(PaginationSchema)
 
 export const GetTransactionLogsSchema = z.object({
   transaction_hash: z.string().describe('Transaction hash'),
-})
+}).merge(PaginationSchema)
 
 export const GetBlockInfoSchema = z.object({
   block_number_or_hash: z.string().describe('Block number or hash'),
@@ -42,7 +64,7 @@ export const GetBlockInfoSchema = z.object({
 
 export const GetBlockTransactionsSchema = z.object({
   block_number_or_hash: z.string().describe('Block number or hash'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressInfoSchema = z.object({
   address_hash: z.string().describe('Address hash'),
@@ -52,7 +74,7 @@ export const GetAddressTokenTransfersSchema = z.object({
   address_hash: z.string().describe('Address hash'),
   type: z.string().optional().describe('Token type: ERC-20,ERC-721,ERC-1155'),
   filter: z.string().optional().describe('Filter: to | from'),
-})
+}).merge(PaginationSchema)
 
 export const GetTokenInfoSchema = z.object({
   address_hash: z.string().describe('Token contract address'),
@@ -60,9 +82,9 @@ export const GetTokenInfoSchema = z.object({
 
 export const GetTokenHoldersSchema = z.object({
   address_hash: z.string().describe('Token contract address'),
-})
+}).merge(PaginationSchema)
 
-export const GetInternalTransactionsSchema = z.object({})
+export const GetInternalTransactionsSchema = PaginationSchema
 
 export const GetIndexingStatusSchema = z.object({})
 
@@ -80,7 +102,7 @@ export const GetTransactionSummarySchema = z.object({
 
 export const GetBlockWithdrawalsSchema = z.object({
   block_number_or_hash: z.string().describe('Block number or hash'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressCountersSchema = z.object({
   address_hash: z.string().describe('Address hash'),
@@ -89,15 +111,24 @@ export const GetAddressCountersSchema = z.object({
 export const GetAddressInternalTransactionsSchema = z.object({
   address_hash: z.string().describe('Address hash'),
   filter: z.string().optional().describe('Filter: to | from'),
-})
+}).merge(PaginationSchema)
+
+const topicFilter = (position: number) => z.string().optional()
+  .describe(`Only logs whose topic${position} equals this 32-byte hex value (a 20-byte address is left-padded automatically)`)
 
 export const GetAddressLogsSchema = z.object({
   address_hash: z.string().describe('Address hash'),
-})
+  topic0: topicFilter(0),
+  topic1: topicFilter(1),
+  topic2: topicFilter(2),
+  topic3: topicFilter(3),
+  from_block: z.number().int().min(0).optional().describe('Only logs from this block number on (inclusive)'),
+  to_block: z.number().int().min(0).optional().describe('Only logs up to this block number (inclusive)'),
+}).merge(PaginationSchema)
 
 export const GetAddressCoinBalanceHistorySchema = z.object({
   address_hash: z.string().describe('Address hash'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressCoinBalanceHistoryByDaySchema = z.object({
   address_hash: z.string().describe('Address hash'),
@@ -106,18 +137,18 @@ export const GetAddressCoinBalanceHistoryByDaySchema = z.object({
 export const GetSmartContractsSchema = z.object({
   q: z.string().optional().describe('Search query'),
   filter: z.string().optional().describe('Filter: vyper | solidity | yul'),
-})
+}).merge(PaginationSchema)
 
 export const GetSmartContractSchema = z.object({
   address_hash: z.string().describe('Address hash'),
 })
 
-export const GetAddressesSchema = z.object({})
+export const GetAddressesSchema = PaginationSchema
 
 export const GetAddressTransactionsSchema = z.object({
   address_hash: z.string().describe('Address hash'),
   filter: z.string().optional().describe('Filter: to | from'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressTokenBalancesSchema = z.object({
   address_hash: z.string().describe('Address hash'),
@@ -126,33 +157,48 @@ export const GetAddressTokenBalancesSchema = z.object({
 export const GetAddressTokensSchema = z.object({
   address_hash: z.string().describe('Address hash'),
   type: z.string().optional().describe('Token type: ERC-20,ERC-721,ERC-1155'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressWithdrawalsSchema = z.object({
   address_hash: z.string().describe('Address hash'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressNFTSchema = z.object({
   address_hash: z.string().describe('Address hash'),
   type: z.string().optional().describe('Token type: ERC-721,ERC-404,ERC-1155'),
-})
+}).merge(PaginationSchema)
 
 export const GetAddressNFTCollectionsSchema = z.object({
   address_hash: z.string().describe('Address hash'),
   type: z.string().optional().describe('Token type: ERC-721,ERC-404,ERC-1155'),
-})
+}).merge(PaginationSchema)
 
 export const GetTokensSchema = z.object({
   q: z.string().optional().describe('Search query for token name or symbol'),
   type: z.string().optional().describe('Token type: ERC-20,ERC-721,ERC-1155'),
-})
+}).merge(PaginationSchema)
 
 export const GetTokenTransfersListSchema = z.object({
   address_hash: z.string().describe('Token contract address'),
-})
+}).merge(PaginationSchema)
 
 export const GetTokenCountersSchema = z.object({
   address_hash: z.string().describe('Token contract address'),
 })
 
-export const GetWithdrawalsSchema = z.object({})
\ No newline at end of file
+export const GetWithdrawalsSchema = PaginationSchema
+
+// Composite tool: many Blockscout calls in one round-trip
+export const BATCH_MAX_CALLS = 50
+export const BATCH_MAX_CONCURRENCY = 16
+
+export const BatchCallSchema = z.object({
+  calls: z.array(z.object({
+    tool: z.string().describe('Name of another Blockscout tool, e.g. get_transaction_logs'),
+    args: z.record(z.unknown()).optional().describe('Arguments for that tool'),
+  })).min(1).max(BATCH_MAX_CALLS).describe(`Tool calls to run (at most ${BATCH_MAX_CALLS})`),
+  concurrency: z.number().int().min(1).max(BATCH_MAX_CONCURRENCY).optional()
+    .describe('How many calls run at the same time (default 8)'),
+  max_bytes: z.number().int().min(1000).optional()
+    .describe('Size budget for the whole response, shared by the calls; results that do not fit are omitted with a hint'),
+})
\ No newline at end of file
@@ -2,13 +2,20 @@ import os
 from contextlib import AsyncExitStack
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
+from mcp_supervisor import stdio_server_command
+from networks import load_networks
+from p2p_indexer import DEFAULT_DB_PATH, IndexStore, default_chain_label
+from session_memory import SessionCompactor
+from tools.p2p_state import P2PStateTools
+from tool_schemas import subset_tool_names
 # from google.adk.tools.tool import ToolOutput, ToolContext # Removed as it's causing an error and not used here
 
 # print("Inspecting MCPToolset attributes:") # Removed debug print
 # print(dir(MCPToolset))
 
 async def get_tools_async() -> tuple[MCPToolset | None, AsyncExitStack | None]:
-    blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL")
+    # BLOCKSCOUT_API_URL wins; otherwise the default network of networks.json (or BLOCKSCOUT_NETWORK)
+    blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL") or load_networks().default.blockscout_api_url
     if not blockscout_api_url:
         print("Error: BLOCKSCOUT_API_URL environment variable not set.")
         print("Please set it in the .env file (e.g., BLOCKSCOUT_API_URL=\"https://eth.blockscout.com/api\")")
@@ -16,19 +23,24 @@ async def get_tools_async() -> tuple[MCPToolset | None, AsyncExitStack | None]:
 
     # The blockscout-mcp-server is installed globally and run via npx
     # It requires BLOCKSCOUT_API_URL to be in its environment
+    # With BLOCKSCOUT_MCP_SUPERVISOR=1 this connects to the shared warm server instead (see mcp_supervisor.py)
+    command, args = stdio_server_command(blockscout_api_url)
     server_params = StdioServerParameters(
-        command="npx",
-        args=["-y", "blockscout-mcp"], # -y to auto-confirm npx execution
-        env={"BLOCKSCOUT_API_URL": blockscout_api_url}
+        command=command,
+        args=args,
+        env={**os.environ, "BLOCKSCOUT_API_URL": blockscout_api_url}
     )
     
-    print(f"Attempting to instantiate MCPToolset with command: npx -y blockscout-mcp and env BLOCKSCOUT_API_URL={blockscout_api_url}")
+    print(f"Attempting to instantiate MCPToolset with command: {command} {' '.join(args)} and env BLOCKSCOUT_API_URL={blockscout_api_url}")
 
     exit_stack = AsyncExitStack()
     try:
         # Instantiate MCPToolset and use AsyncExitStack to manage its context
         # This assumes MCPToolset is an async context manager or has async setup
-        tools = MCPToolset(connection_params=server_params)
+        # BLOCKSCOUT_TOOL_SUBSET (e.g. logs-only) keeps the other tool schemas out of the prompt
+        tool_filter = subset_tool_names(os.getenv("BLOCKSCOUT_TOOL_SUBSET") or "all")
+        tools = MCPToolset(connection_params=server_params, tool_filter=tool_filter)
+        exit_stack.push_async_callback(tools.close)  # stops the MCP server session with the agent
         # If MCPToolset needs an explicit awaitable connect/load method, it would be called here.
         # For now, ADK often handles this within its context management or LlmAgent tool processing.
         # The LlmAgent itself will call methods on the toolset when it needs to use a tool.
@@ -66,7 +78,13 @@ async def get_tools_async() -> tuple[MCPToolset | None, AsyncExitStack | None]:
         print(f"Also check that BLOCKSCOUT_API_URL='{blockscout_api_url}' is a valid Blockscout API endpoint.")
         return None, None
 
-async def get_agent_async():
+async def get_agent_async(compactor: SessionCompactor | None = None):
+    """
+    Builds the analyst agent with the Blockscout MCP tools and, when an index exists, the local P2P
+    state tools. With a `compactor`, large tool results (MCP pages included) are kept out of the
+    session, old ones are replaced by digests under its token budget, and the agent can re-fetch
+    them with get_stored_result.
+    """
     tools, exit_stack = await get_tools_async()
     if not tools:
         print("Agent creation failed because tools could not be loaded.")
@@ -83,11 +101,32 @@ async def get_agent_async():
             await exit_stack.aclose()
         return None, None
 
+    # Materialized P2P state from the local event index (p2p_indexer.py), when one has been built
+    p2p_index_path = os.getenv("P2P_INDEX_DB", DEFAULT_DB_PATH)
+    p2p_tools = []
+    instruction = 'You are an AI assistant that can query blockchain data using Blockscout. Use the available tools to answer user questions about transactions, addresses, blocks, and tokens. Be precise and refer to the tool outputs.'
+    tool_names = subset_tool_names(os.getenv("BLOCKSCOUT_TOOL_SUBSET") or "all")
+    if tool_names is None or "batch_call" in tool_names:
+        instruction += ' To fetch the same kind of data for several items, use a single batch_call instead of one tool call per item.'
+    if os.path.exists(p2p_index_path):
+        p2p_store = IndexStore(p2p_index_path)
+        exit_stack.callback(p2p_store.close)
+        chain = default_chain_label(os.getenv("BLOCKSCOUT_API_URL") or load_networks().default.blockscout_api_url)
+        p2p_tools = P2PStateTools(p2p_store, chain).functions()
+        instruction += ' For the current state of the P2P contracts (reputation scores, loan agreements, vouch stakes, pending payment modifications), prefer the get_reputation_score, get_user_agreements, get_agreement_state, get_vouches and get_pending_modifications tools over scanning event logs.'
+    callbacks = {}
+    if compactor:
+        p2p_tools = [*p2p_tools, *compactor.functions()]
+        callbacks = {"before_model_callback": compactor.before_model_callback,
+                     "after_tool_callback": compactor.after_tool_callback}
+        instruction += ' Earlier tool results may be replaced by a digest with a result_ref; call get_stored_result with it only if you need the details again.'
+
     root_agent = LlmAgent(
         model=os.getenv("GEMINI_MODEL", "gemini-2.5-pro-preview-03-25"),
         name='blockscout_analyst_agent',
-        instruction='You are an AI assistant that can query blockchain data using Blockscout. Use the available tools to answer user questions about transactions, addresses, blocks, and tokens. Be precise and refer to the tool outputs.',
-        # toolsets=tools, # Removed for testing if MCP tools are picked up differently
+        instruction=instruction,
+        tools=[tools, *p2p_tools],  # the Blockscout MCP tools, then the local P2P state tools
+        **callbacks,
     )
     print("Blockscout Analyst Agent initialized.")
     return root_agent, exit_stack 
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Answer cache in front of the agent runs, for dashboards that keep asking the same questions.
+
+Queries are normalized into a template and parameters: addresses and hashes become placeholders
+(`<addr1>`, `<hash1>`) and case, whitespace and quote styles are ignored, so
+"Show the recent 'ReputationUpdated' event logs for address 0xAB..." asked with a checksummed or a
+lowercase address is the same question. An answer stays valid while no newer log has been indexed
+for the contracts it references: at store time the P2P index's sync cursor (newest block with a
+log, and its hash) of every referenced indexed contract, on whichever of the configured chains
+indexes it, is recorded, and any change (new logs, a reorg rollback) drops the answer on the next
+lookup. Answers referencing no indexed contract fall
+back to a TTL, and every answer expires after BLOCKSCOUT_ANSWER_CACHE_MAX_AGE seconds, so an index
+that stopped syncing can't serve answers forever.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from p2p_indexer import IndexStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANSWER_CACHE_PATH = os.getenv(
+    "BLOCKSCOUT_ANSWER_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_cache.db")
+)
+DEFAULT_TTL = float(os.getenv("BLOCKSCOUT_ANSWER_CACHE_TTL", "300"))  # seconds, without indexed contracts
+DEFAULT_MAX_AGE = float(os.getenv("BLOCKSCOUT_ANSWER_CACHE_MAX_AGE", "3600"))
+
+# Transaction/agreement hashes before addresses, so an address never matches inside a hash
+HEX_VALUE_RE = re.compile(r"0x[0-9a-fA-F]{64}(?![0-9a-fA-F])|0x[0-9a-fA-F]{40}(?![0-9a-fA-F])")
+QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"', "`": "'"})
+
+
+def normalize_query(query_text: str) -> tuple[str, list[str]]:
+    """Splits a query into its template and its (lowercased) address/hash parameters, in order."""
+    params: list[str] = []
+
+    def placeholder(match: re.Match) -> str:
+        value = match.group(0).lower()
+        if value not in params:
+            params.append(value)
+        kind = "addr" if len(value) == 42 else "hash"
+        return f"<{kind}{params.index(value) + 1}>"
+
+    template = HEX_VALUE_RE.sub(placeholder, query_text.translate(QUOTES))
+    template = " ".join(template.lower().split()).rstrip(" ?.!")
+    return template, params
+
+
+class AnswerCache:
+    """
+    SQLite-backed cache of final answers keyed by namespace (agent/model), template and parameters.
+    `index`/`chains` point at the P2P event index used to tell whether referenced contracts have new
+    logs: a contract's cursor is looked up under every chain label the agent serves, so a question
+    about another configured chain's contracts is invalidated by that chain's logs. Thread-safe.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_ANSWER_CACHE_PATH, index: IndexStore | None = None,
+                 chains: str | list[str] | None = None, ttl: float = DEFAULT_TTL, max_age: float = DEFAULT_MAX_AGE):
+        self.index = index
+        self.chains = [chains] if isinstance(chains, str) else list(dict.fromkeys(chains or []))
+        self.ttl = ttl
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, template TEXT NOT NULL, params TEXT NOT NULL, "
+            "answer TEXT NOT NULL, contracts TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_template ON answers (template)")
+        self.conn.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+        self.conn.commit()
+
+    @staticmethod
+    def key(namespace: str, template: str, params: list[str]) -> str:
+        payload = json.dumps([namespace, template, params], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _contract_versions(self, params: list[str]) -> dict[str, list]:
+        """Sync cursor of every parameter that is an indexed contract, as {"chain:address": cursor}."""
+        if self.index is None:
+            return {}
+        versions = {}
+        for value in params:
+            if len(value) != 42:
+                continue
+            for chain in self.chains:
+                cursor = self.index.get_cursor(chain, value)
+                if cursor is not None:
+                    versions[f"{chain}:{value}"] = list(cursor)
+        return versions
+
+    def get(self, query_text: str, namespace: str = "") -> str | None:
+        template, params = normalize_query(query_text)
+        key = self.key(namespace, template, params)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT answer, contracts, expires_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            answer, contracts, expires_at = row
+            stale = expires_at <= time.time()
+            if not stale and json.loads(contracts) != self._contract_versions(params):
+                stale = True
+                self.invalidated += 1
+                logger.info(f"Cached answer for '{template}' invalidated: new logs indexed for its contracts")
+            if stale:
+                self.conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self.conn.commit()
+                self.misses += 1
+                return None
+            self.hits += 1
+            return answer
+
+    def put(self, query_text: str, answer: str, namespace: str = "") -> None:
+        if not answer:
+            return
+        template, params = normalize_query(query_text)
+        contracts = self._contract_versions(params)
+        now = time.time()
+        # Contract-backed answers live until new logs arrive (capped by max_age); others get the TTL
+        expires_at = now + (self.max_age if contracts else min(self.ttl, self.max_age))
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answers (key, namespace, template, params, answer, contracts, stored_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(namespace, template, params), namespace, template, json.dumps(params), answer,
+                 json.dumps(contracts), now, expires_at),
+            )
+            self.conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM answers")
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, templates = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT template) FROM answers"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "invalidated": self.invalidated,
+                "entries": entries, "templates": templates}
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Blockscout's public API allows a handful of requests per second per IP without an API key.
+DEFAULT_RATE_LIMIT = float(os.getenv("BLOCKSCOUT_RATE_LIMIT", "5"))  # requests per second
+DEFAULT_RATE_BURST = int(os.getenv("BLOCKSCOUT_RATE_BURST", "5"))
+DEFAULT_CONCURRENCY = int(os.getenv("AGENT_QUERY_CONCURRENCY", "4"))
+DEFAULT_QUERY_TIMEOUT = float(os.getenv("AGENT_QUERY_TIMEOUT", "180"))
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: `rate` tokens are added per second up to `burst`.
+    `acquire()` waits only as long as needed instead of sleeping a fixed interval.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_LIMIT, burst: int = DEFAULT_RATE_BURST):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Waits for `tokens`. A request larger than the burst waits for a full bucket and leaves it
+        in debt, so the callers after it wait until the whole amount has been paid back.
+        """
+        async with self._lock:  # FIFO-ish: waiters are served one at a time
+            self._refill()
+            needed = min(tokens, self.capacity)
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+@dataclass
+class QueryResult:
+    name: str
+    query_text: str
+    output: str | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def load_queries_file(path: str) -> list[dict]:
+    """
+    Reads a JSONL file of queries. Each line is either a JSON string or an object with
+    `query_text` (or `query`) and an optional `name`.
+    """
+    queries = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {"query_text": entry}
+            query_text = entry.get("query_text") or entry.get("query")
+            if not query_text:
+                raise ValueError(f"{path}:{line_number}: missing 'query_text'")
+            queries.append({**entry, "query_text": query_text, "name": entry.get("name") or f"Query {line_number}"})
+    return queries
+
+
+async def run_batch(queries: list[dict], run_query: Callable[[dict], Awaitable[Any]],
+                    concurrency: int = DEFAULT_CONCURRENCY,
+                    rate_limiter: TokenBucket | None = None,
+                    timeout: float | None = DEFAULT_QUERY_TIMEOUT) -> AsyncIterator[QueryResult]:
+    """
+    Runs `run_query(test_case)` for every query with at most `concurrency` in flight,
+    each start gated by `rate_limiter` and bounded by `timeout` seconds.
+    Yields a QueryResult per query as soon as it finishes (completion order, not input order).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(test_case: dict) -> QueryResult:
+        result = QueryResult(name=test_case.get("name", "Query"), query_text=test_case["query_text"])
+        async with semaphore:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                output = await asyncio.wait_for(run_query(test_case), timeout)
+                result.output = output if output is None or isinstance(output, str) else str(output)
+            except asyncio.TimeoutError:
+                result.error = f"Timed out after {timeout}s"
+            except Exception as e:
+                logger.error(f"Query '{result.name}' failed: {e}", exc_info=True)
+                result.error = f"{type(e).__name__}: {e}"
+            result.elapsed = time.monotonic() - started
+        return result
+
+    tasks = [asyncio.create_task(run_one(test_case)) for test_case in queries]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
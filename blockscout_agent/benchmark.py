@@ -0,0 +1,196 @@
+"""
+Repeatable performance numbers for the Blockscout pipelines, measured against recorded explorer
+responses (see replay_server.py) instead of a live explorer.
+
+    # 1. record the workload's responses once from the real explorer
+    python benchmark.py record --workload agent --fixtures fixtures/flow-evm-testnet
+    # 2. replay them with explorer-like latency/limits; compare against a previous report
+    python benchmark.py run --workload agent --fixtures fixtures/flow-evm-testnet \\
+        --latency-ms 150 --rate-limit 10 --repeat 2 --output report.json --baseline previous.json
+
+Workloads:
+- agent: the `p2p_test_cases` of oai_client.py through the OpenAI agent (needs OPENAI_API_KEY)
+  with the usual MCP wrappers (rate limiting, decoding, projection, tool cache).
+- indexer: a full `P2PIndexer.index_contracts` of the network's P2P contracts into a fresh index.
+
+Every run reports wall time, tool calls, tool result bytes, HTTP requests and bytes served by the
+replay server, replay misses, 429s and the tool cache hit rate. Runs of one invocation share the
+tool cache, so `--repeat 2` shows the warm-cache numbers in its second run.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from argparse import Namespace
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from batch_runner import DEFAULT_CONCURRENCY, DEFAULT_QUERY_TIMEOUT
+from networks import Network, load_networks
+from projection import DEFAULT_MAX_BYTES
+from replay_server import DEFAULT_PORT, ReplayServer
+from tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+WORKLOADS = ("agent", "indexer")
+
+
+def replay_network(network: Network, server: ReplayServer) -> Network:
+    """The same network, with its Blockscout API URL pointing at the replay server (same path)."""
+    return Network(name=network.name, blockscout_api_url=server.url + urlsplit(network.blockscout_api_url).path,
+                   chain_id=network.chain_id, rpc_url=network.rpc_url, contracts=network.contracts)
+
+
+async def run_agent_workload(network: Network, tool_cache: ToolResultCache | None, args) -> dict:
+    # Imported here: oai_client loads .env and needs openai-agents, which the indexer workload doesn't
+    from batch_runner import run_batch
+    from mcp_wrappers import MeteredMCPServer
+    from oai_client import (blockscout_mcp_server, build_agent, p2p_test_cases, run_single_query,
+                            wrap_blockscout_server)
+
+    wrapper_args = Namespace(rate_limit=args.client_rate_limit, max_tool_bytes=args.max_tool_bytes)
+    async with blockscout_mcp_server(network) as bs_server:
+        metered = MeteredMCPServer(wrap_blockscout_server(bs_server, network, wrapper_args, tool_cache))
+        agent = build_agent(metered)
+
+        async def run_test_case(test_case: dict) -> str:
+            return await run_single_query(agent, test_case['query_text'], test_case['name'], verbose=False)
+
+        results = []
+        async for result in run_batch(p2p_test_cases, run_test_case, concurrency=args.concurrency,
+                                      timeout=args.timeout):
+            results.append(result)
+    return {
+        "queries": len(results),
+        "queries_failed": sum(not r.ok for r in results),
+        "query_seconds": {r.name: round(r.elapsed, 3) for r in results},
+        **{key: value for key, value in metered.stats.items() if key != "tool_seconds"},
+        "tool_seconds": round(metered.stats["tool_seconds"], 3),
+    }
+
+
+async def run_indexer_workload(network: Network, args) -> dict:
+    from blockscout_api import BlockscoutClient
+    from p2p_indexer import IndexStore, P2PIndexer, default_chain_label
+
+    addresses = [network.contracts[name] for name in ("UserRegistry", "Reputation", "P2PLending")
+                 if name in network.contracts]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = IndexStore(os.path.join(tmp_dir, "p2p_index.db"))
+        try:
+            async with BlockscoutClient(network.blockscout_api_url) as client:
+                indexer = P2PIndexer(client, store, default_chain_label(network.blockscout_api_url))
+                new_rows = await indexer.index_contracts(addresses)
+        finally:
+            store.close()
+    return {"contracts": len(addresses), "events_indexed": new_rows}
+
+
+async def run_workload(workload: str, network: Network, server: ReplayServer,
+                       tool_cache: ToolResultCache | None, args) -> dict:
+    server.reset_stats()
+    cache_before = tool_cache.stats() if tool_cache else None
+    started = time.monotonic()
+    if workload == "agent":
+        metrics = await run_agent_workload(network, tool_cache, args)
+    else:
+        metrics = await run_indexer_workload(network, args)
+    report = {"workload": workload, "wall_seconds": round(time.monotonic() - started, 3), **metrics}
+
+    http = server.reset_stats()
+    report.update({
+        "http_requests": http["requests"],
+        "http_bytes": http["bytes_sent"],
+        "replay_misses": http["misses"] if server.mode == "replay" else 0,
+        "recorded": http["recorded"],
+        "rate_limited": http["rate_limited"],
+    })
+    if tool_cache:
+        cache_after = tool_cache.stats()
+        hits = cache_after["hits"] - cache_before["hits"]
+        misses = cache_after["misses"] - cache_before["misses"]
+        report.update({"cache_hits": hits, "cache_misses": misses,
+                       "cache_hit_rate": round(hits / (hits + misses), 3) if hits + misses else None})
+    return report
+
+
+def compare_reports(baseline: list[dict], current: list[dict]) -> list[str]:
+    """One line per numeric metric that changed between runs with the same index."""
+    lines = []
+    for index, (before, after) in enumerate(zip(baseline, current), 1):
+        for key, value in after.items():
+            old = before.get(key)
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not isinstance(old, (int, float)):
+                continue
+            if value == old:
+                continue
+            change = f" ({(value - old) / old:+.1%})" if old else ""
+            lines.append(f"run {index} {key}: {old} -> {value}{change}")
+    return lines
+
+
+async def main():
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    parser = argparse.ArgumentParser(description="Benchmark the Blockscout pipelines against recorded responses.")
+    parser.add_argument("mode", choices=["record", "run"], help="record from the live explorer, or run against the fixtures.")
+    parser.add_argument("--workload", choices=WORKLOADS, default="agent")
+    parser.add_argument("--network", help="Network from networks.json (default: the default network).")
+    parser.add_argument("--fixtures", help="Fixture directory (default: fixtures/<network>).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Replay: added delay per response.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Replay: random extra delay per response.")
+    parser.add_argument("--rate-limit", type=float, help="Replay: requests per second before the server answers 429.")
+    parser.add_argument("--client-rate-limit", type=float, help="Agent: tool calls per second (default: BLOCKSCOUT_RATE_LIMIT or 5).")
+    parser.add_argument("--max-tool-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Agent: byte budget per tool result.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Agent: queries in flight.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_QUERY_TIMEOUT, help="Agent: per-query timeout in seconds.")
+    parser.add_argument("--no-cache", action="store_true", help="Agent: run without the tool result cache.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of the workload (sharing the tool cache).")
+    parser.add_argument("--output", help="Write the report (a JSON list of runs) to this file.")
+    parser.add_argument("--baseline", help="Previous report to compare against.")
+    args = parser.parse_args()
+
+    network = load_networks().get(args.network)
+    fixtures = args.fixtures or os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", network.name)
+    upstream = urlsplit(network.blockscout_api_url)
+    server = ReplayServer(
+        fixtures,
+        mode="record" if args.mode == "record" else "replay",
+        upstream=f"{upstream.scheme}://{upstream.netloc}",
+        port=args.port,
+        latency=args.latency_ms / 1000 if args.mode == "run" else 0.0,
+        jitter=args.jitter_ms / 1000 if args.mode == "run" else 0.0,
+        rate_limit=args.rate_limit if args.mode == "run" else None,
+    )
+    # In memory, so every invocation starts with a cold cache
+    tool_cache = ToolResultCache(db_path=None) if args.workload == "agent" and not args.no_cache else None
+
+    reports = []
+    with server:
+        target = replay_network(network, server)
+        for run in range(args.repeat):
+            report = await run_workload(args.workload, target, server, tool_cache, args)
+            reports.append(report)
+            print(json.dumps({"run": run + 1, **report}), flush=True)
+
+    if args.mode == "run" and any(report["replay_misses"] for report in reports):
+        print("Warning: some requests had no recorded response; re-record the fixtures for this workload.")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            changes = compare_reports(json.load(f), reports)
+        print("\n".join(changes) if changes else "No changes against the baseline.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import time
+from typing import Any, AsyncIterator
+
+import httpx
+
+from tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv("BLOCKSCOUT_MAX_SOCKETS", "16"))
+MAX_RETRIES = int(os.getenv("BLOCKSCOUT_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = 0.5  # seconds, doubled on every attempt
+RETRY_MAX_DELAY = 30.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(header: str | None) -> float | None:
+    # Retry-After is either delta-seconds or an HTTP date
+    if not header:
+        return None
+    try:
+        return float(header)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(header).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_seconds(attempt: int) -> float:
+    delay = RETRY_BASE_DELAY * 2 ** attempt
+    return min(delay + random.uniform(0, delay * 0.25), RETRY_MAX_DELAY)
+
+
+def normalize_api_url(blockscout_api_url: str) -> str:
+    """
+    Returns the Blockscout REST v2 base URL for a BLOCKSCOUT_API_URL value,
+    mirroring the normalization done by blockscout-mcp-server (always ends with /v2/).
+    """
+    if blockscout_api_url.endswith('/v2/'):
+        return blockscout_api_url
+    if blockscout_api_url.endswith('/v2'):
+        return blockscout_api_url + '/'
+    if blockscout_api_url.endswith('/'):
+        return blockscout_api_url + 'v2/'
+    return blockscout_api_url + '/v2/'
+
+
+class BlockscoutClient:
+    """
+    Minimal async client for the Blockscout REST v2 API.
+    Used by the Python-side pipelines (indexer, analyzer) that talk to Blockscout
+    directly instead of going through the MCP server and an LLM.
+    """
+
+    def __init__(self, blockscout_api_url: str, timeout: float = 30.0):
+        self.api_url = blockscout_api_url
+        self.base_url = normalize_api_url(blockscout_api_url)
+        try:
+            import h2  # noqa: F401  (optional: enables HTTP/2 where the explorer supports it)
+            http2 = True
+        except ImportError:
+            http2 = False
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            headers={'Accept': 'application/json'},
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            http2=http2,
+        )
+
+    async def __aenter__(self) -> "BlockscoutClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def get(self, endpoint: str, params: dict[str, Any] | None = None) -> Any:
+        """
+        GETs a v2 endpoint (e.g. '/addresses/0x.../logs') and returns the decoded JSON body.
+        429/5xx responses and transient network errors are retried with exponential backoff,
+        waiting at least as long as the explorer's Retry-After header asks for.
+        """
+        with trace_span(f"GET {endpoint}", "http", endpoint=endpoint) as span:
+            for attempt in range(MAX_RETRIES + 1):
+                span.attributes["attempts"] = attempt + 1
+                try:
+                    response = await self._http.get(endpoint.lstrip('/'), params=params)
+                except httpx.TransportError as e:
+                    if attempt == MAX_RETRIES:
+                        raise
+                    delay = _backoff_seconds(attempt)
+                    logger.warning(f"{type(e).__name__} on {endpoint}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                span.attributes.update(status=response.status_code, output_bytes=len(response.content))
+                if response.status_code in RETRYABLE_STATUSES and attempt < MAX_RETRIES:
+                    retry_after = _retry_after_seconds(response.headers.get('retry-after')) or 0.0
+                    delay = min(max(retry_after, _backoff_seconds(attempt)), RETRY_MAX_DELAY)
+                    logger.warning(f"Blockscout returned {response.status_code} for {endpoint}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json()
+
+    async def iter_pages(self, endpoint: str, params: dict[str, Any] | None = None,
+                         max_pages: int | None = None, prefetch: bool = True) -> AsyncIterator[list[dict]]:
+        """
+        Yields the `items` of each page of a paginated list endpoint, following
+        Blockscout's `next_page_params` cursor until it is exhausted (or max_pages is reached).
+        With `prefetch`, the next page is requested as soon as a page arrives, so the network
+        round-trip overlaps with the caller's processing; at most two pages are held in memory.
+        """
+        pages_fetched = 0
+        next_request = asyncio.ensure_future(self.get(endpoint, dict(params or {})))
+        try:
+            while next_request is not None:
+                data = await next_request
+                next_request = None
+                pages_fetched += 1
+
+                next_page_params = data.get('next_page_params')
+                if next_page_params and max_pages is not None and pages_fetched >= max_pages:
+                    logger.info(f"Stopping pagination of {endpoint} after {pages_fetched} pages (max_pages reached)")
+                elif next_page_params:
+                    next_request = self.get(endpoint, {**(params or {}), **next_page_params})
+                    if prefetch:
+                        next_request = asyncio.ensure_future(next_request)
+                yield data.get('items', [])
+        finally:
+            if isinstance(next_request, asyncio.Future):
+                next_request.cancel()
+            elif next_request is not None:
+                next_request.close()  # un-awaited coroutine from a consumer that stopped early
+
+    async def iter_items(self, endpoint: str, params: dict[str, Any] | None = None,
+                         max_pages: int | None = None, prefetch: bool = True) -> AsyncIterator[dict]:
+        """Streams the individual items of a paginated list endpoint across all pages."""
+        async for items in self.iter_pages(endpoint, params, max_pages=max_pages, prefetch=prefetch):
+            for item in items:
+                yield item
+
+    async def get_address_logs(self, address_hash: str, max_pages: int | None = None,
+                               prefetch: bool = True) -> AsyncIterator[list[dict]]:
+        """Pages through all logs emitted by a contract, newest first."""
+        async for items in self.iter_pages(f'/addresses/{address_hash}/logs', max_pages=max_pages, prefetch=prefetch):
+            yield items
@@ -1,108 +1,404 @@
 import asyncio
 import argparse
+import json
 import os
+import sys
 from dotenv import load_dotenv
-import agents # openai-agents
-from agents.tools import mcp
 
-# Assuming your oai_client.py structure is similar and can be adapted
-# This will be a simplified version focusing on the query logic
+# blockscout_agent/ holds the shared Blockscout client and P2P event decoder
+AGENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, AGENT_DIR)
 
-async def get_p2p_user_activity_summary(user_address: str, user_registry_address: str, reputation_address: str, p2p_lending_address: str) -> str:
-    """ 
-    Instructs the AI agent to fetch, analyze, and summarize P2P activity for a user.
+from blockscout_api import BlockscoutClient
+from p2p_events import LOAN_STATUS_NAMES, MODIFICATION_TYPE_NAMES, DecodedEvent, EventDecoder, enum_name
+from p2p_indexer import DEFAULT_DB_PATH, IndexStore, P2PIndexer, default_chain_label
+
+DEFAULT_CONCURRENCY = 8
+
+
+async def fetch_p2p_transactions(client: BlockscoutClient, user_address: str, contract_addresses: set[str],
+                                 max_pages: int | None = None) -> list[dict]:
+    """Pages through the user's transactions and keeps the ones sent to one of the P2P contracts."""
+    relevant = []
+    async for items in client.iter_pages(f'/addresses/{user_address}/transactions', max_pages=max_pages):
+        for tx in items:
+            to = tx.get('to') or {}
+            to_address = (to.get('hash') if isinstance(to, dict) else to) or ''
+            if to_address.lower() in contract_addresses:
+                relevant.append(tx)
+    return relevant
+
+
+async def fetch_transaction_logs(client: BlockscoutClient, tx_hashes: list[str],
+                                 concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, list[dict]]:
+    """Fetches the logs of every transaction, at most `concurrency` requests at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(tx_hash: str) -> tuple[str, list[dict]]:
+        async with semaphore:
+            logs = []
+            async for items in client.iter_pages(f'/transactions/{tx_hash}/logs'):
+                logs.extend(items)
+            return tx_hash, logs
+
+    return dict(await asyncio.gather(*(fetch(tx_hash) for tx_hash in tx_hashes)))
+
+
+def decode_p2p_events(logs_by_tx: dict[str, list[dict]], contract_addresses: set[str],
+                      decoder: EventDecoder | None = None) -> list[DecodedEvent]:
+    """Decodes the logs emitted by the P2P contracts, oldest first."""
+    decoder = decoder or EventDecoder.for_p2p_contracts()
+    events = []
+    for tx_hash, logs in logs_by_tx.items():
+        for log in logs:
+            decoded = decoder.decode({**log, 'transaction_hash': log.get('transaction_hash') or tx_hash})
+            if decoded and decoded.address in contract_addresses:
+                events.append(decoded)
+    events.sort(key=lambda e: (e.block_number, e.log_index))
+    return events
+
+
+def build_activity_summary(user_address: str, events: list[DecodedEvent]) -> dict:
+    """
+    Folds the decoded P2P events into a structured lifecycle summary for one user:
+    registration, offers, requests, agreements (with repayments/defaults/modifications),
+    vouches and reputation changes.
+    """
+    user = user_address.lower()
+    summary = {
+        'user': user,
+        'registration': None,
+        'offers': [],
+        'requests': [],
+        'agreements': {},
+        'vouches_given': [],
+        'vouches_removed': [],
+        'vouches_slashed': [],
+        'reputation_updates': [],
+        'latest_reputation_score': None,
+    }
+    agreements = summary['agreements']
+
+    for event in events:
+        args = event.args
+        ref = {'tx_hash': event.transaction_hash, 'block_number': event.block_number}
+        if event.event == 'UserRegistered' and args['userAddress'] == user:
+            summary['registration'] = {'name': args['name'], 'timestamp': args['timestamp'], **ref}
+        elif event.event == 'UserProfileUpdated' and args['userAddress'] == user and summary['registration']:
+            summary['registration']['name'] = args['newName']
+        elif event.event == 'LoanOfferCreated' and args['lender'] == user:
+            summary['offers'].append({
+                'offer_id': args['offerId'], 'amount': args['amount'], 'token': args['token'],
+                'interest_rate_bps': args['interestRateBPS'], 'duration_seconds': args['durationSeconds'], **ref,
+            })
+        elif event.event == 'LoanRequestCreated' and args['borrower'] == user:
+            summary['requests'].append({
+                'request_id': args['requestId'], 'amount': args['amount'], 'token': args['token'],
+                'interest_rate_bps': args['proposedInterestRateBPS'],
+                'duration_seconds': args['proposedDurationSeconds'], **ref,
+            })
+        elif event.event == 'LoanAgreementCreated' and user in (args['lender'], args['borrower']):
+            agreements[args['agreementId']] = {
+                'agreement_id': args['agreementId'],
+                'role': 'borrower' if args['borrower'] == user else 'lender',
+                'lender': args['lender'], 'borrower': args['borrower'],
+                'principal': args['principalAmount'], 'token': args['token'],
+                'interest_rate_bps': args['interestRateBPS'], 'due_date': args['dueDate'],
+                'collateral_amount': args['collateralAmount'],
+                'status': 'Active', 'amount_paid': 0, 'remaining_balance': None,
+                'repayments': [], 'modifications': [], **ref,
+            }
+        elif event.event == 'LoanRepayment' and args['agreementId'] in agreements:
+            agreement = agreements[args['agreementId']]
+            agreement['repayments'].append({'amount': args['amountPaidThisTime'], 'payer': args['payer'], **ref})
+            agreement['amount_paid'] = args['newTotalAmountPaid']
+            agreement['remaining_balance'] = args['newRemainingBalance']
+            agreement['status'] = enum_name(LOAN_STATUS_NAMES, args['newStatus'])
+        elif event.event == 'LoanAgreementRepaid' and args['agreementId'] in agreements:
+            agreements[args['agreementId']]['status'] = 'Repaid'
+        elif event.event == 'LoanAgreementDefaulted' and args['agreementId'] in agreements:
+            agreements[args['agreementId']]['status'] = 'Defaulted'
+        elif event.event in ('PaymentModificationRequested', 'PaymentModificationResponded') \
+                and args['agreementId'] in agreements:
+            agreements[args['agreementId']]['modifications'].append({
+                'event': event.event,
+                'type': enum_name(MODIFICATION_TYPE_NAMES, args['modificationType']),
+                'value': args.get('value', args.get('originalRequestedValue')),
+                'approved': args.get('approved'), **ref,
+            })
+        elif event.event == 'VouchAdded' and args['voucher'] == user:
+            summary['vouches_given'].append({'borrower': args['borrower'], 'token': args['token'],
+                                             'amount': args['amount'], **ref})
+        elif event.event == 'VouchRemoved' and args['voucher'] == user:
+            summary['vouches_removed'].append({'borrower': args['borrower'],
+                                               'returned_amount': args['returnedAmount'], **ref})
+        elif event.event == 'VouchSlashed' and args['voucher'] == user:
+            summary['vouches_slashed'].append({'borrower': args['defaultingBorrower'],
+                                               'slashed_amount': args['slashedAmount'], **ref})
+        elif event.event == 'ReputationUpdated' and args['user'] == user:
+            summary['reputation_updates'].append({'new_score': args['newScore'], 'reason': args['reason'], **ref})
+            summary['latest_reputation_score'] = args['newScore']
+
+    summary['agreements'] = list(agreements.values())
+    summary['counts'] = {
+        'offers_created': len(summary['offers']),
+        'requests_created': len(summary['requests']),
+        'loans_as_borrower': sum(1 for a in summary['agreements'] if a['role'] == 'borrower'),
+        'loans_as_lender': sum(1 for a in summary['agreements'] if a['role'] == 'lender'),
+        'loans_repaid': sum(1 for a in summary['agreements'] if a['status'] == 'Repaid'),
+        'loans_defaulted': sum(1 for a in summary['agreements'] if a['status'] == 'Defaulted'),
+        'vouches_given': len(summary['vouches_given']),
+    }
+    return summary
+
+
+def format_activity_summary(summary: dict) -> str:
+    """Plain-text rendering of build_activity_summary()'s output."""
+    counts = summary['counts']
+    lines = [f"P2P activity for {summary['user']}"]
+    registration = summary['registration']
+    if registration:
+        lines.append(f"- Registered as '{registration['name']}' in block {registration['block_number']}")
+    else:
+        lines.append("- No UserRegistered event found in the user's transactions")
+    if not any(counts.values()) and not summary['reputation_updates']:
+        lines.append("- No P2P lending activity found")
+        return "\n".join(lines)
+
+    lines.append(f"- Created {counts['offers_created']} loan offer(s) and {counts['requests_created']} loan request(s)")
+    lines.append(f"- Loan agreements: {counts['loans_as_borrower']} as borrower, {counts['loans_as_lender']} as lender "
+                 f"({counts['loans_repaid']} repaid, {counts['loans_defaulted']} defaulted)")
+    for agreement in summary['agreements']:
+        details = [f"principal {agreement['principal']} of {agreement['token']}", f"paid {agreement['amount_paid']}"]
+        if agreement['remaining_balance'] is not None:
+            details.append(f"remaining {agreement['remaining_balance']}")
+        details.append(f"status {agreement['status']}")
+        if agreement['modifications']:
+            details.append(f"{len(agreement['modifications'])} modification event(s)")
+        lines.append(f"  - {agreement['agreement_id']} ({agreement['role']}): {', '.join(details)}")
+    if summary['vouches_given']:
+        lines.append(f"- Vouched {len(summary['vouches_given'])} time(s) for: "
+                     f"{', '.join(sorted({v['borrower'] for v in summary['vouches_given']}))}")
+    if summary['vouches_slashed']:
+        lines.append(f"- {len(summary['vouches_slashed'])} vouch(es) slashed after borrower defaults")
+    if summary['latest_reputation_score'] is not None:
+        lines.append(f"- Latest reputation score: {summary['latest_reputation_score']} "
+                     f"({len(summary['reputation_updates'])} update(s))")
+    return "\n".join(lines)
+
+
+async def word_summary_with_llm(summary: dict) -> str:
+    """Optional: has the LLM turn the structured summary into prose. No tools, one call."""
+    from agents import Agent, Runner  # openai-agents, only needed for --llm
+
+    agent = Agent(
+        name="P2PActivityWriter",
+        instructions="You write concise natural-language summaries of a user's P2P lending lifecycle. "
+                     "Use only the facts in the JSON you are given; do not invent data.",
+        model="gpt-4-turbo",
+    )
+    result = await Runner.run(starting_agent=agent, input=json.dumps(summary, default=str))
+    return result.final_output
+
+
+async def get_p2p_user_activity_summary(user_address: str, user_registry_address: str, reputation_address: str,
+                                        p2p_lending_address: str, max_pages: int | None = None,
+                                        concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+    """
+    Deterministic pipeline: page the user's transactions, keep those sent to the P2P contracts,
+    fetch their logs concurrently, decode them and fold them into a lifecycle summary.
+    Only events from transactions the user sent are seen (e.g. a default triggered by the lender
+    shows up in the lender's summary, not the borrower's).
     """
     print(f"Analyzing P2P activity for user: {user_address}")
     print(f"P2P Contracts: UserRegistry={user_registry_address}, Reputation={reputation_address}, P2PLending={p2p_lending_address}")
+    contract_addresses = {a.lower() for a in (user_registry_address, reputation_address, p2p_lending_address)}
+
+    async with BlockscoutClient(os.getenv("BLOCKSCOUT_API_URL")) as client:
+        transactions = await fetch_p2p_transactions(client, user_address, contract_addresses, max_pages)
+        print(f"Found {len(transactions)} transaction(s) sent to the P2P contracts")
+        logs_by_tx = await fetch_transaction_logs(client, [tx['hash'] for tx in transactions], concurrency)
+
+    events = decode_p2p_events(logs_by_tx, contract_addresses)
+    return build_activity_summary(user_address, events)
+
+def group_events_by_user(events: list[DecodedEvent]) -> dict[str, list[DecodedEvent]]:
+    """
+    Splits a contract-wide event stream (oldest first) into the events relevant to each address:
+    events naming the address, plus every event of the agreements it is a party to
+    (LoanAgreementRepaid/Defaulted only carry the agreement id).
+    """
+    agreement_parties: dict[str, set[str]] = {}
+    events_by_user: dict[str, list[DecodedEvent]] = {}
+    for event in events:
+        participants = {event.user, event.counterparty, event.args.get('slashedToLender')}
+        if event.event == 'LoanAgreementCreated':
+            agreement_parties[event.agreement_id] = {event.args['lender'], event.args['borrower']}
+        if event.agreement_id:
+            participants |= agreement_parties.get(event.agreement_id, set())
+        for participant in participants - {None}:
+            events_by_user.setdefault(participant, []).append(event)
+    return events_by_user
+
+
+def registered_users(events: list[DecodedEvent]) -> list[str]:
+    """Addresses of all UserRegistered events, in registration order."""
+    return list(dict.fromkeys(e.args['userAddress'] for e in events if e.event == 'UserRegistered'))
+
+
+def read_addresses_file(path: str) -> list[str]:
+    """One address per line; blank lines and # comments are ignored."""
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line.lower() for line in lines if line))
+
+
+def completed_users(jsonl_path: str) -> set[str]:
+    """
+    Users already written to a (possibly interrupted) JSONL output. The output doubles as the
+    checkpoint: a partially written last line is dropped so that user gets redone.
+    """
+    done = set()
+    if not os.path.exists(jsonl_path):
+        return done
+    with open(jsonl_path, 'rb+') as f:
+        valid_length = 0
+        for line in f:
+            try:
+                done.add(json.loads(line)['user'])
+            except (ValueError, KeyError):
+                break
+            valid_length += len(line)
+        f.truncate(valid_length)
+    return done
+
+
+def write_parquet(jsonl_path: str, parquet_path: str) -> None:
+    """Converts the JSONL results to Parquet: flat count columns plus the full summary as JSON text."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output requires pyarrow (pip install pyarrow); the JSONL results are in " + jsonl_path)
+
+    rows = []
+    with open(jsonl_path) as f:
+        for line in f:
+            summary = json.loads(line)
+            registration = summary['registration'] or {}
+            score = summary['latest_reputation_score']
+            rows.append({
+                'user': summary['user'],
+                'registered_name': registration.get('name'),
+                'registered_block': registration.get('block_number'),
+                **summary['counts'],
+                # int256 scores don't fit Parquet's int64 in general
+                'latest_reputation_score': str(score) if score is not None else None,
+                'summary_json': line.strip(),
+            })
+    pq.write_table(pa.Table.from_pylist(rows), parquet_path)
 
-    # 1. Initialize MCP Toolset (pointing to blockscout-mcp-server)
-    blockscout_mcp_command = os.getenv("BLOCKSCOUT_MCP_COMMAND", "npx -y blockscout-mcp")
-    mcp_server_params = mcp.StdioServerParameters(
-        command=blockscout_mcp_command.split()[0],
-        args=blockscout_mcp_command.split()[1:],
-        env={"BLOCKSCOUT_API_URL": os.getenv("BLOCKSCOUT_API_URL")}
-    )
-    mcp_toolset = mcp.MCPToolset(name="blockscout_mcp", server_params=mcp_server_params)
-    await mcp_toolset.start()
-    print(f"Blockscout MCP Toolset started. Available tools: {await mcp_toolset.get_tools_json()}")
-
-    # 2. Initialize Agent
-    # Ensure OPENAI_API_KEY is in .env or environment
-    llm_agent = agents.Agent(
-        tools=[mcp_toolset],
-        model="gpt-4-turbo", # or your preferred model
-        # temperature=0.7,
-    )
 
-    # 3. Construct the complex query for the agent
-    query = f"""
-    Analyze the P2P lending activity for user address {user_address} 
-    interacting with the following smart contracts:
-    - UserRegistry: {user_registry_address}
-    - Reputation: {reputation_address}
-    - P2PLending: {p2p_lending_address}
-
-    Follow these steps:
-    1. Get all transactions for {user_address} using the get_address_transactions tool.
-    2. From these transactions, identify those where the 'to' address is one of the P2P contract addresses listed above, or where {user_address} is the 'from' address and the 'to' address is one of the P2P contracts.
-    3. For each of these relevant P2P transactions, get its event logs using the get_transaction_logs tool.
-    4. Based on the decoded event logs (e.g., UserRegistered, LoanOfferCreated, LoanVouched, LoanRepaid, LoanDefaulted, ReputationUpdated from the P2P contracts), provide a concise summary of the user's lifecycle and key activities within this P2P system. Highlight how many loans they've created, participated in as a borrower or lender/voucher, and their repayment status if discernible.
-    5. If no relevant P2P activity is found, state that clearly.
-    Provide only the summary of activities.
+async def run_batch_analysis(user_registry_address: str, reputation_address: str, p2p_lending_address: str,
+                             output_path: str, addresses: list[str] | None = None,
+                             db_path: str = DEFAULT_DB_PATH, chain: str | None = None,
+                             concurrency: int = DEFAULT_CONCURRENCY) -> int:
     """
+    Summarizes many users at once. The three contracts' logs are synced once into the local
+    index (incrementally and in parallel, at most `concurrency` contracts at a time, see
+    p2p_indexer.py) and shared by every user, so there are no per-user Blockscout requests.
+    Users default to everyone in the registry's UserRegistered events. Each summary is flushed
+    to a JSONL file that also serves as the resume checkpoint; a .parquet output is converted
+    from it at the end. Returns the number of users written by this run.
+    """
+    blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL")
+    chain = chain or default_chain_label(blockscout_api_url)
+    contract_addresses = [user_registry_address, reputation_address, p2p_lending_address]
+    store = IndexStore(db_path)
+    try:
+        async with BlockscoutClient(blockscout_api_url) as client:
+            new_rows = await P2PIndexer(client, store, chain).sync_contracts(contract_addresses, concurrency)
+        print(f"Synced {new_rows} new contract events into {db_path}")
+        contract_set = {a.lower() for a in contract_addresses}
+        events = [e for e in reversed(store.query_events(chain)) if e.address in contract_set]
+    finally:
+        store.close()
+
+    users = addresses or registered_users(events)
+    events_by_user = group_events_by_user(events)
+
+    jsonl_path = output_path[:-len('.parquet')] + '.jsonl' if output_path.endswith('.parquet') else output_path
+    done = completed_users(jsonl_path)
+    pending = [u.lower() for u in users if u.lower() not in done]
+    print(f"{len(users)} user(s): {len(done)} already done, {len(pending)} to analyze")
 
-    print(f"\n--- Sending Query to Agent ---\n{query}
------------------------------\n")
-
-    # 4. Run the agent
-    response_stream = llm_agent.arun(query)
-    final_response = ""
-    async for event in response_stream:
-        if event.type == agents.events. pensiero.Text:
-            print(event.text, end="", flush=True)
-            final_response += event.text
-        elif event.type == agents.events.tool.Call:
-            print(f"\nTool Call: {event.tool_name} with args {event.arguments}")
-        elif event.type == agents.events.tool.Result:
-            print(f"\nTool Result for {event.tool_name}: {event.result}")
-        elif event.type == agents.events.tool.Error:
-            print(f"\nTool Error for {event.tool_name}: {event.error}")
-        elif event.type == agents.events.Error:
-            print(f"\nAgent Error: {event.error}")
-            await mcp_toolset.stop()
-            return f"Agent Error: {event.error}"
-        elif event.type == agents.events.Final:
-            print("\n--- Agent run completed ---")
-
-    await mcp_toolset.stop()
-    return final_response
+    with open(jsonl_path, 'a') as out:
+        for i, user in enumerate(pending, 1):
+            summary = build_activity_summary(user, events_by_user.get(user, []))
+            out.write(json.dumps(summary, default=str) + '\n')
+            out.flush()  # an interrupted run resumes after the last written user
+            if i % 100 == 0:
+                print(f"  {len(done) + i}/{len(users)} users written")
+
+    if output_path != jsonl_path:
+        write_parquet(jsonl_path, output_path)
+    print(f"Wrote {len(done) + len(pending)} summaries to {output_path}")
+    return len(pending)
 
 async def main():
-    parser = argparse.ArgumentParser(description="Analyze P2P user activity using Blockscout AI agent.")
-    parser.add_argument("--user_address", required=True, help="The user's wallet address.")
+    parser = argparse.ArgumentParser(description="Analyze P2P user activity using the Blockscout API.")
+    users = parser.add_mutually_exclusive_group(required=True)
+    users.add_argument("--user_address", help="The user's wallet address.")
+    users.add_argument("--addresses_file", help="Batch mode: file with one user address per line.")
+    users.add_argument("--all_registered", action="store_true", help="Batch mode: every user in the registry's UserRegistered events.")
     parser.add_argument("--user_registry_address", required=True, help="Deployed UserRegistry contract address.")
     parser.add_argument("--reputation_address", required=True, help="Deployed Reputation contract address.")
     parser.add_argument("--p2p_lending_address", required=True, help="Deployed P2PLending contract address.")
+    parser.add_argument("--max_pages", type=int, default=None, help="Stop after this many pages of transactions.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Parallel log requests (contract log syncs in batch mode).")
+    parser.add_argument("--json", action="store_true", help="Print the structured summary as JSON.")
+    parser.add_argument("--llm", action="store_true", help="Have the OpenAI agent word the final summary.")
+    parser.add_argument("--output", default="p2p_user_activity.jsonl", help="Batch mode: .jsonl or .parquet output (resumed if it exists).")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Batch mode: local event index shared across runs.")
 
     args = parser.parse_args()
 
-    load_dotenv(dotenv_path="../../.env") # Load from root .env
-    # Ensure BLOCKSCOUT_API_URL and OPENAI_API_KEY are set
-    if not os.getenv("OPENAI_API_KEY"):
-        print("Error: OPENAI_API_KEY not found in environment or .env file.")
+    load_dotenv(dotenv_path=os.path.join(AGENT_DIR, '.env'))
+    # Ensure BLOCKSCOUT_API_URL (and OPENAI_API_KEY for --llm) are set
+    if args.llm and not os.getenv("OPENAI_API_KEY"):
+        print("Error: OPENAI_API_KEY not found in environment or .env file (required for --llm).")
         return
     if not os.getenv("BLOCKSCOUT_API_URL"):
         print("Error: BLOCKSCOUT_API_URL not found in environment or .env file. Please set it to e.g. https://evm-testnet.flowscan.io/api")
         return
 
+    if not args.user_address:
+        await run_batch_analysis(
+            args.user_registry_address,
+            args.reputation_address,
+            args.p2p_lending_address,
+            args.output,
+            addresses=read_addresses_file(args.addresses_file) if args.addresses_file else None,
+            db_path=args.db,
+            concurrency=args.concurrency,
+        )
+        return
+
     summary = await get_p2p_user_activity_summary(
         args.user_address,
         args.user_registry_address,
         args.reputation_address,
-        args.p2p_lending_address
+        args.p2p_lending_address,
+        max_pages=args.max_pages,
+        concurrency=args.concurrency,
     )
     print("\n--- P2P Activity Summary ---")
-    print(summary)
+    if args.json:
+        print(json.dumps(summary, indent=2, default=str))
+    elif args.llm:
+        print(await word_summary_with_llm(summary))
+    else:
+        print(format_activity_summary(summary))
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
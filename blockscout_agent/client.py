@@ -1,8 +1,13 @@
 import asyncio
+import argparse
+import contextlib
+import json
 import os
 import logging
+import sys
 from dotenv import load_dotenv
 from google.genai import types
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 
@@ -13,13 +18,22 @@ load_dotenv(dotenv_path=dotenv_path)
 
 # Now import agent now that .env is loaded for it
 from agent import get_agent_async, MCPToolset
+from projection import slim_tool_output
+from answer_cache import DEFAULT_ANSWER_CACHE_PATH, AnswerCache
+from networks import bundled_contracts, load_networks
+from p2p_indexer import DEFAULT_DB_PATH, IndexStore, default_chain_label
+from session_memory import DEFAULT_TOKEN_BUDGET, SessionCompactor
+from tracing import AdkEventTracer, configure_tracing, trace_span
+from batch_runner import (DEFAULT_CONCURRENCY, DEFAULT_QUERY_TIMEOUT, TokenBucket,
+                          load_queries_file, run_batch)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# --- Deployed Contract Addresses on WorldChain Sepolia Testnet ---
-USER_REGISTRY_CONTRACT = "0x7D6183146cdc682E004A1dad84636c1ccd892EcC"
-REPUTATION_CONTRACT = "0xef9a0281DBFE7eb05710640d94d18C91480b47f3"
-P2P_LENDING_CONTRACT = "0x4491eCbe72569f718977C7cDee251237152bd4A0"
+# --- Deployed Contract Addresses on WorldChain Sepolia Testnet (see networks.json) ---
+WORLDCHAIN_SEPOLIA_CONTRACTS = bundled_contracts("worldchain-sepolia")
+USER_REGISTRY_CONTRACT = WORLDCHAIN_SEPOLIA_CONTRACTS["UserRegistry"]
+REPUTATION_CONTRACT = WORLDCHAIN_SEPOLIA_CONTRACTS["Reputation"]
+P2P_LENDING_CONTRACT = WORLDCHAIN_SEPOLIA_CONTRACTS["P2PLending"]
 # MOCK_REPUTATION_OAPP_CONTRACT = "0x1A22Bd93d7569785f40f75cf8bE41b0469c0C816" # Not directly queried by agent
 
 # User addresses for testing queries on WorldChain Sepolia
@@ -35,7 +49,107 @@ BORROWER_A = "0x4ddB3e81434cb130512edaa04092E5b17297f1c5"
 # Placeholder for a loan agreement ID - will need to be obtained from actual contract interaction
 LOAN_AGREEMENT_ID_EXAMPLE = "0x0000000000000000000000000000000000000000000000000000000000000000" # Update after creating an agreement
 
-async def run_test_queries(runner, session, agent_name):
+async def run_single_query(runner, session, agent_name, test_case, stream=False, answer_cache=None, verbose=True):
+    """
+    Runs one query through the ADK runner and returns the agent's final text response.
+    With `stream`, the model's text is printed as it is generated (server-sent events from Gemini).
+    With an `answer_cache`, a still-valid answer to the same question is returned without running the agent.
+    Without `verbose` nothing is printed (progress only goes to the log), so stdout stays free for
+    the JSON lines of --queries-file.
+    """
+    logging.info(f"\n--- Running Test Query: {test_case['description']} ---")
+    if verbose:
+        print(f"\n--- Running Test Query: {test_case['description']} ---")
+        print(f"Query: {test_case['query_text']}")
+
+    cached = answer_cache.get(test_case['query_text'], agent_name) if answer_cache else None
+    if cached is not None:
+        if verbose:
+            print(f"\nFinal Agent Response to query '{test_case['description']}' (cached):\n{cached}")
+            print("-----------------------------------------------------")
+        logging.info(f"Cached Agent Response to query '{test_case['description']}': {cached}")
+        return cached
+
+    content = types.Content(role='user', parts=[types.Part(text=test_case['query_text'])])
+
+    logging.info("Running agent with test query...")
+    events_async = runner.run_async(
+        session_id=session.id, 
+        user_id=session.user_id, 
+        new_message=content,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE if stream else StreamingMode.NONE),
+    )
+
+    final_response_text = ""
+    with trace_span(test_case['description'], "query", query=test_case['query_text']) as query_span:
+        event_tracer = AdkEventTracer(agent_name)
+        try:
+            final_response_text = await _consume_events(events_async, agent_name, event_tracer, stream, verbose)
+        finally:
+            event_tracer.close()
+        query_span.attributes["output_bytes"] = len(final_response_text)
+    if answer_cache:
+        answer_cache.put(test_case['query_text'], final_response_text, agent_name)
+
+    if verbose:
+        print(f"\nFinal Agent Response to query '{test_case['description']}':\n{final_response_text}")
+        print("-----------------------------------------------------")
+    logging.info(f"Final Agent Response to query '{test_case['description']}': {final_response_text}")
+    return final_response_text
+
+async def _consume_events(events_async, agent_name, event_tracer, stream=False, verbose=True):
+    final_response_text = ""
+    async for event in events_async:
+        if event.partial:
+            # Streamed chunk; the complete response follows as a regular event
+            if verbose and event.content and event.content.parts:
+                print("".join(part.text for part in event.content.parts if getattr(part, 'text', None)), end="", flush=True)
+            continue
+        event_tracer.on_event(event)
+        logging.info(f"Event received from author: {event.author}")
+        if verbose:
+            print(f"Event from: {event.author}")
+
+        function_calls = event.get_function_calls()
+        if function_calls:
+            if verbose:
+                print(f"  Type: Tool Call Request")
+            for call in function_calls:
+                tool_name = call.name
+                tool_args = call.args
+                if verbose:
+                    print(f"    Tool: {tool_name}, Args: {tool_args}")
+                logging.info(f"Agent requests tool call: {tool_name} with args: {tool_args}")
+        
+        function_responses = event.get_function_responses()
+        if function_responses:
+            if verbose:
+                print(f"  Type: Tool Execution Result")
+            for resp in function_responses:
+                tool_name = resp.name
+                if verbose:
+                    print(f"    Tool: {tool_name}, Output: (Output logged)")
+                logging.info(f"Tool output ({tool_name}): {slim_tool_output(json.dumps(resp.response, default=str))}")
+
+        if event.author == agent_name and not function_calls and not function_responses:
+            if event.content and event.content.parts:
+                if verbose:
+                    print(f"  Type: LLM Text Response")
+                current_response_part = ""
+                for part in event.content.parts:
+                    if hasattr(part, 'text') and part.text:
+                        if verbose and not stream:  # already printed chunk by chunk
+                            print(f"    LLM Response Part: {part.text}")
+                        current_response_part += part.text
+                final_response_text += current_response_part
+                logging.info(f"LLM Response part from {agent_name}: {current_response_part}")
+            else:
+                logging.info(f"Event from {agent_name} without function calls/responses or text parts: {event}")
+    return final_response_text
+
+async def run_test_queries(runner, session_service, agent_name, queries_file=None,
+                           concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_QUERY_TIMEOUT, rate_limit=None,
+                           stream=False, answer_cache=None):
     # p2p_contract_queries = [
     #     {
     #         "description": "WorldChain Sepolia: Get details for the latest block (SIMPLE TEST)",
@@ -91,75 +205,52 @@ async def run_test_queries(runner, session, agent_name):
     active_queries = flow_evm_test_queries
     # active_queries = queries # To run old general tests
 
-    for i, test_case in enumerate(active_queries):
-        logging.info(f"\n--- Running Test Query {i+1}: {test_case['description']} ---")
-        print(f"\n--- Running Test Query {i+1}: {test_case['description']} ---")
-        print(f"Query: {test_case['query_text']}")
-        
-        content = types.Content(role='user', parts=[types.Part(text=test_case['query_text'])])
+    if queries_file:
+        active_queries = [{**q, "description": q.get("description", q["name"])} for q in load_queries_file(queries_file)]
 
-        logging.info("Running agent with test query...")
-        events_async = runner.run_async(
-            session_id=session.id, 
-            user_id=session.user_id, 
-            new_message=content
+    # Each query gets its own session so concurrent runs don't interleave their histories.
+    # Query starts are spaced by a token bucket tuned to Blockscout's rate limits instead of fixed sleeps.
+    async def run_test_case(test_case):
+        session = session_service.create_session(
+            state={}, app_name='blockscout_agent_app', user_id='user_blockscout'
         )
+        try:
+            return await run_single_query(runner, session, agent_name, test_case, stream=stream,
+                                          answer_cache=answer_cache, verbose=not queries_file)
+        finally:
+            # Finished sessions would otherwise keep every event (and tool output) in memory
+            session_service.delete_session(
+                app_name='blockscout_agent_app', user_id='user_blockscout', session_id=session.id
+            )
 
-        final_response_text = ""
-        async for event in events_async:
-            logging.info(f"Event received from author: {event.author}")
-            print(f"Event from: {event.author}")
-
-            function_calls = event.get_function_calls()
-            if function_calls:
-                print(f"  Type: Tool Call Request")
-                for call in function_calls:
-                    tool_name = call.name
-                    tool_args = call.args
-                    print(f"    Tool: {tool_name}, Args: {tool_args}")
-                    logging.info(f"Agent requests tool call: {tool_name} with args: {tool_args}")
-            
-            function_responses = event.get_function_responses()
-            if function_responses:
-                print(f"  Type: Tool Execution Result")
-                for resp in function_responses:
-                    tool_name = resp.name
-                    print(f"    Tool: {tool_name}, Output: (Output logged)")
-                    logging.info(f"Tool output ({tool_name}): {resp.response}")
-
-            if event.author == agent_name and not function_calls and not function_responses:
-                if event.content and event.content.parts:
-                    print(f"  Type: LLM Text Response")
-                    current_response_part = ""
-                    for part in event.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            print(f"    LLM Response Part: {part.text}")
-                            current_response_part += part.text
-                    final_response_text += current_response_part
-                    logging.info(f"LLM Response part from {agent_name}: {current_response_part}")
-                else:
-                    logging.info(f"Event from {agent_name} without function calls/responses or text parts: {event}")
+    if stream:
+        concurrency = 1  # streamed answers printed as they arrive would interleave
+    rate_limiter = TokenBucket(rate_limit) if rate_limit else TokenBucket()
+    queries = [{**q, "name": q["description"]} for q in active_queries]
+    async for result in run_batch(queries, run_test_case, concurrency=concurrency,
+                                  rate_limiter=rate_limiter, timeout=timeout):
+        if queries_file:
+            print(result.to_json(), flush=True)
+        elif not result.ok:
+            print(f"\nQuery '{result.name}' failed after {result.elapsed:.1f}s: {result.error}")
+            logging.error(f"Query '{result.name}' failed: {result.error}")
 
-        print(f"\nFinal Agent Response to query '{test_case['description']}':\n{final_response_text}")
-        logging.info(f"Final Agent Response to query '{test_case['description']}': {final_response_text}")
-        print("-----------------------------------------------------")
-        if i < len(active_queries) - 1:
-            print("Pausing for a few seconds before next query...")
-            await asyncio.sleep(5) # Pause to allow MCP server to reset or handle back-to-back calls gracefully
+async def async_main(args):
+    # With --queries-file stdout carries only the JSON result lines: every other message goes to stderr
+    setup_output = sys.stderr if args.queries_file else sys.stdout
 
-async def async_main():
     google_api_key = os.getenv("GOOGLE_API_KEY")
     if not google_api_key or google_api_key == "YOUR_KEY_HERE":
         logging.error("CRITICAL: GOOGLE_API_KEY environment variable not set or is a placeholder.")
         logging.error("Please create/update 'blockscout_agent/.env' with your actual Google API Key.")
-        print("\nExiting: GOOGLE_API_KEY is missing or invalid. Please set it in blockscout_agent/.env")
+        print("\nExiting: GOOGLE_API_KEY is missing or invalid. Please set it in blockscout_agent/.env", file=setup_output)
         return
 
     blockscout_url = os.getenv("BLOCKSCOUT_API_URL")
     if not blockscout_url:
         logging.error("CRITICAL: BLOCKSCOUT_API_URL environment variable not set.")
         logging.error("Please create/update 'blockscout_agent/.env' with a valid Blockscout API URL (e.g., https://eth.blockscout.com/api).")
-        print("\nExiting: BLOCKSCOUT_API_URL is missing. Please set it in blockscout_agent/.env")
+        print("\nExiting: BLOCKSCOUT_API_URL is missing. Please set it in blockscout_agent/.env", file=setup_output)
         return
 
     logging.info(f"Using GOOGLE_API_KEY: ...{google_api_key[-4:] if google_api_key else 'Not Set'}")
@@ -167,12 +258,16 @@ async def async_main():
     logging.info("IMPORTANT: If testing with contracts on a testnet (e.g., Sepolia), ensure BLOCKSCOUT_API_URL in .env points to the correct Blockscout API for that testnet (e.g., https://eth-sepolia.blockscout.com/api).")
     logging.info(f"IMPORTANT: Contract addresses in client.py are set for WorldChain Sepolia: UR: {USER_REGISTRY_CONTRACT}, Rep: {REPUTATION_CONTRACT}, P2P: {P2P_LENDING_CONTRACT}")
 
+    if configure_tracing(args.trace_jsonl, args.trace_otlp) and args.trace_jsonl:
+        # Picked up by the MCP server that agent.py starts: its Blockscout HTTP spans go to the same file
+        os.environ.setdefault("BLOCKSCOUT_TRACE_FILE", args.trace_jsonl)
+
     session_service = InMemorySessionService()
-    session = session_service.create_session(
-        state={}, app_name='blockscout_agent_app', user_id='user_blockscout'
-    )
     
-    root_agent, exit_stack = await get_agent_async()
+    # Keeps old tool outputs out of the re-sent context (see session_memory.py); --context-budget 0 disables it
+    compactor = SessionCompactor(token_budget=args.context_budget) if args.context_budget > 0 else None
+    with contextlib.redirect_stdout(setup_output):
+        root_agent, exit_stack = await get_agent_async(compactor)
 
     if not root_agent:
         logging.error("Agent could not be initialized. Check previous logs for errors (e.g., MCP server connection, API keys).")
@@ -182,6 +277,13 @@ async def async_main():
 
     agent_name = root_agent.name # Get the agent's name for identifying its responses
 
+    # The answer cache checks the P2P index (the one agent.py reads) for new logs of referenced contracts
+    p2p_index_path = os.getenv("P2P_INDEX_DB", DEFAULT_DB_PATH)
+    p2p_store = IndexStore(p2p_index_path) if args.answer_cache and os.path.exists(p2p_index_path) else None
+    # Referenced contracts are looked up on the agent's chain and on every configured network
+    answer_chains = [default_chain_label(blockscout_url)] + [default_chain_label(n.blockscout_api_url) for n in load_networks()]
+    answer_cache = AnswerCache(args.answer_cache, p2p_store, answer_chains) if args.answer_cache else None
+
     runner = Runner(
         app_name='blockscout_agent_app',
         agent=root_agent,
@@ -189,52 +291,82 @@ async def async_main():
     )
 
     logging.info("Blockscout AI Agent is ready for non-interactive test.")
-    print("\nBlockscout AI Agent starting non-interactive test...")
+    print("\nBlockscout AI Agent starting non-interactive test...", file=setup_output)
 
     try:
-        await run_test_queries(runner, session, agent_name)
+        await run_test_queries(
+            runner, session_service, agent_name,
+            queries_file=args.queries_file,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            rate_limit=args.rate_limit,
+            stream=args.stream,
+            answer_cache=answer_cache,
+        )
     except KeyboardInterrupt:
         logging.info("User interrupted the session (Ctrl+C).")
     except Exception as e:
         logging.error(f"An unexpected error occurred in the client: {e}", exc_info=True)
     finally:
+        if compactor:
+            logging.info(f"Session compaction stats: {compactor.stats()}")
+        if answer_cache:
+            logging.info(f"Answer cache stats: {answer_cache.stats()}")
+            answer_cache.close()
+        if p2p_store:
+            p2p_store.close()
         if exit_stack:
             logging.info("Closing MCP server connection and cleaning up resources...")
             await exit_stack.aclose()
             logging.info("Cleanup complete.")
         else:
             logging.info("No active MCP connection to close.")
-        print("\nSession ended.")
+        print("\nSession ended.", file=setup_output)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Blockscout ADK Agent test queries.")
+    parser.add_argument("--queries-file", type=str, help="JSONL file of queries to run; results are streamed to stdout as JSON lines.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum number of queries in flight.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_QUERY_TIMEOUT, help="Per-query timeout in seconds.")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Query starts per second (default: BLOCKSCOUT_RATE_LIMIT or 5).")
+    parser.add_argument("--answer-cache", nargs="?", const=DEFAULT_ANSWER_CACHE_PATH, default=None, help="Reuse answers to repeated questions until new logs are indexed for their contracts (optional SQLite path).")
+    parser.add_argument("--stream", action="store_true", help="Print the model's text as it is generated.")
+    parser.add_argument("--context-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Estimated tokens of conversation contents before old tool outputs are replaced by digests (default: BLOCKSCOUT_CONTEXT_TOKEN_BUDGET or 32000; 0 disables).")
+    parser.add_argument("--trace-jsonl", type=str, help="Write query, model turn, tool call and HTTP spans to this JSONL file (summary: python tracing.py summary FILE).")
+    parser.add_argument("--trace-otlp", type=str, help="Also write the spans as OTLP/JSON to this file (OpenTelemetry Collector otlpjsonfile format).")
+    cli_args = parser.parse_args()
+
+    # Like async_main, keep stdout for the JSON result lines in --queries-file mode
+    notice_output = sys.stderr if cli_args.queries_file else sys.stdout
+
     # Ensure the .env file is in the same directory as this client.py for execution.
     # If you run this from the root of the workspace, adjust path or ensure .env is also in root.
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Dotenv path being loaded: {dotenv_path}")
-    print("Starting Blockscout AI Agent client...")
+    print(f"Current working directory: {os.getcwd()}", file=notice_output)
+    print(f"Dotenv path being loaded: {dotenv_path}", file=notice_output)
+    print("Starting Blockscout AI Agent client...", file=notice_output)
     
     # Check for GOOGLE_API_KEY before even starting asyncio loop, as agent.py will also check
     # This provides an earlier, more user-friendly exit if keys are missing.
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key or api_key == "YOUR_KEY_HERE":
-        print("CRITICAL: GOOGLE_API_KEY environment variable not set or is a placeholder.")
-        print(f"Please create/update '{dotenv_path}' with your actual Google API Key.")
-        print("You can obtain a Google API Key from Google AI Studio: https://aistudio.google.com/app/apikey")
-        print("\nIMPORTANT: Remember to also update placeholder contract addresses at the top of this script with your deployed P2P contract addresses.")
+        print("CRITICAL: GOOGLE_API_KEY environment variable not set or is a placeholder.", file=notice_output)
+        print(f"Please create/update '{dotenv_path}' with your actual Google API Key.", file=notice_output)
+        print("You can obtain a Google API Key from Google AI Studio: https://aistudio.google.com/app/apikey", file=notice_output)
+        print("\nIMPORTANT: Remember to also update placeholder contract addresses at the top of this script with your deployed P2P contract addresses.", file=notice_output)
     else:
         # Also check BLOCKSCOUT_API_URL before running
         blockscout_api = os.getenv("BLOCKSCOUT_API_URL")
         if not blockscout_api:
-            print("CRITICAL: BLOCKSCOUT_API_URL environment variable not set.")
-            print(f"Please create/update '{dotenv_path}' with a valid Blockscout API URL (e.g., https://eth.blockscout.com/api).")
+            print("CRITICAL: BLOCKSCOUT_API_URL environment variable not set.", file=notice_output)
+            print(f"Please create/update '{dotenv_path}' with a valid Blockscout API URL (e.g., https://eth.blockscout.com/api).", file=notice_output)
         else:
-            print("\nIMPORTANT: Remember to update placeholder contract addresses at the top of this script (client.py) with your deployed P2P contract addresses.")
-            print(f"IMPORTANT: BLOCKSCOUT_API_URL in .env is set to: {blockscout_api}")
-            print(f"IMPORTANT: Contract addresses in client.py are now set for WorldChain Sepolia testnet.")
-            print(f"  UserRegistry: {USER_REGISTRY_CONTRACT}")
-            print(f"  Reputation: {REPUTATION_CONTRACT}")
-            print(f"  P2PLending: {P2P_LENDING_CONTRACT}")
-            print(f"  Test User A (Deployer/Voucher): {USER_A}")
-            print(f"  Test User B (Borrower): {USER_B}")
-            print("Ensure these test users have test ETH on WorldChain Sepolia if they need to interact with contracts for your queries to yield results (e.g., creating offers, loans).")
-            asyncio.run(async_main()) 
\ No newline at end of file
+            print("\nIMPORTANT: Remember to update placeholder contract addresses at the top of this script (client.py) with your deployed P2P contract addresses.", file=notice_output)
+            print(f"IMPORTANT: BLOCKSCOUT_API_URL in .env is set to: {blockscout_api}", file=notice_output)
+            print(f"IMPORTANT: Contract addresses in client.py are now set for WorldChain Sepolia testnet.", file=notice_output)
+            print(f"  UserRegistry: {USER_REGISTRY_CONTRACT}", file=notice_output)
+            print(f"  Reputation: {REPUTATION_CONTRACT}", file=notice_output)
+            print(f"  P2PLending: {P2P_LENDING_CONTRACT}", file=notice_output)
+            print(f"  Test User A (Deployer/Voucher): {USER_A}", file=notice_output)
+            print(f"  Test User B (Borrower): {USER_B}", file=notice_output)
+            print("Ensure these test users have test ETH on WorldChain Sepolia if they need to interact with contracts for your queries to yield results (e.g., creating offers, loans).", file=notice_output)
+            asyncio.run(async_main(cli_args)) 
\ No newline at end of file
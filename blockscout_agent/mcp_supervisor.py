@@ -0,0 +1,408 @@
+"""
+Keeps one warm `blockscout-mcp` server process per BLOCKSCOUT_API_URL and lets any number of
+agent sessions share it over a local Unix socket.
+
+    python mcp_supervisor.py serve --api-url https://evm-testnet.flowscan.io/api
+    python mcp_supervisor.py connect --api-url https://evm-testnet.flowscan.io/api   # stdio <-> socket bridge
+
+Agents keep using a stdio MCP transport, but the command they spawn is the lightweight
+`connect` bridge instead of `npx -y blockscout-mcp` (see `stdio_server_command`), so npm
+resolution and Node startup are paid once per supervisor instead of once per script run.
+The bridge starts the supervisor in the background if none is listening yet.
+"""
+import argparse
+import asyncio
+import fcntl
+import hashlib
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_COMMAND = ["npx", "-y", "blockscout-mcp"]
+MCP_PROTOCOL_VERSION = "2024-11-05"
+# Tool results can be several MB of JSON on a single line.
+STREAM_LIMIT = 64 * 1024 * 1024
+SUPERVISOR_ENV_FLAG = "BLOCKSCOUT_MCP_SUPERVISOR"
+# Longest wait between health checks while restarts keep failing (the interval doubles per failure).
+MAX_RESTART_BACKOFF = 300.0
+
+
+def socket_path_for(api_url: str) -> str:
+    digest = hashlib.sha1(api_url.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"blockscout-mcp-{digest}.sock")
+
+
+def stdio_server_command(api_url: str) -> tuple[str, list[str]]:
+    """
+    Returns the (command, args) a stdio MCP client should spawn for `api_url`.
+    With BLOCKSCOUT_MCP_SUPERVISOR=1 this is the bridge to the shared warm server,
+    otherwise the usual `npx -y blockscout-mcp`.
+    """
+    if os.getenv(SUPERVISOR_ENV_FLAG, "").lower() in ("1", "true", "yes"):
+        return sys.executable, [os.path.abspath(__file__), "connect", "--api-url", api_url]
+    return DEFAULT_SERVER_COMMAND[0], DEFAULT_SERVER_COMMAND[1:]
+
+
+class MCPSupervisor:
+    """
+    Owns a single MCP server child process and multiplexes JSON-RPC traffic from many
+    socket clients onto it. The child is initialized once; client `initialize` requests are
+    answered from the cached result and request ids are rewritten so responses can be
+    routed back to the right client. A periodic `ping` restarts the child when it hangs or dies.
+    """
+
+    def __init__(self, api_url: str, socket_path: str | None = None,
+                 server_command: list[str] | None = None,
+                 health_interval: float = 30.0, health_timeout: float = 10.0):
+        self.api_url = api_url
+        self.socket_path = socket_path or socket_path_for(api_url)
+        self.server_command = server_command or DEFAULT_SERVER_COMMAND
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+
+        self._ids = itertools.count(1)
+        self._process: asyncio.subprocess.Process | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._pending: dict[int, tuple[asyncio.StreamWriter | None, object]] = {}
+        self._internal: dict[int, asyncio.Future] = {}
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._init_result: dict | None = None
+        self._restart_lock = asyncio.Lock()
+        self._restart_task: asyncio.Task | None = None
+        self.restarts = 0
+
+    # --- Child process management ---
+
+    async def _start_child(self) -> None:
+        env = os.environ.copy()
+        env["BLOCKSCOUT_API_URL"] = self.api_url
+        logger.info(f"Starting MCP server: {' '.join(self.server_command)} (BLOCKSCOUT_API_URL={self.api_url})")
+        self._process = await asyncio.create_subprocess_exec(
+            *self.server_command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+            limit=STREAM_LIMIT,
+        )
+        self._reader_task = asyncio.create_task(self._read_child(self._process))
+        self._init_result = await self._request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "blockscout-mcp-supervisor", "version": "1.0.0"},
+        }, timeout=120.0)  # first `npx -y` run may need to download the package
+        await self._send_child({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        logger.info(f"MCP server ready (pid {self._process.pid})")
+
+    async def _stop_child(self) -> None:
+        process, self._process = self._process, None
+        if process and process.returncode is None:
+            process.kill()
+            await process.wait()
+        if self._reader_task:
+            self._reader_task.cancel()
+        # Nothing in flight can be answered by the old process any more.
+        for message_id, (writer, original_id) in list(self._pending.items()):
+            if writer is not None:
+                await self._send_client(writer, {
+                    "jsonrpc": "2.0", "id": original_id,
+                    "error": {"code": -32000, "message": "MCP server restarted, please retry"},
+                })
+        self._pending.clear()
+        for future in self._internal.values():
+            if not future.done():
+                future.set_exception(ConnectionError("MCP server stopped"))
+        self._internal.clear()
+
+    async def restart(self, reason: str) -> None:
+        async with self._restart_lock:
+            logger.warning(f"Restarting MCP server: {reason}")
+            self.restarts += 1
+            await self._stop_child()
+            await self._start_child()
+
+    async def _try_restart(self, reason: str) -> bool:
+        """Restarts the child, logging instead of raising when it fails to come up. Returns whether it did."""
+        try:
+            await self.restart(reason)
+            return True
+        except Exception as e:
+            logger.error(f"MCP server restart failed: {e!r}")
+            return False
+
+    @staticmethod
+    def _log_task_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Supervisor task {task.get_name()} failed: {task.exception()!r}")
+
+    async def _send_child(self, message: dict) -> None:
+        if self._process is None or self._process.stdin is None:
+            raise ConnectionError("MCP server is not running")
+        self._process.stdin.write(json.dumps(message).encode() + b"\n")
+        await self._process.stdin.drain()
+
+    async def _request(self, method: str, params: dict | None = None, timeout: float | None = None) -> dict:
+        """Sends a request on the supervisor's own behalf (initialize, health pings)."""
+        message_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._internal[message_id] = future
+        message = {"jsonrpc": "2.0", "id": message_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send_child(message)
+        try:
+            response = await asyncio.wait_for(future, timeout or self.health_timeout)
+        finally:
+            self._internal.pop(message_id, None)
+        if "error" in response:
+            raise RuntimeError(f"MCP {method} failed: {response['error']}")
+        return response.get("result", {})
+
+    async def _read_child(self, process: asyncio.subprocess.Process) -> None:
+        assert process.stdout is not None
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring non JSON-RPC output from MCP server: {line[:200]!r}")
+                continue
+            message_id = message.get("id")
+            if message_id in self._internal:
+                self._internal[message_id].set_result(message)
+            elif message_id in self._pending:
+                writer, original_id = self._pending.pop(message_id)
+                if writer is not None:
+                    await self._send_client(writer, {**message, "id": original_id})
+            elif "method" in message and message_id is None:
+                for writer in list(self._clients):  # server notifications go to every session
+                    await self._send_client(writer, message)
+        logger.warning(f"MCP server (pid {process.pid}) closed its stdout")
+        if process is self._process:
+            # Fail our own requests now (e.g. an initialize during a restart) instead of at their timeout.
+            for future in self._internal.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("MCP server exited"))
+        if process is self._process and not self._restart_lock.locked():
+            # Kept on self: the event loop only holds a weak reference to running tasks.
+            self._restart_task = asyncio.create_task(self.restart("process exited"), name="mcp-restart")
+            # A failed restart is retried by the health loop; just make sure it gets logged.
+            self._restart_task.add_done_callback(self._log_task_failure)
+
+    async def _health_loop(self) -> None:
+        delay = self.health_interval
+        while True:
+            await asyncio.sleep(delay)
+            if self._restart_lock.locked():
+                continue
+            if self._process is None or self._process.returncode is not None:
+                healthy = await self._try_restart("process exited")
+            else:
+                try:
+                    await self._request("ping")
+                    healthy = True
+                except Exception as e:
+                    healthy = await self._try_restart(f"health check failed: {e!r}")
+            # Back off while the server keeps failing to start, e.g. during an npm outage.
+            delay = self.health_interval if healthy else min(delay * 2, max(MAX_RESTART_BACKOFF, self.health_interval))
+
+    # --- Socket clients ---
+
+    @staticmethod
+    async def _send_client(writer: asyncio.StreamWriter, message: dict) -> None:
+        try:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+        except (ConnectionError, RuntimeError):
+            pass  # the session went away; its pending responses are simply dropped
+
+    def _has_pending(self, writer: asyncio.StreamWriter) -> bool:
+        return any(pending_writer is writer for pending_writer, _ in self._pending.values())
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        client_ids: dict[object, int] = {}
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                await self._route_client_message(writer, client_ids, message)
+            # Half-closed by the client: let in-flight responses reach it before hanging up.
+            for _ in range(600):
+                if not self._has_pending(writer):
+                    break
+                await asyncio.sleep(0.05)
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            for message_id, (pending_writer, original_id) in list(self._pending.items()):
+                if pending_writer is writer:
+                    self._pending[message_id] = (None, original_id)
+            writer.close()
+
+    async def _route_client_message(self, writer: asyncio.StreamWriter, client_ids: dict[object, int],
+                                    message: dict) -> None:
+        method = message.get("method")
+        if method == "initialize" and "id" in message:
+            # The shared server is already initialized; replay its handshake result.
+            await self._send_client(writer, {"jsonrpc": "2.0", "id": message["id"], "result": self._init_result})
+        elif method == "notifications/initialized":
+            return
+        elif method == "notifications/cancelled":
+            request_id = client_ids.get((message.get("params") or {}).get("requestId"))
+            if request_id is not None:
+                await self._send_child({**message, "params": {**message["params"], "requestId": request_id}})
+        elif "id" in message and method is not None:
+            message_id = next(self._ids)
+            client_ids[message["id"]] = message_id
+            self._pending[message_id] = (writer, message["id"])
+            try:
+                await self._send_child({**message, "id": message_id})
+            except ConnectionError:
+                self._pending.pop(message_id, None)
+                await self._send_client(writer, {
+                    "jsonrpc": "2.0", "id": message["id"],
+                    "error": {"code": -32000, "message": "MCP server unavailable, please retry"},
+                })
+        elif method is not None:
+            await self._send_child(message)
+
+    def _acquire_socket_lock(self):
+        """
+        Locks `<socket>.lock` for the lifetime of this process, or returns None if another
+        supervisor holds it. Bridges starting at the same time may each spawn a supervisor;
+        only the first one gets the lock, so a live socket is never unlinked by a second one.
+        """
+        lock_file = open(self.socket_path + ".lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    async def serve_forever(self) -> None:
+        lock_file = self._acquire_socket_lock()
+        if lock_file is None:
+            logger.info(f"Another supervisor already serves {self.socket_path}, exiting")
+            return
+        try:
+            await self._serve()
+        finally:
+            lock_file.close()
+
+    async def _serve(self) -> None:
+        await self._start_child()
+        # Only a crashed supervisor leaves a socket behind: we hold the lock.
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path, limit=STREAM_LIMIT)
+        health_task = asyncio.create_task(self._health_loop(), name="mcp-health")
+        health_task.add_done_callback(self._log_task_failure)
+        logger.info(f"Supervisor listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            health_task.cancel()
+            await self._stop_child()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+# --- stdio bridge used as the MCP "server command" by the agents ---
+
+async def _wait_for_socket(socket_path: str, timeout: float) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if os.path.exists(socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(socket_path)
+                writer.close()
+                return True
+            except OSError:
+                pass
+        await asyncio.sleep(0.2)
+    return False
+
+
+def _spawn_supervisor(api_url: str, socket_path: str) -> None:
+    log_path = socket_path.replace(".sock", ".log")
+    with open(log_path, "ab") as log_file:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--api-url", api_url, "--socket", socket_path],
+            stdin=subprocess.DEVNULL, stdout=log_file, stderr=log_file,
+            start_new_session=True,  # outlives the agent process that started it
+        )
+    print(f"Started MCP supervisor for {api_url} (log: {log_path})", file=sys.stderr)
+
+
+async def bridge(api_url: str, socket_path: str | None = None, start_timeout: float = 180.0) -> None:
+    """Pipes this process' stdin/stdout to the supervisor socket, starting the supervisor if needed."""
+    socket_path = socket_path or socket_path_for(api_url)
+    if not await _wait_for_socket(socket_path, timeout=0.5):
+        _spawn_supervisor(api_url, socket_path)
+        if not await _wait_for_socket(socket_path, timeout=start_timeout):
+            print(f"MCP supervisor did not come up on {socket_path}", file=sys.stderr)
+            sys.exit(1)
+
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=STREAM_LIMIT)
+    loop = asyncio.get_running_loop()
+    stdin = asyncio.StreamReader(limit=STREAM_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stdin), sys.stdin)
+
+    async def stdin_to_socket():
+        while line := await stdin.readline():
+            writer.write(line)
+            await writer.drain()
+        writer.write_eof()  # the supervisor answers what is in flight, then hangs up
+
+    async def socket_to_stdout():
+        while line := await reader.readline():
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+
+    stdin_task = asyncio.create_task(stdin_to_socket())
+    await socket_to_stdout()
+    stdin_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared warm Blockscout MCP server supervisor.")
+    parser.add_argument("command", choices=["serve", "connect"])
+    parser.add_argument("--api-url", default=os.getenv("BLOCKSCOUT_API_URL"), help="Blockscout API URL served by this supervisor.")
+    parser.add_argument("--socket", help="Unix socket path (defaults to one derived from the API URL).")
+    parser.add_argument("--server-command", default=os.getenv("BLOCKSCOUT_MCP_COMMAND"),
+                        help="MCP server command to supervise (default: npx -y blockscout-mcp).")
+    parser.add_argument("--health-interval", type=float, default=30.0, help="Seconds between health pings.")
+    args = parser.parse_args()
+
+    if not args.api_url:
+        print("Error: --api-url or BLOCKSCOUT_API_URL is required.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "serve":
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        supervisor = MCPSupervisor(
+            args.api_url,
+            socket_path=args.socket,
+            server_command=args.server_command.split() if args.server_command else None,
+            health_interval=args.health_interval,
+        )
+        asyncio.run(supervisor.serve_forever())
+    else:
+        asyncio.run(bridge(args.api_url, args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from agents.mcp import MCPServer
+from mcp.types import CallToolResult, Tool
+
+from batch_runner import TokenBucket
+from p2p_events import EventDecoder
+from projection import DEFAULT_MAX_BYTES, slim_tool_output
+from tool_cache import TRANSACTION_TOOLS, ToolResultCache, canonical_key, ttl_for
+from tool_schemas import SERVER_NAME, ToolSchemaCache, expected_server_version, select_tools, subset_tool_names
+from tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+
+class WrappedMCPServer(MCPServer):
+    """
+    Delegates everything to an inner openai-agents MCPServer. Subclasses override
+    `call_tool` / `list_tools` to add behaviour around the Blockscout tool calls while
+    the agent keeps seeing a regular MCP server. Wrappers can be nested.
+    """
+
+    def __init__(self, inner: MCPServer):
+        # MCPServer.__init__ is intentionally not called: its settings
+        # (structured content, approvals, ...) are read from the inner server.
+        self.inner = inner
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute == "inner":  # not set yet (e.g. during unpickling)
+            raise AttributeError(attribute)
+        return getattr(self.inner, attribute)
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    async def connect(self):
+        return await self.inner.connect()
+
+    async def cleanup(self):
+        return await self.inner.cleanup()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.cleanup()
+
+    async def list_tools(self, *args, **kwargs):
+        return await self.inner.list_tools(*args, **kwargs)
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        return await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+
+    async def list_prompts(self, *args, **kwargs):
+        return await self.inner.list_prompts(*args, **kwargs)
+
+    async def get_prompt(self, *args, **kwargs):
+        return await self.inner.get_prompt(*args, **kwargs)
+
+
+def blockscout_request_count(tool_name: str, arguments: dict[str, Any] | None) -> int:
+    """Blockscout requests a tool call can make: one per page (max_pages), summed over a batch_call's calls."""
+    arguments = arguments or {}
+    if tool_name == "batch_call":
+        calls = arguments.get("calls") or []
+        return max(1, sum(blockscout_request_count(call.get("tool", ""), call.get("args")) for call in calls))
+    return max(1, int(arguments.get("max_pages") or 1))
+
+
+class RateLimitedMCPServer(WrappedMCPServer):
+    """
+    Gates every tool call through a shared token bucket, charged one token per Blockscout request
+    it can make (see blockscout_request_count), so batch_call and multi-page calls can't bypass it.
+    """
+
+    def __init__(self, inner: MCPServer, rate_limiter: TokenBucket):
+        super().__init__(inner)
+        self.rate_limiter = rate_limiter
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        await self.rate_limiter.acquire(blockscout_request_count(tool_name, arguments))
+        return await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+
+
+class DecodingMCPServer(WrappedMCPServer):
+    """
+    Fills in `decoded` for log items Blockscout returned undecoded (unverified contract or a
+    decoding failure) using local ABIs (see p2p_events.EventDecoder.from_artifacts), so the
+    model never has to interpret raw topics and data. Also applies to logs inside batch_call results.
+    """
+
+    LOG_TOOLS = {"get_address_logs", "get_transaction_logs"}
+
+    def __init__(self, inner: MCPServer, decoder: EventDecoder | None = None):
+        super().__init__(inner)
+        self.decoder = decoder or EventDecoder.from_artifacts()
+
+    def _decode_page(self, tool_name: str, data: Any) -> Any:
+        if tool_name in self.LOG_TOOLS and isinstance(data, dict) and isinstance(data.get("items"), list):
+            return {**data, "items": self.decoder.annotate_logs(data["items"])}
+        if tool_name == "batch_call" and isinstance(data, dict) and isinstance(data.get("results"), list):
+            return {**data, "results": [
+                {**r, "result": self._decode_page(r.get("tool"), r.get("result"))} if r.get("ok") else r
+                for r in data["results"]
+            ]}
+        return data
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        result = await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+        if tool_name not in self.LOG_TOOLS and tool_name != "batch_call":
+            return result
+        content = []
+        for part in result.content:
+            if getattr(part, "type", None) == "text":
+                try:
+                    data = json.loads(part.text)
+                except ValueError:
+                    data = None
+                if data is not None:
+                    decoded = self._decode_page(tool_name, data)
+                    if decoded is not data:
+                        part = part.model_copy(update={"text": json.dumps(decoded)})
+            content.append(part)
+        return result.model_copy(update={"content": content})
+
+
+class ProjectingMCPServer(WrappedMCPServer):
+    """Slims text results and enforces a byte budget before they are handed to the model."""
+
+    def __init__(self, inner: MCPServer, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(inner)
+        self.max_bytes = max_bytes
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        result = await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+        content = []
+        for part in result.content:
+            if getattr(part, "type", None) == "text":
+                slim_text = slim_tool_output(part.text, self.max_bytes)
+                if len(slim_text) < len(part.text):
+                    logger.debug(f"Projected {tool_name} output from {len(part.text)} to {len(slim_text)} bytes")
+                part = part.model_copy(update={"text": slim_text})
+            content.append(part)
+        return result.model_copy(update={"content": content})
+
+
+class CachingMCPServer(WrappedMCPServer):
+    """
+    Serves repeated Blockscout tool calls from a ToolResultCache (see tool_cache.py).
+    `namespace` separates chains, normally the Blockscout API URL. When the cached results are
+    projected ones, `max_bytes` (the projection budget) is part of the key too, so runs with
+    another budget don't get results slimmed for this one. Identical calls that are already in
+    flight share one request. Error results are never cached.
+    """
+
+    def __init__(self, inner: MCPServer, cache: ToolResultCache, namespace: str, max_bytes: int | None = None):
+        super().__init__(inner)
+        self.cache = cache
+        self.namespace = namespace if max_bytes is None else f"{namespace}#max_bytes={max_bytes}"
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def _transaction_final(self, tool_name: str, arguments: dict[str, Any] | None) -> bool:
+        """Whether the transaction of a per-transaction call has a permanent (final) get_transaction_info result."""
+        transaction_hash = (arguments or {}).get("transaction_hash")
+        if tool_name not in TRANSACTION_TOOLS or tool_name == "get_transaction_info" or not transaction_hash:
+            return False
+        info_key = canonical_key(self.namespace, "get_transaction_info", {"transaction_hash": transaction_hash})
+        return self.cache.is_permanent(info_key)
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        key = canonical_key(self.namespace, tool_name, arguments)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"Tool cache hit: {tool_name} {arguments}")
+            return CallToolResult.model_validate_json(cached)
+
+        if key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+
+        if not (getattr(result, "isError", None) or getattr(result, "is_error", None)):
+            text = "".join(getattr(part, "text", "") for part in result.content)
+            ttl = ttl_for(tool_name, text, self._transaction_final(tool_name, arguments))
+            self.cache.put(key, tool_name, result.model_dump_json(), ttl)
+        return result
+
+
+class SchemaCachingMCPServer(WrappedMCPServer):
+    """
+    Answers `list_tools` from the versioned schema cache (see tool_schemas.py) instead of asking the
+    server on every agent turn, and restricts the list to a tool subset. The cache entry is chosen
+    by the version the server reported when it connected (or the expected version before that);
+    a version without an entry is listed from the server once and saved.
+    """
+
+    def __init__(self, inner: MCPServer, cache: ToolSchemaCache, subset: str | None = None):
+        super().__init__(inner)
+        self.cache = cache
+        self.subset = subset
+        select_tools([], subset)  # unknown subsets fail at startup, not on the first turn
+        self._tools: tuple[str | None, list[Tool]] | None = None
+        self._lock = asyncio.Lock()
+
+    def server_version(self) -> str | None:
+        initialize_result = getattr(self.inner, "server_initialize_result", None)
+        server_info = getattr(initialize_result, "serverInfo", None) or getattr(initialize_result, "server_info", None)
+        return getattr(server_info, "version", None) or expected_server_version()
+
+    async def list_tools(self, *args, **kwargs):
+        version = self.server_version()
+        async with self._lock:
+            if self._tools is None or self._tools[0] != version:
+                tools = self.cache.get(SERVER_NAME, version)
+                if tools is None:
+                    logger.info(f"No cached tool schemas for {SERVER_NAME}@{version}, listing them from the server")
+                    tools = await self.inner.list_tools(*args, **kwargs)
+                    self.cache.put(SERVER_NAME, version, tools)
+                selected = select_tools(tools, self.subset)
+                missing = set(subset_tool_names(self.subset) or ()) - {tool.name for tool in selected}
+                if missing:
+                    logger.warning(f"{SERVER_NAME}@{version} has no {', '.join(sorted(missing))} tool(s) of subset {self.subset}")
+                self._tools = (version, selected)
+        return list(self._tools[1])
+
+
+class MeteredMCPServer(WrappedMCPServer):
+    """Counts the tool calls the agent makes, their errors, result bytes and time (see benchmark.py)."""
+
+    def __init__(self, inner: MCPServer):
+        super().__init__(inner)
+        self.reset()
+
+    def reset(self) -> dict:
+        stats = getattr(self, "stats", None)
+        self.stats = {"tool_calls": 0, "tool_errors": 0, "tool_result_bytes": 0, "tool_seconds": 0.0, "by_tool": {}}
+        return stats
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        started = time.monotonic()
+        self.stats["tool_calls"] += 1
+        self.stats["by_tool"][tool_name] = self.stats["by_tool"].get(tool_name, 0) + 1
+        try:
+            result = await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+        except Exception:
+            self.stats["tool_errors"] += 1
+            raise
+        finally:
+            self.stats["tool_seconds"] += time.monotonic() - started
+        if getattr(result, "isError", None) or getattr(result, "is_error", None):
+            self.stats["tool_errors"] += 1
+        self.stats["tool_result_bytes"] += sum(len(getattr(part, "text", "") or "") for part in result.content)
+        return result
+
+
+class TracingMCPServer(WrappedMCPServer):
+    """
+    Records an `mcp_call` span per tool call (see tracing.py). Wraps the raw server, so the span is
+    the round-trip to the MCP server process: its Blockscout HTTP requests, without the local wrappers.
+    """
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        with trace_span(tool_name, "mcp_call", tool=tool_name, server=self.name,
+                        input_bytes=len(json.dumps(arguments or {}))) as span:
+            result = await self.inner.call_tool(tool_name, arguments, *args, **kwargs)
+            span.attributes["output_bytes"] = sum(len(getattr(part, "text", "") or "") for part in result.content)
+            if getattr(result, "isError", None) or getattr(result, "is_error", None):
+                span.error = "".join(getattr(part, "text", "") for part in result.content)[:500] or "tool error"
+        return result
+
+
+class MultiChainMCPServer(WrappedMCPServer):
+    """
+    Serves the Blockscout tools of several networks (see networks.py) as one MCP server. Every
+    tool gets an optional `chain` argument naming a configured network (the default network when
+    omitted) and the call is routed to that network's own server, so calls for different chains
+    run in parallel on separate warm connections. The per-network servers are connected by the caller.
+    """
+
+    def __init__(self, servers: dict[str, MCPServer], default: str):
+        super().__init__(servers[default])
+        self.servers = servers
+        self.default = default
+
+    @property
+    def name(self) -> str:
+        return "BlockscoutMultiChain"
+
+    def _with_chain_argument(self, tool: Tool) -> Tool:
+        data = tool.model_dump(by_alias=True)
+        schema = dict(data.get("inputSchema") or {"type": "object"})
+        schema["properties"] = {
+            **(schema.get("properties") or {}),
+            "chain": {
+                "type": "string",
+                "enum": list(self.servers),
+                "description": f"Network to query (default: {self.default})",
+            },
+        }
+        data["inputSchema"] = schema
+        return Tool.model_validate(data)
+
+    async def list_tools(self, *args, **kwargs):
+        # Every network runs the same server, so the default network's tool list stands for all of them
+        tools = await self.inner.list_tools(*args, **kwargs)
+        return [self._with_chain_argument(tool) for tool in tools]
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None, *args, **kwargs):
+        arguments = dict(arguments or {})
+        chain = arguments.pop("chain", None) or self.default
+        server = self.servers.get(chain)
+        if server is None:
+            return CallToolResult.model_validate({
+                "content": [{"type": "text", "text": f"Unknown chain {chain!r}; configured: {', '.join(self.servers)}"}],
+                "isError": True,
+            })
+        return await server.call_tool(tool_name, arguments, *args, **kwargs)
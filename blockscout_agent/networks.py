@@ -0,0 +1,168 @@
+"""
+Registry of the networks the agents can query: for each chain its Blockscout API URL, JSON-RPC
+URL (plus an optional WebSocket `ws_url`) and the deployed P2P contract addresses, read from
+networks.json (or BLOCKSCOUT_NETWORKS_FILE).
+
+    registry = load_networks()
+    flow = registry.get("flow-evm-testnet")          # or by chain id: registry.get(545)
+    flow.contract("P2PLending")
+
+Without a networks file, the registry holds a single "default" network built from
+BLOCKSCOUT_API_URL, so single-chain setups keep working from .env alone. `served_networks`, used
+by the agents, also prefers BLOCKSCOUT_API_URL to the file unless a network is chosen explicitly.
+The file is resolved on each call, so a BLOCKSCOUT_NETWORKS_FILE set in .env applies whenever
+.env is loaded.
+`bundled_contracts` reads the test deployments from the networks.json shipped with the agents.
+`ClientRegistry` keeps one warm BlockscoutClient per network for the Python pipelines.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+
+from blockscout_api import BlockscoutClient
+
+BUNDLED_NETWORKS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'networks.json')
+
+
+def networks_path() -> str:
+    """BLOCKSCOUT_NETWORKS_FILE when set (an empty value counts as unset), else the bundled networks.json."""
+    return os.getenv("BLOCKSCOUT_NETWORKS_FILE") or BUNDLED_NETWORKS_PATH
+
+
+@dataclass
+class Network:
+    name: str
+    blockscout_api_url: str
+    chain_id: int | None = None
+    rpc_url: str | None = None
+    ws_url: str | None = None  # WebSocket JSON-RPC, for eth_subscribe
+    contracts: dict[str, str] = field(default_factory=dict)
+
+    def contract(self, name: str) -> str:
+        try:
+            return self.contracts[name]
+        except KeyError:
+            raise KeyError(f"No {name} contract configured for network {self.name}") from None
+
+
+class NetworkRegistry:
+    def __init__(self, networks: list[Network], default: str | None = None):
+        if not networks:
+            raise ValueError("At least one network must be configured")
+        self.networks = {network.name: network for network in networks}
+        self.default_name = default or networks[0].name
+        if self.default_name not in self.networks:
+            raise ValueError(f"Default network {self.default_name!r} is not configured")
+
+    def __iter__(self):
+        return iter(self.networks.values())
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def names(self) -> list[str]:
+        return list(self.networks)
+
+    @property
+    def default(self) -> Network:
+        return self.networks[self.default_name]
+
+    def get(self, key: str | int | None = None) -> Network:
+        """Looks a network up by name or chain id; None returns the default network."""
+        if key is None:
+            return self.default
+        if isinstance(key, str) and key in self.networks:
+            return self.networks[key]
+        for network in self.networks.values():
+            if network.chain_id is not None and str(network.chain_id) == str(key):
+                return network
+        raise KeyError(f"Unknown network {key!r} (configured: {', '.join(self.networks)})")
+
+    def select(self, names: list[str] | None) -> "NetworkRegistry":
+        """A registry restricted to `names` (all networks when empty), keeping the default if selected."""
+        if not names:
+            return self
+        selected = [self.get(name) for name in names]
+        default = self.default_name if self.default_name in {n.name for n in selected} else selected[0].name
+        return NetworkRegistry(selected, default)
+
+
+def load_networks(path: str | None = None) -> NetworkRegistry:
+    """
+    Reads the networks file (`networks_path()` unless given). BLOCKSCOUT_NETWORK overrides the
+    file's default network. Falls back to a single network from BLOCKSCOUT_API_URL when the file
+    does not exist.
+    """
+    path = path or networks_path()
+    if not os.path.exists(path):
+        blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL")
+        if not blockscout_api_url:
+            raise FileNotFoundError(f"No networks file at {path} and BLOCKSCOUT_API_URL is not set")
+        return NetworkRegistry([Network(name="default", blockscout_api_url=blockscout_api_url)])
+
+    with open(path) as f:
+        config = json.load(f)
+    networks = [
+        Network(
+            name=name,
+            blockscout_api_url=entry["blockscout_api_url"],
+            chain_id=entry.get("chain_id"),
+            rpc_url=entry.get("rpc_url"),
+            ws_url=entry.get("ws_url"),
+            contracts=entry.get("contracts", {}),
+        )
+        for name, entry in config["networks"].items()
+    ]
+    return NetworkRegistry(networks, os.getenv("BLOCKSCOUT_NETWORK") or config.get("default"))
+
+
+def served_networks(names: list[str] | None = None) -> NetworkRegistry:
+    """
+    The networks an agent serves. `names` selects networks from the file ("all" for every one).
+    Otherwise, like agent.py, a BLOCKSCOUT_API_URL from .env wins as long as neither
+    BLOCKSCOUT_NETWORK nor BLOCKSCOUT_NETWORKS_FILE is set (the file's entry for that explorer is
+    used when there is one, for its contracts and RPC URL); failing that, the default network.
+    """
+    if names:
+        registry = load_networks()
+        return registry if names == ["all"] else registry.select(names)
+    blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL")
+    if blockscout_api_url and not os.getenv("BLOCKSCOUT_NETWORK") and not os.getenv("BLOCKSCOUT_NETWORKS_FILE"):
+        known = [network for network in load_networks() if network.blockscout_api_url.rstrip("/") == blockscout_api_url.rstrip("/")]
+        return NetworkRegistry(known[:1] or [Network(name="default", blockscout_api_url=blockscout_api_url)])
+    registry = load_networks()
+    return registry.select([registry.default_name])
+
+
+def bundled_contracts(network: str) -> dict[str, str]:
+    """
+    Contract addresses of `network` in the bundled networks.json: the deployments the test queries
+    are written against, whichever networks BLOCKSCOUT_NETWORKS_FILE configures for the runtime.
+    """
+    with open(BUNDLED_NETWORKS_PATH) as f:
+        return json.load(f)["networks"][network]["contracts"]
+
+
+class ClientRegistry:
+    """One pooled BlockscoutClient per network, created on first use and shared by all callers."""
+
+    def __init__(self, networks: NetworkRegistry):
+        self.networks = networks
+        self._clients: dict[str, BlockscoutClient] = {}
+
+    def client(self, network: str | int | None = None) -> BlockscoutClient:
+        name = self.networks.get(network).name
+        if name not in self._clients:
+            self._clients[name] = BlockscoutClient(self.networks.get(name).blockscout_api_url)
+        return self._clients[name]
+
+    async def __aenter__(self) -> "ClientRegistry":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
@@ -1,10 +1,14 @@
 import asyncio
+import json
 import os
 import logging
 import argparse # Added for command-line arguments
+import sys
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
 from dotenv import load_dotenv
 
-from agents import Agent, Runner #, gen_trace_id, trace # Tracing might require more setup
+from agents import Agent, Runner, add_trace_processor
 from agents.mcp import MCPServer, MCPServerStdio
 
 # Load environment variables from .env file
@@ -12,13 +16,31 @@ from agents.mcp import MCPServer, MCPServerStdio
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path=dotenv_path, override=True)
 
+# Local modules read their defaults from the environment at import time
+from answer_cache import DEFAULT_ANSWER_CACHE_PATH, AnswerCache
+from mcp_supervisor import stdio_server_command
+from mcp_wrappers import (CachingMCPServer, DecodingMCPServer, MultiChainMCPServer, ProjectingMCPServer,
+                          RateLimitedMCPServer, SchemaCachingMCPServer, TracingMCPServer)
+from networks import Network, NetworkRegistry, bundled_contracts, served_networks
+from p2p_indexer import DEFAULT_DB_PATH, IndexStore, default_chain_label
+from projection import DEFAULT_MAX_BYTES
+from tool_cache import DEFAULT_CACHE_PATH, ToolResultCache
+from tool_schemas import DEFAULT_SCHEMA_CACHE_PATH, TOOL_SUBSETS, ToolSchemaCache
+from batch_runner import (DEFAULT_CONCURRENCY, DEFAULT_QUERY_TIMEOUT, TokenBucket,
+                          load_queries_file, run_batch)
+from p2p_state_reader import JsonRpcClient, P2PStateReader
+from tools.p2p_contract_state import P2PContractTools
+from tools.p2p_state import P2PStateTools
+from tracing import AgentsTraceBridge, configure_tracing, trace_span
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Deployed contract addresses on Flow EVM Testnet (after --slow deployment 2025-05-31)
-USER_REGISTRY_ADDRESS = "0xa69F055d1A40938CcB4A76fc0b958E8A1cd376f6"
-REPUTATION_ADDRESS = "0xcef24c74B23C6257bf7C72528885100f8946EA80"
-P2P_LENDING_ADDRESS = "0x4c5B41AE6a549DF120DDdAfaC6F227BE23B9885E"
-MDR_TOKEN_ADDRESS = "0xc9F0D37b20Ff5430BC8d5758b93A854Fcf39a4C2" # MockDollar
+# Deployed contract addresses on Flow EVM Testnet (after --slow deployment 2025-05-31), see networks.json
+FLOW_EVM_TESTNET_CONTRACTS = bundled_contracts("flow-evm-testnet")
+USER_REGISTRY_ADDRESS = FLOW_EVM_TESTNET_CONTRACTS["UserRegistry"]
+REPUTATION_ADDRESS = FLOW_EVM_TESTNET_CONTRACTS["Reputation"]
+P2P_LENDING_ADDRESS = FLOW_EVM_TESTNET_CONTRACTS["P2PLending"]
+MDR_TOKEN_ADDRESS = FLOW_EVM_TESTNET_CONTRACTS["MockDollar"]
 
 # Test User Addresses (ensure these are funded with testnet currency and MDR if needed for tests)
 # USER_A_ADDRESS (Deployer) - From contracts/.env DEPLOYER_ADDRESS
@@ -64,86 +86,271 @@ p2p_test_cases = [
     }
 ]
 
-async def run_single_query(agent: Agent, query_text: str, query_name: str = "Single Query"):
+# Characters of each tool result included in streamed tool_result events
+STREAM_PREVIEW_CHARS = 500
+
+async def stream_query(agent: Agent, query_text: str) -> AsyncIterator[dict]:
+    """
+    Runs a query with Runner.run_streamed and yields its progress as JSON-ready dicts, as it happens:
+    {"type": "text_delta", "delta"} for model tokens, {"type": "tool_call", "tool", "call_id", "arguments"},
+    {"type": "tool_result", "tool", "call_id", "output_bytes", "preview"} as soon as each tool returns,
+    and finally {"type": "final_output", "output"}. Usable directly by a web front end (SSE, websockets).
+    """
+    result = Runner.run_streamed(starting_agent=agent, input=query_text)
+    tool_names = {}
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            if getattr(event.data, "type", None) == "response.output_text.delta":
+                yield {"type": "text_delta", "delta": event.data.delta}
+        elif event.type == "run_item_stream_event" and event.item.type == "tool_call_item":
+            raw_item = event.item.raw_item
+            call_id = getattr(raw_item, "call_id", None) or getattr(raw_item, "id", None)
+            tool_names[call_id] = getattr(raw_item, "name", None)
+            yield {"type": "tool_call", "tool": tool_names[call_id], "call_id": call_id,
+                   "arguments": getattr(raw_item, "arguments", None)}
+        elif event.type == "run_item_stream_event" and event.item.type == "tool_call_output_item":
+            raw_item = event.item.raw_item
+            call_id = raw_item.get("call_id") if isinstance(raw_item, dict) else getattr(raw_item, "call_id", None)
+            output = event.item.output if isinstance(event.item.output, str) else json.dumps(event.item.output, default=str)
+            yield {"type": "tool_result", "tool": tool_names.get(call_id), "call_id": call_id,
+                   "output_bytes": len(output), "preview": output[:STREAM_PREVIEW_CHARS]}
+    yield {"type": "final_output", "output": result.final_output}
+
+async def _run_streamed_to_stdout(agent: Agent, query_text: str, query_name: str, json_lines: bool) -> str:
+    final_output = None
+    async for event in stream_query(agent, query_text):
+        if json_lines:
+            print(json.dumps({"name": query_name, **event}, default=str), flush=True)
+        elif event["type"] == "text_delta":
+            print(event["delta"], end="", flush=True)
+        elif event["type"] == "tool_call":
+            print(f"\n[tool call] {event['tool']}({event['arguments']})", flush=True)
+        elif event["type"] == "tool_result":
+            print(f"[tool result] {event['tool']}: {event['output_bytes']} bytes", flush=True)
+        if event["type"] == "final_output":
+            final_output = event["output"]
+    return final_output
+
+async def run_single_query(agent: Agent, query_text: str, query_name: str = "Single Query", verbose: bool = True,
+                           stream: bool = False, answer_cache: AnswerCache | None = None) -> str:
+    """
+    Runs one query and returns the agent's final output. With `stream`, tokens and tool progress are
+    printed as they arrive (as JSON lines when not `verbose`) instead of only the final answer.
+    With an `answer_cache`, a still-valid answer to the same question is returned without running the agent.
+    """
     logging.info(f"\n--- Running OpenAI Single Query: {query_name} ---")
-    print(f"\n--- Running OpenAI Single Query: {query_name} ---")
-    print(f"Query: {query_text}")
+    if verbose:
+        print(f"\n--- Running OpenAI Single Query: {query_name} ---")
+        print(f"Query: {query_text}")
+    cache_namespace = f"{agent.name}:{agent.model}"
     try:
-        result = await Runner.run(starting_agent=agent, input=query_text)
-        logging.info(f"OpenAI Agent final output for query '{query_name}': {result.final_output}")
-        print(f"\nFinal Agent Response to query '{query_name}':\n{result.final_output}")
+        with trace_span(query_name, "query", query=query_text) as span:
+            cached = answer_cache.get(query_text, cache_namespace) if answer_cache else None
+            span.attributes["answer_cache_hit"] = cached is not None
+            if cached is not None:
+                final_output = cached
+                if stream and not verbose:
+                    print(json.dumps({"name": query_name, "type": "final_output", "output": cached, "cached": True}), flush=True)
+            elif stream:
+                final_output = await _run_streamed_to_stdout(agent, query_text, query_name, json_lines=not verbose)
+            else:
+                final_output = (await Runner.run(starting_agent=agent, input=query_text)).final_output
+            span.attributes["output_bytes"] = len(str(final_output))
+        if answer_cache and cached is None and isinstance(final_output, str):
+            answer_cache.put(query_text, final_output, cache_namespace)
+        logging.info(f"OpenAI Agent final output for query '{query_name}'{' (cached)' if cached is not None else ''}: {final_output}")
+        if verbose:
+            if stream and cached is None:
+                print("\n-----------------------------------------------------")
+            else:
+                print(f"\nFinal Agent Response to query '{query_name}':\n{final_output}")
+                print("-----------------------------------------------------")
+        return final_output
     except Exception as e:
         logging.error(f"Error during OpenAI Agent run for query '{query_name}': {e}", exc_info=True)
-        print(f"\nError during OpenAI Agent run for query '{query_name}': {e}")
-    print("-----------------------------------------------------")
+        if verbose:
+            print(f"\nError during OpenAI Agent run for query '{query_name}': {e}")
+            print("-----------------------------------------------------")
+        raise
 
-async def run_openai_agent_tests(blockscout_mcp_server: MCPServer, single_query: str | None = None): # Modified
-    agent = Agent(
+def build_agent(blockscout_mcp_server: MCPServer, p2p_state: P2PStateTools | None = None,
+                networks: NetworkRegistry | None = None, contract_state: P2PContractTools | None = None) -> Agent:
+    instructions = "You are an AI assistant that can query blockchain data using Blockscout. Use the available tools to answer user questions about transactions, addresses, blocks, and tokens. Be precise and refer to the tool outputs. When asked for a specific field from an event log (e.g. offerId), provide only that value if found, otherwise state it's not found. List tools return one page at a time: if the answer may be on later pages, call the tool again with the response's next_page_params (or set max_pages) instead of answering from a partial page. When you need the same kind of data for several items (e.g. get_transaction_logs for a list of transaction hashes), use one batch_call instead of one tool call per item." # Added instruction for specific field
+    if networks and len(networks) > 1:
+        instructions += f" Every Blockscout tool takes a chain argument: one of {', '.join(networks.names())} (default {networks.default_name}). For comparisons across chains, call the tools for each chain in parallel."
+    if p2p_state:
+        instructions += " For the current state of the P2P contracts (reputation scores, loan agreements and their status, vouch stakes, pending payment modifications), prefer the get_reputation_score, get_user_agreements, get_agreement_state, get_vouches and get_pending_modifications tools: they answer from a local index in one call. Fall back to the event logs only for history those tools don't cover."
+    if contract_state:
+        instructions += " For the live on-chain state of a user's loans (agreements as borrower or lender, offers, requests) or of one agreement, use get_onchain_portfolio and get_onchain_agreement: they read the P2PLending contract directly."
+    return Agent(
         name="BlockscoutOpenAIAgent",
-        instructions="You are an AI assistant that can query blockchain data using Blockscout. Use the available tools to answer user questions about transactions, addresses, blocks, and tokens. Be precise and refer to the tool outputs. When asked for a specific field from an event log (e.g. offerId), provide only that value if found, otherwise state it's not found.", # Added instruction for specific field
+        instructions=instructions,
         mcp_servers=[blockscout_mcp_server],
+        tools=(p2p_state.openai_tools() if p2p_state else []) + (contract_state.openai_tools() if contract_state else []),
         model="gpt-4-turbo"
     )
 
+async def run_openai_agent_tests(blockscout_mcp_server: MCPServer, single_query: str | None = None,
+                                 queries_file: str | None = None, concurrency: int = DEFAULT_CONCURRENCY,
+                                 timeout: float = DEFAULT_QUERY_TIMEOUT,
+                                 p2p_state: P2PStateTools | None = None,
+                                 networks: NetworkRegistry | None = None, stream: bool = False,
+                                 answer_cache: AnswerCache | None = None,
+                                 contract_state: P2PContractTools | None = None): # Modified
+    agent = build_agent(blockscout_mcp_server, p2p_state, networks, contract_state)
+
     if single_query: # Added condition
-        await run_single_query(agent, single_query, "CLI Specified Query")
+        queries = [{"name": "CLI Specified Query", "query_text": single_query}]
+    elif queries_file:
+        queries = load_queries_file(queries_file)
     else:
-        for i, test_case in enumerate(p2p_test_cases):
-            await run_single_query(agent, test_case['query_text'], test_case['name'])
-            if i < len(p2p_test_cases) - 1:
-                logging.info("Pausing for 5 seconds before next query...")
-                print("Pausing for 5 seconds before next query...")
-                await asyncio.sleep(5)
+        queries = p2p_test_cases
+
+    # --queries-file streams one JSON result per line as queries finish; otherwise keep the readable output
+    verbose = not queries_file
+    if stream and verbose:
+        concurrency = 1  # streamed answers printed as text would interleave
+    async def run_test_case(test_case: dict) -> str:
+        return await run_single_query(agent, test_case['query_text'], test_case['name'], verbose=verbose, stream=stream,
+                                      answer_cache=answer_cache)
+
+    # Queries run concurrently; Blockscout rate limits are enforced per tool call by the MCP server wrapper
+    async for result in run_batch(queries, run_test_case, concurrency=concurrency, timeout=timeout):
+        if queries_file:
+            print(result.to_json(), flush=True)
+        elif not result.ok:
+            print(f"\nQuery '{result.name}' failed after {result.elapsed:.1f}s: {result.error}")
+
+def blockscout_mcp_server(network: Network) -> MCPServerStdio:
+    # Ensure the network's blockscout_api_url is passed to the subprocess env
+    mcp_env = os.environ.copy() # Start with current environment that includes .env variables
+    mcp_env["BLOCKSCOUT_API_URL"] = network.blockscout_api_url # Explicitly set/override for clarity and safety
+    # npx -y blockscout-mcp, or with BLOCKSCOUT_MCP_SUPERVISOR=1 a bridge to the shared warm server
+    mcp_command, mcp_args = stdio_server_command(network.blockscout_api_url)
+    return MCPServerStdio(
+        name=f"BlockscoutMCPviaNPX-{network.name}",
+        params={
+            "command": mcp_command,
+            "args": mcp_args,
+            "cwd": os.path.dirname(os.path.abspath(__file__)), # Run npx from blockscout_agent dir
+            "env": mcp_env # Pass the modified environment
+        },
+    )
+
+def wrap_blockscout_server(bs_server: MCPServer, network: Network, args, tool_cache: ToolResultCache | None,
+                           schema_cache: ToolSchemaCache | None = None) -> MCPServer:
+    # Each explorer enforces its own rate limit, so every network gets its own token bucket
+    rate_limiter = TokenBucket(args.rate_limit) if args.rate_limit else TokenBucket()
+    agent_server = TracingMCPServer(bs_server)
+    # Tool schemas come from the versioned cache, restricted to the selected subset
+    if schema_cache:
+        agent_server = SchemaCachingMCPServer(agent_server, schema_cache, getattr(args, "tool_subset", None))
+    # Undecoded P2P logs are decoded from the local ABIs before projection trims them for the model
+    agent_server = RateLimitedMCPServer(agent_server, rate_limiter)
+    agent_server = ProjectingMCPServer(DecodingMCPServer(agent_server), args.max_tool_bytes)
+    # Cache outside the rate limiter so cache hits don't consume Blockscout request tokens (and store slimmed results)
+    if tool_cache:
+        agent_server = CachingMCPServer(agent_server, tool_cache, namespace=network.blockscout_api_url,
+                                        max_bytes=args.max_tool_bytes)
+    return agent_server
 
 async def main():
     parser = argparse.ArgumentParser(description="Run Blockscout OpenAI Agent tests.") # Added argument parser
     parser.add_argument("--single-query", type=str, help="Run a single query string instead of all test cases.")
+    parser.add_argument("--queries-file", type=str, help="JSONL file of queries to run; results are streamed to stdout as JSON lines.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum number of queries in flight.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_QUERY_TIMEOUT, help="Per-query timeout in seconds.")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Blockscout tool calls per second (default: BLOCKSCOUT_RATE_LIMIT or 5).")
+    parser.add_argument("--tool-cache", type=str, default=DEFAULT_CACHE_PATH, help="SQLite file for cached tool results (default: BLOCKSCOUT_TOOL_CACHE or blockscout_agent/tool_cache.db).")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the tool result cache.")
+    parser.add_argument("--networks", type=str, help="Comma-separated networks from networks.json to serve, or 'all' (default: BLOCKSCOUT_API_URL if set, else the default network).")
+    parser.add_argument("--p2p-index", type=str, default=DEFAULT_DB_PATH, help="P2P event index (p2p_indexer.py) whose materialized state is exposed as tools, if the file exists.")
+    parser.add_argument("--max-tool-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Byte budget for each tool result passed to the model (default: BLOCKSCOUT_MAX_RESPONSE_BYTES or 24000).")
+    parser.add_argument("--tool-subset", choices=list(TOOL_SUBSETS), default=os.getenv("BLOCKSCOUT_TOOL_SUBSET") or "all", help="Blockscout tools shown to the model (e.g. logs-only for the P2P test cases; default: BLOCKSCOUT_TOOL_SUBSET or all).")
+    parser.add_argument("--tool-schemas", type=str, default=DEFAULT_SCHEMA_CACHE_PATH, help="Versioned tool schema cache (see list_mcp_tools.py).")
+    parser.add_argument("--onchain-state", action="store_true", help="Give the agent tools that read the default network's P2PLending contract over its JSON-RPC URL (networks.json rpc_url).")
+    parser.add_argument("--answer-cache", nargs="?", const=DEFAULT_ANSWER_CACHE_PATH, default=None, help="Reuse answers to repeated questions until new logs are indexed for their contracts (optional SQLite path; default file: BLOCKSCOUT_ANSWER_CACHE or blockscout_agent/answer_cache.db).")
+    parser.add_argument("--stream", action="store_true", help="Print model tokens and tool calls/results as they arrive (JSON event lines with --queries-file).")
+    parser.add_argument("--trace-jsonl", type=str, help="Write query, model turn, tool call and HTTP spans to this JSONL file (summary: python tracing.py summary FILE).")
+    parser.add_argument("--trace-otlp", type=str, help="Also write the spans as OTLP/JSON to this file (OpenTelemetry Collector otlpjsonfile format).")
     args = parser.parse_args()
 
+    # With --queries-file stdout carries only the JSON result lines: every other message goes to stderr
+    notice_output = sys.stderr if args.queries_file else sys.stdout
+    print(f"Current working directory: {os.getcwd()}", file=notice_output)
+    print(f"Dotenv path being loaded: {dotenv_path}", file=notice_output)
+    print("Starting Blockscout OpenAI Agent client for P2P queries...", file=notice_output)
+
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key or not openai_api_key.startswith("sk-"):
         logging.error("CRITICAL: OPENAI_API_KEY environment variable not set correctly or is not a secret key.")
-        print("\nExiting: OPENAI_API_KEY is missing or invalid. Please set it in blockscout_agent/.env")
+        print("\nExiting: OPENAI_API_KEY is missing or invalid. Please set it in blockscout_agent/.env", file=notice_output)
         return
 
-    blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL")
-    if not blockscout_api_url:
-        logging.error("CRITICAL: BLOCKSCOUT_API_URL environment variable not set.")
-        print("\nExiting: BLOCKSCOUT_API_URL is missing. Please set it in blockscout_agent/.env")
-        return
+    if configure_tracing(args.trace_jsonl, args.trace_otlp):
+        add_trace_processor(AgentsTraceBridge())
+        if args.trace_jsonl:
+            # The local blockscout-mcp-server build appends its HTTP request spans to the same file
+            os.environ.setdefault("BLOCKSCOUT_TRACE_FILE", args.trace_jsonl)
 
+    networks = served_networks(args.networks.split(",") if args.networks else None)
     logging.info(f"Using OPENAI_API_KEY: ...{openai_api_key[-4:] if openai_api_key else 'Not Set'}")
-    logging.info(f"Using BLOCKSCOUT_API_URL (from os.getenv after dotenv.load_dotenv): {blockscout_api_url}")
-    # logging.info(f"Targeting Blockscout at: {blockscout_api_url} for P2P queries.") # Redundant
+    for network in networks:
+        logging.info(f"Network {network.name}: BLOCKSCOUT_API_URL={network.blockscout_api_url}")
 
-    # Ensure the correct, most recently loaded blockscout_api_url is passed to the subprocess env
-    mcp_env = os.environ.copy() # Start with current environment that includes .env variables
-    mcp_env["BLOCKSCOUT_API_URL"] = blockscout_api_url # Explicitly set/override for clarity and safety
-
-    print(f"BLOCKSCOUT_API_URL that will be passed to MCPServerStdio env: {mcp_env.get('BLOCKSCOUT_API_URL')}")
-
-    blockscout_server = MCPServerStdio(
-        name="BlockscoutMCPviaNPX",
-        params={
-            "command": "npx",
-            "args": ["-y", "blockscout-mcp"],
-            # "command": command_str, # Use the full command string with env var
-            # "args": [], # Args are now part of the command string
-            "cwd": os.path.dirname(os.path.abspath(__file__)), # Run npx from blockscout_agent dir
-            "env": mcp_env # Pass the modified environment
-        },
-    )
-
-    async with blockscout_server as bs_server:
-        # trace_id = gen_trace_id() # Tracing requires OpenAI platform setup
-        # with trace(workflow_name="Blockscout OpenAI Agent MCP Test", trace_id=trace_id):
-        # print(f"View trace (if configured): https://platform.openai.com/traces/trace?trace_id={trace_id}\n")
+    tool_cache = None if args.no_cache else ToolResultCache(args.tool_cache)
+    schema_cache = ToolSchemaCache(args.tool_schemas)
+    default_url = networks.default.blockscout_api_url
+    p2p_store = IndexStore(args.p2p_index) if os.path.exists(args.p2p_index) else None
+    # Referenced contracts are looked up on every served chain, not only the default one
+    answer_chains = [default_chain_label(network.blockscout_api_url) for network in networks]
+    answer_cache = AnswerCache(args.answer_cache, p2p_store, answer_chains) if args.answer_cache else None
+    async with AsyncExitStack() as stack:
+        contract_state = None
+        if args.onchain_state:
+            if networks.default.rpc_url and "P2PLending" in networks.default.contracts:
+                rpc = await stack.enter_async_context(JsonRpcClient(networks.default.rpc_url))
+                reader = P2PStateReader(rpc, networks.default.contract("P2PLending"))
+                contract_state = P2PContractTools(reader, networks.default.name)
+            else:
+                logging.warning(f"--onchain-state: network {networks.default.name} has no rpc_url or P2PLending contract")
+        # One warm MCP server (or supervisor bridge) per network; they are connected one after another
+        # because each stdio client must be closed by the task that opened it.
+        servers = {}
+        for network in networks:
+            bs_server = await stack.enter_async_context(blockscout_mcp_server(network))
+            servers[network.name] = wrap_blockscout_server(bs_server, network, args, tool_cache, schema_cache)
+        if len(servers) == 1:
+            agent_server = servers[networks.default_name]
+        else:
+            agent_server = MultiChainMCPServer(servers, networks.default_name)
         logging.info("Blockscout OpenAI Agent with MCP server is ready for P2P queries.")
-        print("\nBlockscout OpenAI Agent starting P2P contract queries...")
-        await run_openai_agent_tests(bs_server, args.single_query) # Pass single_query arg
+        print("\nBlockscout OpenAI Agent starting P2P contract queries...", file=notice_output)
+        try:
+            await run_openai_agent_tests(
+                agent_server,
+                args.single_query, # Pass single_query arg
+                queries_file=args.queries_file,
+                concurrency=args.concurrency,
+                timeout=args.timeout,
+                p2p_state=P2PStateTools(p2p_store, default_chain_label(default_url)) if p2p_store else None,
+                networks=networks,
+                stream=args.stream,
+                answer_cache=answer_cache,
+                contract_state=contract_state,
+            )
+        finally:
+            if tool_cache:
+                logging.info(f"Tool cache stats: {tool_cache.stats()}")
+                tool_cache.close()
+            if answer_cache:
+                logging.info(f"Answer cache stats: {answer_cache.stats()}")
+                answer_cache.close()
+            if p2p_store:
+                p2p_store.close()
+            if args.trace_jsonl:
+                logging.info(f"Spans written to {args.trace_jsonl}; run `python tracing.py summary {args.trace_jsonl}` for p50/p95 per tool.")
+
 
 if __name__ == "__main__":
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Dotenv path being loaded: {dotenv_path}")
-    print("Starting Blockscout OpenAI Agent client for P2P queries...")
     asyncio.run(main()) 
\ No newline at end of file
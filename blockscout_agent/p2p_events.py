@@ -0,0 +1,322 @@
+import glob
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from eth_abi import decode as abi_decode
+from eth_hash.auto import keccak
+
+logger = logging.getLogger(__name__)
+
+# Event declarations copied from src/UserRegistry.sol, src/Reputation.sol and src/P2PLending.sol.
+# Solidity enums (LoanStatus, PaymentModificationType, PaymentOutcomeType) are ABI-encoded as uint8.
+P2P_EVENT_DECLARATIONS = {
+    "UserRegistry": [
+        "UserRegistered(address indexed userAddress, string name, uint256 timestamp)",
+        "UserProfileUpdated(address indexed userAddress, string newName)",
+    ],
+    "Reputation": [
+        "ReputationUpdated(address indexed user, int256 newScore, string reason)",
+        "LoanTermOutcomeRecorded(bytes32 indexed agreementId, address indexed user, int256 reputationChange, string reason, uint8 outcomeType)",
+        "VouchAdded(address indexed voucher, address indexed borrower, address token, uint256 amount)",
+        "VouchRemoved(address indexed voucher, address indexed borrower, uint256 returnedAmount)",
+        "VouchSlashed(address indexed voucher, address indexed defaultingBorrower, uint256 slashedAmount, address indexed slashedToLender)",
+    ],
+    "P2PLending": [
+        "LoanOfferCreated(bytes32 indexed offerId, address indexed lender, uint256 amount, address token, uint16 interestRateBPS, uint256 durationSeconds)",
+        "LoanRequestCreated(bytes32 indexed requestId, address indexed borrower, uint256 amount, address token, uint16 proposedInterestRateBPS, uint256 proposedDurationSeconds)",
+        "LoanAgreementCreated(bytes32 indexed agreementId, address indexed lender, address indexed borrower, uint256 principalAmount, address token, uint16 interestRateBPS, uint256 durationSeconds, uint256 startTime, uint256 dueDate, uint256 collateralAmount, address collateralToken)",
+        "LoanRepayment(bytes32 indexed agreementId, address indexed payer, uint256 amountPaidThisTime, uint256 newTotalAmountPaid, uint256 newRemainingBalance, uint8 newStatus)",
+        "LoanAgreementRepaid(bytes32 indexed agreementId)",
+        "LoanAgreementDefaulted(bytes32 indexed agreementId)",
+        "PaymentModificationRequested(bytes32 indexed agreementId, address indexed borrower, uint8 modificationType, uint256 value)",
+        "PaymentModificationResponded(bytes32 indexed agreementId, address indexed lender, bool approved, uint8 modificationType, uint256 originalRequestedValue)",
+    ],
+}
+
+# Solidity enum values as emitted in events (see src/P2PLending.sol)
+LOAN_STATUS_NAMES = ["Active", "Repaid", "Defaulted", "Cancelled", "PendingModificationApproval",
+                     "Active_PartialPaymentAgreed", "Overdue"]
+MODIFICATION_TYPE_NAMES = ["None", "DueDateExtension", "PartialPaymentAgreement"]
+
+
+def enum_name(names: list[str], value: int) -> str:
+    return names[value] if 0 <= value < len(names) else str(value)
+
+
+# Which event argument is "the user" (and the other party, if any) for each event.
+# These feed the indexed `user` / `counterparty` columns of the local index.
+EVENT_ROLES = {
+    "UserRegistered": ("userAddress", None),
+    "UserProfileUpdated": ("userAddress", None),
+    "ReputationUpdated": ("user", None),
+    "LoanTermOutcomeRecorded": ("user", None),
+    "VouchAdded": ("voucher", "borrower"),
+    "VouchRemoved": ("voucher", "borrower"),
+    "VouchSlashed": ("voucher", "defaultingBorrower"),
+    "LoanOfferCreated": ("lender", None),
+    "LoanRequestCreated": ("borrower", None),
+    "LoanAgreementCreated": ("borrower", "lender"),
+    "LoanRepayment": ("payer", None),
+    "LoanAgreementRepaid": (None, None),
+    "LoanAgreementDefaulted": (None, None),
+    "PaymentModificationRequested": ("borrower", None),
+    "PaymentModificationResponded": ("lender", None),
+}
+
+_DECLARATION_RE = re.compile(r"^\s*(\w+)\s*\((.*)\)\s*$")
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_FOUNDRY_OUT = os.path.join(REPO_ROOT, "out")
+DEFAULT_DEPLOYED_CONTRACTS = os.path.join(REPO_ROOT, "nextjs", "contracts", "deployedContracts.ts")
+
+
+@dataclass(frozen=True)
+class EventInput:
+    name: str
+    type: str
+    indexed: bool
+
+
+@dataclass(frozen=True)
+class EventSpec:
+    contract: str
+    name: str
+    inputs: tuple[EventInput, ...]
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}({','.join(i.type for i in self.inputs)})"
+
+    @property
+    def topic0(self) -> str:
+        return "0x" + keccak(self.signature.encode()).hex()
+
+    @classmethod
+    def from_declaration(cls, contract: str, declaration: str) -> "EventSpec":
+        """Parses a Solidity event declaration such as 'VouchAdded(address indexed voucher, ...)'."""
+        match = _DECLARATION_RE.match(declaration)
+        if not match:
+            raise ValueError(f"Invalid event declaration: {declaration}")
+        name, params = match.groups()
+        inputs = []
+        for param in filter(None, (p.strip() for p in params.split(","))):
+            parts = param.split()
+            indexed = "indexed" in parts
+            parts = [p for p in parts if p != "indexed"]
+            inputs.append(EventInput(name=parts[1] if len(parts) > 1 else "", type=parts[0], indexed=indexed))
+        return cls(contract=contract, name=name, inputs=tuple(inputs))
+
+    @classmethod
+    def from_abi(cls, contract: str, abi_entry: dict) -> "EventSpec":
+        """Builds a spec from a compiled ABI event entry ({"type": "event", "name": ..., "inputs": [...]})."""
+        inputs = tuple(
+            EventInput(name=i.get("name", ""), type=_canonical_type(i), indexed=bool(i.get("indexed")))
+            for i in abi_entry.get("inputs", [])
+        )
+        return cls(contract=contract, name=abi_entry["name"], inputs=inputs)
+
+
+def _canonical_type(abi_input: dict) -> str:
+    # Structs are encoded as tuples: tuple[] -> (type1,type2)[]
+    abi_type = abi_input["type"]
+    if abi_type.startswith("tuple"):
+        components = ",".join(_canonical_type(c) for c in abi_input.get("components", []))
+        return f"({components}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+def load_foundry_abis(out_dir: str = DEFAULT_FOUNDRY_OUT, contracts: list[str] | None = None) -> dict[str, list[dict]]:
+    """Reads the ABIs from Foundry build artifacts (out/<Name>.sol/<Name>.json)."""
+    abis = {}
+    for path in sorted(glob.glob(os.path.join(out_dir, "*.sol", "*.json"))):
+        contract = os.path.splitext(os.path.basename(path))[0]
+        if contracts is not None and contract not in contracts:
+            continue
+        with open(path) as f:
+            artifact = json.load(f)
+        if artifact.get("abi"):
+            abis[contract] = artifact["abi"]
+    return abis
+
+
+def load_deployed_contracts(path: str = DEFAULT_DEPLOYED_CONTRACTS) -> dict[str, dict[str, dict]]:
+    """
+    Parses Scaffold-ETH's deployedContracts.ts into {chain_id: {contract: {"address", "abi", ...}}}.
+    The file is a plain object literal, so it is turned into JSON rather than evaluated.
+    """
+    with open(path) as f:
+        source = f.read()
+    literal = source[source.index("{", source.index("const deployedContracts")):source.rindex("} as const") + 1]
+    literal = re.sub(r"^(\s*)([A-Za-z_$][\w$]*|\d+)\s*:", r'\1"\2":', literal, flags=re.MULTILINE)
+    literal = re.sub(r",(\s*[}\]])", r"\1", literal)
+    return json.loads(literal)
+
+
+def load_p2p_abis(out_dir: str = DEFAULT_FOUNDRY_OUT, deployed_contracts_path: str = DEFAULT_DEPLOYED_CONTRACTS,
+                  chain_id: str | None = None) -> dict[str, list[dict]]:
+    """
+    ABIs of the P2P contracts: from the Foundry artifacts when the contracts have been built,
+    otherwise from the frontend's deployedContracts.ts (first chain, or `chain_id`).
+    """
+    contracts = list(P2P_EVENT_DECLARATIONS)
+    if os.path.isdir(out_dir):
+        abis = load_foundry_abis(out_dir, contracts)
+        if abis:
+            return abis
+    if os.path.exists(deployed_contracts_path):
+        deployments = load_deployed_contracts(deployed_contracts_path)
+        chain = deployments.get(str(chain_id)) if chain_id else next(iter(deployments.values()), {})
+        return {name: info["abi"] for name, info in (chain or {}).items() if name in contracts}
+    return {}
+
+
+@dataclass
+class DecodedEvent:
+    contract: str
+    event: str
+    args: dict[str, Any]
+    address: str
+    block_number: int
+    block_hash: str | None
+    transaction_hash: str
+    log_index: int
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def user(self) -> str | None:
+        user_arg = EVENT_ROLES.get(self.event, (None, None))[0]
+        return self.args.get(user_arg) if user_arg else None
+
+    @property
+    def counterparty(self) -> str | None:
+        counterparty_arg = EVENT_ROLES.get(self.event, (None, None))[1]
+        return self.args.get(counterparty_arg) if counterparty_arg else None
+
+    @property
+    def agreement_id(self) -> str | None:
+        return self.args.get("agreementId")
+
+
+def _normalize_value(abi_type: str, value: Any) -> Any:
+    # Addresses and hashes are stored lowercase so that lookups are case-insensitive.
+    if abi_type == "address":
+        return value.lower()
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, (tuple, list)):
+        return [_normalize_value("", v) for v in value]
+    return value
+
+
+def _decode_topic(abi_type: str, topic: str) -> Any:
+    raw = bytes.fromhex(topic[2:] if topic.startswith("0x") else topic)
+    if abi_type in ("string", "bytes") or abi_type.endswith("]"):
+        # Dynamic types are only stored as their keccak hash when indexed.
+        return "0x" + raw.hex()
+    return _normalize_value(abi_type, abi_decode([abi_type], raw)[0])
+
+
+class EventDecoder:
+    """Decodes raw Blockscout log items (topics + data) against a set of EventSpecs."""
+
+    def __init__(self, specs: list[EventSpec]):
+        self.specs_by_topic0 = {spec.topic0: spec for spec in specs}
+
+    @classmethod
+    def for_p2p_contracts(cls) -> "EventDecoder":
+        return cls([
+            EventSpec.from_declaration(contract, declaration)
+            for contract, declarations in P2P_EVENT_DECLARATIONS.items()
+            for declaration in declarations
+        ])
+
+    @classmethod
+    def from_abis(cls, abis: dict[str, list[dict]]) -> "EventDecoder":
+        """Builds the topic0 lookup from {contract: abi}. Anonymous events have no topic0 and are skipped."""
+        return cls([
+            EventSpec.from_abi(contract, entry)
+            for contract, abi in abis.items()
+            for entry in abi
+            if entry.get("type") == "event" and not entry.get("anonymous")
+        ])
+
+    @classmethod
+    def from_artifacts(cls, out_dir: str = DEFAULT_FOUNDRY_OUT,
+                       deployed_contracts_path: str = DEFAULT_DEPLOYED_CONTRACTS) -> "EventDecoder":
+        """Decoder for the compiled P2P ABIs, falling back to the built-in declarations."""
+        abis = load_p2p_abis(out_dir, deployed_contracts_path)
+        if not abis:
+            logger.info("No compiled ABIs found, using the built-in P2P event declarations")
+            return cls.for_p2p_contracts()
+        return cls.from_abis(abis)
+
+    def decode(self, log: dict) -> DecodedEvent | None:
+        """
+        Decodes one Blockscout v2 log item. Returns None when the log does not
+        match any known event (or is malformed).
+        """
+        topics = [t for t in (log.get("topics") or []) if t]
+        if not topics:
+            return None
+        spec = self.specs_by_topic0.get(topics[0].lower())
+        if spec is None:
+            return None
+
+        indexed_inputs = [i for i in spec.inputs if i.indexed]
+        data_inputs = [i for i in spec.inputs if not i.indexed]
+        if len(topics) - 1 != len(indexed_inputs):
+            logger.warning(f"Topic count mismatch for {spec.name} in tx {log.get('transaction_hash')}")
+            return None
+
+        try:
+            args: dict[str, Any] = {}
+            for event_input, topic in zip(indexed_inputs, topics[1:]):
+                args[event_input.name] = _decode_topic(event_input.type, topic)
+            data = log.get("data") or "0x"
+            values = abi_decode([i.type for i in data_inputs], bytes.fromhex(data[2:]))
+            for event_input, value in zip(data_inputs, values):
+                args[event_input.name] = _normalize_value(event_input.type, value)
+        except Exception as e:
+            logger.warning(f"Could not decode {spec.name} log in tx {log.get('transaction_hash')}: {e}")
+            return None
+
+        address = log.get("address")
+        if isinstance(address, dict):  # Blockscout v2 returns an address object
+            address = address.get("hash")
+        return DecodedEvent(
+            contract=spec.contract,
+            event=spec.name,
+            args=args,
+            address=(address or "").lower(),
+            block_number=int(log.get("block_number") or 0),
+            block_hash=log.get("block_hash"),
+            transaction_hash=log.get("transaction_hash") or log.get("tx_hash") or "",
+            log_index=int(log.get("index") or log.get("log_index") or 0),
+        )
+
+    def annotate(self, log: dict) -> dict:
+        """
+        Returns the log with a Blockscout-style `decoded` field filled in from the local ABIs
+        when the explorer didn't decode it (unverified contract or failed decoding).
+        """
+        if log.get("decoded"):
+            return log
+        decoded = self.decode(log)
+        if decoded is None:
+            return log
+        spec = self.specs_by_topic0[log["topics"][0].lower()]
+        parameters = [
+            # uint256 values exceed JSON number precision, so numbers are strings as in Blockscout's output
+            {"name": i.name, "type": i.type, "indexed": i.indexed,
+             "value": str(decoded.args[i.name]) if isinstance(decoded.args[i.name], int) else decoded.args[i.name]}
+            for i in spec.inputs
+        ]
+        method_call = f"{spec.name}({', '.join(f'{i.type} {i.name}' for i in spec.inputs)})"
+        return {**log, "decoded": {"method_call": method_call, "method_id": spec.topic0[2:10], "parameters": parameters}}
+
+    def annotate_logs(self, logs: list[dict]) -> list[dict]:
+        return [self.annotate(log) for log in logs]
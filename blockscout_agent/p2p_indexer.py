@@ -0,0 +1,720 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+import httpx
+from dotenv import load_dotenv
+
+from blockscout_api import BlockscoutClient
+from networks import load_networks
+from p2p_events import LOAN_STATUS_NAMES, MODIFICATION_TYPE_NAMES, DecodedEvent, EventDecoder, enum_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'p2p_index.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    chain TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    address TEXT NOT NULL,
+    event TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    user TEXT,
+    counterparty TEXT,
+    agreement_id TEXT,
+    args TEXT NOT NULL, -- JSON; uint256/int256 values can exceed SQLite INTEGER
+    PRIMARY KEY (chain, tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_events_user ON events (chain, user, event, block_number);
+CREATE INDEX IF NOT EXISTS idx_events_counterparty ON events (chain, counterparty, event);
+CREATE INDEX IF NOT EXISTS idx_events_agreement ON events (chain, agreement_id, event);
+CREATE INDEX IF NOT EXISTS idx_events_block ON events (chain, block_number);
+CREATE INDEX IF NOT EXISTS idx_events_name ON events (chain, event, block_number);
+CREATE INDEX IF NOT EXISTS idx_events_address_block ON events (chain, address, block_number);
+
+-- Per-chain, per-contract sync cursor: the newest block holding an indexed log of that contract.
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    chain TEXT NOT NULL,
+    address TEXT NOT NULL,
+    last_block INTEGER NOT NULL,
+    last_block_hash TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (chain, address)
+);
+
+-- Materialized current state, folded from the events above and refreshed per key as events are
+-- inserted or rolled back. Amounts are decimal TEXT for the same reason as events.args.
+CREATE TABLE IF NOT EXISTS reputation_scores (
+    chain TEXT NOT NULL,
+    user TEXT NOT NULL,
+    score TEXT NOT NULL,
+    reason TEXT,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    PRIMARY KEY (chain, user)
+);
+CREATE TABLE IF NOT EXISTS agreements (
+    chain TEXT NOT NULL,
+    agreement_id TEXT NOT NULL,
+    lender TEXT NOT NULL,
+    borrower TEXT NOT NULL,
+    token TEXT,
+    principal TEXT NOT NULL,
+    amount_paid TEXT NOT NULL,
+    remaining_balance TEXT, -- NULL until the first repayment reports it (principal + interest)
+    status TEXT NOT NULL,
+    due_date INTEGER,
+    created_block INTEGER NOT NULL,
+    updated_block INTEGER NOT NULL,
+    PRIMARY KEY (chain, agreement_id)
+);
+CREATE INDEX IF NOT EXISTS idx_agreements_borrower ON agreements (chain, borrower, status);
+CREATE INDEX IF NOT EXISTS idx_agreements_lender ON agreements (chain, lender, status);
+CREATE TABLE IF NOT EXISTS vouches (
+    chain TEXT NOT NULL,
+    voucher TEXT NOT NULL,
+    borrower TEXT NOT NULL,
+    token TEXT,
+    stake TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    updated_block INTEGER NOT NULL,
+    PRIMARY KEY (chain, voucher, borrower)
+);
+CREATE INDEX IF NOT EXISTS idx_vouches_borrower ON vouches (chain, borrower);
+CREATE TABLE IF NOT EXISTS pending_modifications (
+    chain TEXT NOT NULL,
+    agreement_id TEXT NOT NULL,
+    borrower TEXT NOT NULL,
+    lender TEXT,
+    modification_type TEXT NOT NULL,
+    value TEXT NOT NULL,
+    requested_block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    PRIMARY KEY (chain, agreement_id)
+);
+CREATE INDEX IF NOT EXISTS idx_pending_borrower ON pending_modifications (chain, borrower);
+CREATE INDEX IF NOT EXISTS idx_pending_lender ON pending_modifications (chain, lender);
+"""
+
+VIEW_TABLES = ("reputation_scores", "agreements", "vouches", "pending_modifications")
+CLOSED_STATUSES = {"Repaid", "Defaulted", "Cancelled"}
+
+# How many of the newest indexed blocks are re-checked against the explorer when looking
+# for the common ancestor after a reorg. Anything deeper triggers a full resync of the chain.
+DEFAULT_REORG_DEPTH = 64
+# Contracts whose logs are fetched in parallel by sync_contracts.
+DEFAULT_SYNC_CONCURRENCY = 4
+
+
+def default_chain_label(blockscout_api_url: str) -> str:
+    """Uses the explorer host (e.g. 'evm-testnet.flowscan.io') to tell chains apart in the index."""
+    return urlparse(blockscout_api_url).netloc or blockscout_api_url
+
+
+class IndexStore:
+    """
+    Local SQLite store of decoded UserRegistry / Reputation / P2PLending events.
+    Rows are indexed by user, counterparty, agreementId and block so the common
+    P2P questions are answered with a single indexed query.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        # Agent tools (tools/p2p_state.py) read the store from worker threads
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        had_views = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agreements'"
+        ).fetchone() is not None
+        self.conn.executescript(SCHEMA)
+        if not had_views:
+            # Index created before the views existed: fold the events already stored
+            for row in self.conn.execute("SELECT DISTINCT chain FROM events").fetchall():
+                self.rebuild_views(row['chain'])
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def insert_events(self, chain: str, events: list[DecodedEvent]) -> int:
+        """
+        Inserts decoded events, ignoring ones already stored, and refreshes the materialized
+        state of every user/agreement/vouch touched by a new row. Returns the number of new rows.
+        """
+        inserted = []
+        with self.conn:
+            for e in events:
+                cursor = self.conn.execute(
+                    """INSERT OR IGNORE INTO events
+                       (chain, contract, address, event, block_number, block_hash, tx_hash, log_index,
+                        user, counterparty, agreement_id, args)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (chain, e.contract, e.address, e.event, e.block_number, e.block_hash,
+                     e.transaction_hash, e.log_index, e.user, e.counterparty, e.agreement_id,
+                     json.dumps(e.args)),
+                )
+                if cursor.rowcount:
+                    inserted.append(e)
+            self._refresh_views(chain, inserted)
+        return len(inserted)
+
+    # --- Materialized views ---
+    # Logs arrive newest first and pages can be retried or rolled back, so instead of applying
+    # each event as a delta, the state of every affected key is re-folded from its (short)
+    # event history in block order. Lookups then read a single row by primary key.
+
+    def _refresh_views(self, chain: str, events: list[DecodedEvent]) -> None:
+        users, agreement_ids, vouch_pairs = set(), set(), set()
+        for e in events:
+            if e.event == "ReputationUpdated":
+                users.add(e.user)
+            elif e.event in ("VouchAdded", "VouchRemoved", "VouchSlashed"):
+                vouch_pairs.add((e.user, e.counterparty))
+            elif e.agreement_id:
+                agreement_ids.add(e.agreement_id)
+        for user in users:
+            self._refresh_reputation(chain, user)
+        for agreement_id in agreement_ids:
+            self._refresh_agreement(chain, agreement_id)
+        for voucher, borrower in vouch_pairs:
+            self._refresh_vouch(chain, voucher, borrower)
+
+    def _history(self, sql: str, params: tuple) -> list[DecodedEvent]:
+        return [self._row_to_event(row) for row in self.conn.execute(sql + " ORDER BY block_number, log_index", params)]
+
+    def _refresh_reputation(self, chain: str, user: str) -> None:
+        latest = self.query_events(chain, event="ReputationUpdated", user=user, limit=1)
+        if not latest:
+            self.conn.execute("DELETE FROM reputation_scores WHERE chain = ? AND user = ?", (chain, user))
+            return
+        e = latest[0]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO reputation_scores VALUES (?, ?, ?, ?, ?, ?)",
+            (chain, user, str(e.args["newScore"]), e.args.get("reason"), e.block_number, e.transaction_hash),
+        )
+
+    def _refresh_agreement(self, chain: str, agreement_id: str) -> None:
+        history = self._history("SELECT * FROM events WHERE chain = ? AND agreement_id = ?", (chain, agreement_id))
+        agreement, pending = None, None
+        for e in history:
+            args = e.args
+            if e.event == "LoanAgreementCreated":
+                agreement = {
+                    "lender": args["lender"], "borrower": args["borrower"], "token": args.get("token"),
+                    "principal": args["principalAmount"], "amount_paid": 0, "remaining_balance": None,
+                    "status": "Active", "due_date": args.get("dueDate"), "created_block": e.block_number,
+                }
+            elif e.event == "PaymentModificationRequested":
+                # A new request overwrites an unanswered one, as in the contract
+                pending = e
+            elif e.event == "PaymentModificationResponded":
+                pending = None
+            if agreement is None:
+                continue
+            agreement["updated_block"] = e.block_number
+            if e.event == "LoanRepayment":
+                agreement["amount_paid"] = args["newTotalAmountPaid"]
+                agreement["remaining_balance"] = args["newRemainingBalance"]
+                agreement["status"] = enum_name(LOAN_STATUS_NAMES, args["newStatus"])
+            elif e.event == "LoanAgreementRepaid":
+                agreement["status"] = "Repaid"
+            elif e.event == "LoanAgreementDefaulted":
+                agreement["status"] = "Defaulted"
+            elif e.event == "PaymentModificationRequested":
+                agreement["status"] = "PendingModificationApproval"
+            elif e.event == "PaymentModificationResponded":
+                modification = enum_name(MODIFICATION_TYPE_NAMES, args["modificationType"])
+                if args["approved"] and modification == "DueDateExtension":
+                    agreement["due_date"] = args["originalRequestedValue"]
+                # The contract picks Active or Overdue from block.timestamp; overdue is derived
+                # from due_date at lookup time instead (see agreements_for()).
+                if args["approved"] and modification == "PartialPaymentAgreement":
+                    agreement["status"] = "Active_PartialPaymentAgreed"
+                else:
+                    agreement["status"] = "Active"
+
+        self.conn.execute("DELETE FROM agreements WHERE chain = ? AND agreement_id = ?", (chain, agreement_id))
+        self.conn.execute("DELETE FROM pending_modifications WHERE chain = ? AND agreement_id = ?", (chain, agreement_id))
+        if agreement is not None:
+            self.conn.execute(
+                """INSERT INTO agreements
+                   (chain, agreement_id, lender, borrower, token, principal, amount_paid, remaining_balance,
+                    status, due_date, created_block, updated_block)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (chain, agreement_id, agreement["lender"], agreement["borrower"], agreement["token"],
+                 str(agreement["principal"]), str(agreement["amount_paid"]),
+                 None if agreement["remaining_balance"] is None else str(agreement["remaining_balance"]),
+                 agreement["status"], agreement["due_date"], agreement["created_block"], agreement["updated_block"]),
+            )
+        if pending is not None and (agreement is None or agreement["status"] not in CLOSED_STATUSES):
+            self.conn.execute(
+                "INSERT INTO pending_modifications VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (chain, agreement_id, pending.args["borrower"], agreement["lender"] if agreement else None,
+                 enum_name(MODIFICATION_TYPE_NAMES, pending.args["modificationType"]),
+                 str(pending.args["value"]), pending.block_number, pending.transaction_hash),
+            )
+
+    def _refresh_vouch(self, chain: str, voucher: str, borrower: str) -> None:
+        history = self._history(
+            """SELECT * FROM events WHERE chain = ? AND user = ? AND counterparty = ?
+               AND event IN ('VouchAdded', 'VouchRemoved', 'VouchSlashed')""",
+            (chain, voucher, borrower),
+        )
+        self.conn.execute("DELETE FROM vouches WHERE chain = ? AND voucher = ? AND borrower = ?",
+                          (chain, voucher, borrower))
+        if not history:
+            return
+        token, stake = None, 0
+        for e in history:
+            if e.event == "VouchAdded":
+                token, stake = e.args["token"], e.args["amount"]
+            elif e.event == "VouchRemoved":
+                stake = 0
+            elif e.event == "VouchSlashed":
+                stake = max(stake - e.args["slashedAmount"], 0)
+        self.conn.execute(
+            "INSERT INTO vouches VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (chain, voucher, borrower, token, str(stake), int(stake > 0), history[-1].block_number),
+        )
+
+    def rebuild_views(self, chain: str) -> None:
+        """Recomputes all materialized state of `chain` from the stored events."""
+        with self.conn:
+            for table in VIEW_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE chain = ?", (chain,))
+            self._refresh_views(chain, self.query_events(chain))
+
+    @staticmethod
+    def _row_to_event(row: sqlite3.Row) -> DecodedEvent:
+        return DecodedEvent(
+            contract=row['contract'],
+            event=row['event'],
+            args=json.loads(row['args']),
+            address=row['address'],
+            block_number=row['block_number'],
+            block_hash=row['block_hash'],
+            transaction_hash=row['tx_hash'],
+            log_index=row['log_index'],
+        )
+
+    def query_events(self, chain: str, event: str | None = None, user: str | None = None,
+                     counterparty: str | None = None, agreement_id: str | None = None,
+                     limit: int | None = None) -> list[DecodedEvent]:
+        """Returns matching events, newest first."""
+        clauses, params = ["chain = ?"], [chain]
+        for column, value in (("event", event), ("user", user), ("counterparty", counterparty),
+                              ("agreement_id", agreement_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value.lower() if column != "event" else value)
+        sql = f"SELECT * FROM events WHERE {' AND '.join(clauses)} ORDER BY block_number DESC, log_index DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._row_to_event(row) for row in self.conn.execute(sql, params)]
+
+    def get_cursor(self, chain: str, address: str) -> tuple[int, str | None] | None:
+        row = self.conn.execute(
+            "SELECT last_block, last_block_hash FROM sync_cursors WHERE chain = ? AND address = ?",
+            (chain, address.lower()),
+        ).fetchone()
+        return (row['last_block'], row['last_block_hash']) if row else None
+
+    def set_cursor(self, chain: str, address: str, block_number: int, block_hash: str | None) -> None:
+        with self.conn:
+            self.conn.execute(
+                """INSERT INTO sync_cursors (chain, address, last_block, last_block_hash, updated_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (chain, address) DO UPDATE SET
+                       last_block = excluded.last_block,
+                       last_block_hash = excluded.last_block_hash,
+                       updated_at = excluded.updated_at""",
+                (chain, address.lower(), block_number, block_hash, time.time()),
+            )
+
+    def reset_cursors(self, chain: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM sync_cursors WHERE chain = ?", (chain,))
+
+    def recent_blocks(self, chain: str, limit: int) -> list[tuple[int, str | None]]:
+        """Newest distinct (block_number, block_hash) pairs that hold indexed events."""
+        rows = self.conn.execute(
+            """SELECT DISTINCT block_number, block_hash FROM events WHERE chain = ?
+               ORDER BY block_number DESC LIMIT ?""",
+            (chain, limit),
+        )
+        return [(row['block_number'], row['block_hash']) for row in rows]
+
+    def rollback(self, chain: str, after_block: int) -> int:
+        """
+        Deletes every event of `chain` above `after_block`, refreshes the state they touched and
+        rewinds the chain's cursors to the newest block each contract still has events in.
+        Returns the number of deleted rows.
+        """
+        with self.conn:
+            removed = [self._row_to_event(row) for row in self.conn.execute(
+                "SELECT * FROM events WHERE chain = ? AND block_number > ?", (chain, after_block)
+            )]
+            deleted = self.conn.execute(
+                "DELETE FROM events WHERE chain = ? AND block_number > ?", (chain, after_block)
+            ).rowcount
+            self._refresh_views(chain, removed)
+            cursors = self.conn.execute(
+                "SELECT address FROM sync_cursors WHERE chain = ? AND last_block > ?", (chain, after_block)
+            ).fetchall()
+            for cursor in cursors:
+                newest = self.conn.execute(
+                    """SELECT block_number, block_hash FROM events WHERE chain = ? AND address = ?
+                       ORDER BY block_number DESC LIMIT 1""",
+                    (chain, cursor['address']),
+                ).fetchone()
+                if newest:
+                    self.conn.execute(
+                        "UPDATE sync_cursors SET last_block = ?, last_block_hash = ?, updated_at = ? WHERE chain = ? AND address = ?",
+                        (newest['block_number'], newest['block_hash'], time.time(), chain, cursor['address']),
+                    )
+                else:
+                    self.conn.execute(
+                        "DELETE FROM sync_cursors WHERE chain = ? AND address = ?", (chain, cursor['address'])
+                    )
+        return deleted
+
+    @staticmethod
+    def _state_row(row: sqlite3.Row) -> dict:
+        state = dict(row)
+        state.pop("chain")
+        for column in ("score", "principal", "amount_paid", "remaining_balance", "stake", "value"):
+            if state.get(column) is not None:
+                state[column] = int(state[column])
+        if "active" in state:
+            state["active"] = bool(state["active"])
+        if "status" in state:
+            # The contract only flips to Overdue on the next repayment/response; derive it here
+            state["overdue"] = (state["status"] not in CLOSED_STATUSES and state["due_date"] is not None
+                                and state["due_date"] < time.time())
+        return state
+
+    def reputation(self, chain: str, user: str) -> dict | None:
+        """Current reputation score of a user, with the reason and block of its last update."""
+        row = self.conn.execute("SELECT * FROM reputation_scores WHERE chain = ? AND user = ?",
+                                (chain, user.lower())).fetchone()
+        return self._state_row(row) if row else None
+
+    def latest_reputation_score(self, chain: str, user: str) -> int | None:
+        state = self.reputation(chain, user)
+        return state["score"] if state else None
+
+    def agreement_state(self, chain: str, agreement_id: str) -> dict | None:
+        row = self.conn.execute("SELECT * FROM agreements WHERE chain = ? AND agreement_id = ?",
+                                (chain, agreement_id.lower())).fetchone()
+        return self._state_row(row) if row else None
+
+    def agreements_for(self, chain: str, address: str, role: str = "borrower",
+                       status: str | None = None) -> list[dict]:
+        """
+        Current state of the agreements where `address` is the borrower or lender, newest first.
+        `status` is a LoanStatus name, or "open" / "closed" (Repaid, Defaulted, Cancelled).
+        """
+        if role not in ("borrower", "lender"):
+            raise ValueError(f"role must be 'borrower' or 'lender', not {role!r}")
+        sql = f"SELECT * FROM agreements WHERE chain = ? AND {role} = ?"
+        params: list = [chain, address.lower()]
+        if status in ("open", "closed"):
+            placeholders = ", ".join("?" * len(CLOSED_STATUSES))
+            sql += f" AND status {'NOT IN' if status == 'open' else 'IN'} ({placeholders})"
+            params.extend(sorted(CLOSED_STATUSES))
+        elif status is not None:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY created_block DESC"
+        return [self._state_row(row) for row in self.conn.execute(sql, params)]
+
+    def vouch(self, chain: str, voucher: str, borrower: str) -> dict | None:
+        """Current stake of one voucher/borrower pair (zero and inactive once removed or fully slashed)."""
+        row = self.conn.execute("SELECT * FROM vouches WHERE chain = ? AND voucher = ? AND borrower = ?",
+                                (chain, voucher.lower(), borrower.lower())).fetchone()
+        return self._state_row(row) if row else None
+
+    def vouches_for(self, chain: str, address: str, role: str = "voucher", active_only: bool = True) -> list[dict]:
+        """Vouches given (role='voucher') or received (role='borrower') by an address."""
+        if role not in ("voucher", "borrower"):
+            raise ValueError(f"role must be 'voucher' or 'borrower', not {role!r}")
+        sql = f"SELECT * FROM vouches WHERE chain = ? AND {role} = ?"
+        if active_only:
+            sql += " AND active = 1"
+        return [self._state_row(row) for row in self.conn.execute(sql, (chain, address.lower()))]
+
+    def pending_modifications(self, chain: str, address: str | None = None) -> list[dict]:
+        """Unanswered payment-modification requests, optionally only those where `address` is borrower or lender."""
+        sql = "SELECT * FROM pending_modifications WHERE chain = ?"
+        params: list = [chain]
+        if address is not None:
+            sql += " AND (borrower = ? OR lender = ?)"
+            params.extend([address.lower(), address.lower()])
+        sql += " ORDER BY requested_block DESC"
+        return [self._state_row(row) for row in self.conn.execute(sql, params)]
+
+    def registration(self, chain: str, user: str) -> DecodedEvent | None:
+        events = self.query_events(chain, event="UserRegistered", user=user, limit=1)
+        return events[0] if events else None
+
+    def agreements_for_borrower(self, chain: str, borrower: str) -> list[DecodedEvent]:
+        return self.query_events(chain, event="LoanAgreementCreated", user=borrower)
+
+    def agreements_for_lender(self, chain: str, lender: str) -> list[DecodedEvent]:
+        return self.query_events(chain, event="LoanAgreementCreated", counterparty=lender)
+
+    def agreement_history(self, chain: str, agreement_id: str) -> list[DecodedEvent]:
+        return self.query_events(chain, agreement_id=agreement_id)
+
+    def defaults_for_borrower(self, chain: str, borrower: str) -> list[DecodedEvent]:
+        """LoanAgreementDefaulted only carries the agreementId; the borrower comes from LoanAgreementCreated."""
+        rows = self.conn.execute(
+            """SELECT d.* FROM events d
+               JOIN events a ON a.chain = d.chain AND a.agreement_id = d.agreement_id
+                            AND a.event = 'LoanAgreementCreated'
+               WHERE d.chain = ? AND d.event = 'LoanAgreementDefaulted' AND a.user = ?
+               ORDER BY d.block_number DESC, d.log_index DESC""",
+            (chain, borrower.lower()),
+        )
+        return [self._row_to_event(row) for row in rows]
+
+
+class P2PIndexer:
+    """Pages through the P2P contracts' logs on Blockscout, decodes them and stores them in an IndexStore."""
+
+    def __init__(self, client: BlockscoutClient, store: IndexStore, chain: str,
+                 decoder: EventDecoder | None = None):
+        self.client = client
+        self.store = store
+        self.chain = chain
+        self.decoder = decoder or EventDecoder.for_p2p_contracts()
+
+    async def _fetch_since(self, address: str, cursor_block: int) -> int:
+        """
+        Pages through a contract's logs (newest first) down to `cursor_block`, stores them and
+        moves the contract's cursor to the newest log seen. Returns the number of new rows.
+        """
+        new_rows = 0
+        skipped = 0
+        newest: tuple[int, str | None] | None = None
+        # Incremental syncs usually stop on the first page, so don't read ahead for them
+        async for items in self.client.get_address_logs(address, prefetch=cursor_block < 0):
+            # The cursor block itself is re-read: the primary key makes those inserts no-ops.
+            fresh_items = [item for item in items if int(item.get('block_number') or 0) >= cursor_block]
+            if newest is None and fresh_items:
+                newest = (int(fresh_items[0]['block_number']), fresh_items[0].get('block_hash'))
+            decoded = []
+            for item in fresh_items:
+                event = self.decoder.decode(item)
+                if event is None:
+                    skipped += 1
+                else:
+                    decoded.append(event)
+            new_rows += self.store.insert_events(self.chain, decoded)
+            if len(fresh_items) < len(items):
+                break  # reached logs that were indexed by a previous run
+
+        if newest is not None and newest[0] >= cursor_block:
+            self.store.set_cursor(self.chain, address, *newest)
+        logger.info(f"Indexed {address} on {self.chain} from block {max(cursor_block, 0)}: "
+                    f"{new_rows} new events, {skipped} unrecognized logs")
+        return new_rows
+
+    async def index_contract(self, address: str) -> int:
+        """Indexes every log of one contract. Returns the number of newly stored events."""
+        return await self._fetch_since(address, -1)
+
+    async def index_contracts(self, addresses: list[str]) -> int:
+        results = await asyncio.gather(*(self.index_contract(address) for address in addresses))
+        return sum(results)
+
+    async def _canonical_block_hash(self, block_number: int) -> str | None:
+        """The explorer's hash for a block, or None when it has no such block (yet)."""
+        try:
+            block = await self.client.get(f'/blocks/{block_number}')
+        except httpx.HTTPStatusError as e:
+            # The chain reorganized to a shorter one, or the explorer lags behind the indexed
+            # block: either way the stored hash can't be confirmed, so it counts as a mismatch.
+            if e.response.status_code == 404:
+                return None
+            raise
+        return block.get('hash')
+
+    async def check_reorg(self, address: str, reorg_depth: int = DEFAULT_REORG_DEPTH) -> int:
+        """
+        Compares the hash of the contract's cursor block with the explorer's canonical block.
+        On a mismatch, walks back through the newest indexed blocks to the common ancestor and
+        rolls back only the rows above it. Returns the number of rolled back rows.
+        """
+        cursor = self.store.get_cursor(self.chain, address)
+        if cursor is None or cursor[1] is None:
+            return 0
+        last_block, last_block_hash = cursor
+        if (await self._canonical_block_hash(last_block)) == last_block_hash:
+            return 0
+
+        logger.warning(f"Reorg detected on {self.chain}: block {last_block} hash changed, looking for common ancestor")
+        ancestor = -1
+        for block_number, block_hash in self.store.recent_blocks(self.chain, reorg_depth):
+            if block_number == last_block:
+                continue
+            if (await self._canonical_block_hash(block_number)) == block_hash:
+                ancestor = block_number
+                break
+        if ancestor < 0:
+            logger.warning(f"No common ancestor within {reorg_depth} indexed blocks on {self.chain}, resyncing the chain")
+        deleted = self.store.rollback(self.chain, ancestor)
+        logger.warning(f"Rolled back {deleted} events above block {ancestor} on {self.chain}")
+        return deleted
+
+    async def sync_contract(self, address: str) -> int:
+        """
+        Incrementally indexes one contract: after a reorg check of the cursor block, only
+        pages newer than the persisted cursor are fetched. Returns the number of new rows.
+        """
+        await self.check_reorg(address)
+        cursor = self.store.get_cursor(self.chain, address)
+        return await self._fetch_since(address, cursor[0] if cursor else -1)
+
+    async def sync_contracts(self, addresses: list[str], concurrency: int = DEFAULT_SYNC_CONCURRENCY) -> int:
+        """
+        Syncs several contracts. Reorg checks roll back the whole chain, so they all run first, one
+        after another; the log fetches then run in parallel, at most `concurrency` at a time.
+        """
+        for address in addresses:
+            await self.check_reorg(address)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(address: str) -> int:
+            async with semaphore:
+                cursor = self.store.get_cursor(self.chain, address)
+                return await self._fetch_since(address, cursor[0] if cursor else -1)
+
+        return sum(await asyncio.gather(*(fetch(address) for address in addresses)))
+
+
+def _print_events(events: list[DecodedEvent]) -> None:
+    if not events:
+        print("No matching events in the local index.")
+    for e in events:
+        print(f"[block {e.block_number}] {e.contract}.{e.event} tx={e.transaction_hash} args={json.dumps(e.args)}")
+
+
+def _print_states(states: list[dict]) -> None:
+    if not states:
+        print("No matching entries in the local index.")
+    for state in states:
+        print(json.dumps(state))
+
+
+async def main():
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    parser = argparse.ArgumentParser(description="Index and query P2P contract events locally.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the SQLite index.")
+    parser.add_argument("--chain", help="Chain label stored with the rows (defaults to the Blockscout host).")
+    parser.add_argument("--network", help="Network from networks.json to index (Blockscout URL and contract addresses).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Fetch and index all logs of the P2P contracts.")
+    sync_parser = subparsers.add_parser("sync", help="Fetch only logs newer than the stored cursors (with reorg checks).")
+    sync_parser.add_argument("--poll", type=float, help="Keep syncing every POLL seconds.")
+    for contract_parser in (index_parser, sync_parser):
+        contract_parser.add_argument("--user_registry_address", default=os.getenv("USER_REGISTRY_ADDRESS"))
+        contract_parser.add_argument("--reputation_address", default=os.getenv("REPUTATION_ADDRESS"))
+        contract_parser.add_argument("--p2p_lending_address", default=os.getenv("P2P_LENDING_ADDRESS"))
+
+    for name, help_text in (("reputation", "Latest reputation score of a user."),
+                            ("defaults", "Defaulted agreements of a borrower.")):
+        query_parser = subparsers.add_parser(name, help=help_text)
+        query_parser.add_argument("address")
+    agreements_parser = subparsers.add_parser("agreements", help="Current state of the address's agreements.")
+    agreements_parser.add_argument("address")
+    agreements_parser.add_argument("--role", choices=["borrower", "lender"], default="borrower")
+    agreements_parser.add_argument("--status", help="LoanStatus name, 'open' or 'closed'.")
+    agreement_parser = subparsers.add_parser("agreement", help="Full event history of an agreement.")
+    agreement_parser.add_argument("agreement_id")
+    vouches_parser = subparsers.add_parser("vouches", help="Active vouch stakes given (or received) by an address.")
+    vouches_parser.add_argument("address")
+    vouches_parser.add_argument("--role", choices=["voucher", "borrower"], default="voucher")
+    modifications_parser = subparsers.add_parser("modifications", help="Outstanding payment-modification requests.")
+    modifications_parser.add_argument("address", nargs="?")
+    subparsers.add_parser("rebuild-views", help="Recompute the materialized state from the stored events.")
+
+    args = parser.parse_args()
+
+    blockscout_api_url = os.getenv("BLOCKSCOUT_API_URL")
+    network = load_networks().get(args.network) if args.network else None
+    if network:
+        blockscout_api_url = network.blockscout_api_url
+    if not blockscout_api_url and (args.command in ("index", "sync") or not args.chain):
+        print("Error: BLOCKSCOUT_API_URL not set (needed to index, or to derive --chain).")
+        return
+    chain = args.chain or default_chain_label(blockscout_api_url)
+    store = IndexStore(args.db)
+
+    try:
+        if args.command in ("index", "sync"):
+            if network:
+                addresses = [network.contracts.get(name) for name in ("UserRegistry", "Reputation", "P2PLending")]
+            else:
+                addresses = [args.user_registry_address, args.reputation_address, args.p2p_lending_address]
+            addresses = [a for a in addresses if a]
+            if not addresses:
+                print("Error: no contract addresses given (use the CLI flags or *_ADDRESS env vars).")
+                return
+            async with BlockscoutClient(blockscout_api_url) as client:
+                indexer = P2PIndexer(client, store, chain)
+                if args.command == "index":
+                    new_rows = await indexer.index_contracts(addresses)
+                    print(f"Indexed {new_rows} new events into {args.db} (chain: {chain})")
+                else:
+                    while True:
+                        try:
+                            new_rows = await indexer.sync_contracts(addresses)
+                            print(f"Synced {new_rows} new events into {args.db} (chain: {chain})")
+                        except httpx.HTTPError as e:
+                            if not args.poll:
+                                raise
+                            # A long-running sync outlives explorer hiccups: try again next round
+                            logger.error(f"Sync failed, retrying in {args.poll}s: {e!r}")
+                        if not args.poll:
+                            break
+                        await asyncio.sleep(args.poll)
+        elif args.command == "reputation":
+            state = store.reputation(chain, args.address)
+            if state:
+                print(f"Reputation score of {args.address}: {state['score']} "
+                      f"(block {state['block_number']}: {state['reason']})")
+            else:
+                print(f"Reputation score of {args.address}: not found")
+        elif args.command == "defaults":
+            _print_events(store.defaults_for_borrower(chain, args.address))
+        elif args.command == "agreements":
+            _print_states(store.agreements_for(chain, args.address, role=args.role, status=args.status))
+        elif args.command == "agreement":
+            _print_events(store.agreement_history(chain, args.agreement_id))
+        elif args.command == "vouches":
+            _print_states(store.vouches_for(chain, args.address, role=args.role))
+        elif args.command == "modifications":
+            _print_states(store.pending_modifications(chain, args.address))
+        elif args.command == "rebuild-views":
+            store.rebuild_views(chain)
+            print(f"Rebuilt the materialized views of {chain} in {args.db}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
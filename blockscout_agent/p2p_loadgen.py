@@ -0,0 +1,382 @@
+"""
+Synthetic P2P lending activity on a local anvil node, to benchmark the log pipelines and analyzers
+offline against realistic volume instead of a couple of hand-funded testnet addresses.
+
+    anvil &
+    python p2p_loadgen.py --users 2000 --out loadgen.json
+    python p2p_loadgen.py --contracts loadgen.json --users 500 --mix repay=0.5,default=0.5   # reuse a deployment
+
+The contracts (plus a mintable loan token) are deployed with script/DeployLocal.s.sol, then every
+simulated user is driven through the lifecycle, one phase per round of blocks:
+
+    register + mint + approvals -> vouches, loan offers / requests -> accept / fund
+    -> on-time repayments, partial payments, modification requests -> lender responses
+    -> agreed partial payments -> (time jump past every due date) -> defaults (vouch slashing)
+    and late repayments
+
+Each agreement gets one outcome drawn from --mix: repay, partial (half now, the rest late),
+extension (due date extension request, approved or rejected), partial_agreement (partial payment
+agreement, then the rest late), default, or open (left running). Users are anvil-impersonated
+accounts and automine is off while a phase is sent, so thousands of transactions go out in
+JSON-RPC batches and are mined into a few blocks. The summary (addresses, sample users and
+agreement IDs per outcome, event counts) is written to --out for the benchmarks.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from eth_abi import encode as abi_encode
+from eth_hash.auto import keccak
+
+from p2p_events import MODIFICATION_TYPE_NAMES, REPO_ROOT, EventDecoder
+from p2p_state_reader import JsonRpcClient
+from p2p_watcher import rpc_log_to_item
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPC_URL = "http://127.0.0.1:8545"
+DEPLOY_SCRIPT = "script/DeployLocal.s.sol"
+DEFAULT_MIX = "repay=0.4,partial=0.15,extension=0.1,partial_agreement=0.1,default=0.2,open=0.05"
+OUTCOMES = ("repay", "partial", "extension", "partial_agreement", "default", "open")
+TOKEN_UNIT = 10 ** 18
+MINT_PER_USER = 10 ** 7 * TOKEN_UNIT
+MAX_UINT256 = 2 ** 256 - 1
+DAY = 86400
+BLOCK_GAS_LIMIT = 10 ** 10  # lets a whole batch land in one block with automine off
+MAX_BLOCKS_PER_PHASE = 100
+
+# State-changing functions of src/UserRegistry.sol, src/Reputation.sol, src/P2PLending.sol and
+# test/mocks/MockERC20.sol (enums are ABI-encoded as uint8)
+WRITE_FUNCTIONS = {
+    "registerUser": ("string",),
+    "addVouch": ("address", "uint256", "address"),
+    "createLoanOffer": ("uint256", "address", "uint16", "uint256", "uint256", "address"),
+    "createLoanRequest": ("uint256", "address", "uint16", "uint256", "uint256", "address"),
+    "acceptLoanOffer": ("bytes32", "uint256", "address"),
+    "fundLoanRequest": ("bytes32",),
+    "repayLoan": ("bytes32", "uint256"),
+    "requestPaymentModification": ("bytes32", "uint8", "uint256"),
+    "respondToPaymentModification": ("bytes32", "bool"),
+    "handleP2PDefault": ("bytes32",),
+    "approve": ("address", "uint256"),
+    "mint": ("address", "uint256"),
+}
+# Explicit gas limits: with automine off, estimates would run against the last block and miss
+# the approvals/offers sent earlier in the same phase. handleP2PDefault loops over the vouches.
+GAS_LIMITS = {"handleP2PDefault": 3_000_000}
+DEFAULT_GAS_LIMIT = 1_000_000
+
+
+def encode_tx(function: str, *args) -> str:
+    arg_types = WRITE_FUNCTIONS[function]
+    selector = keccak(f"{function}({','.join(arg_types)})".encode())[:4]
+    args = tuple(bytes.fromhex(arg[2:]) if arg_type == "bytes32" else arg for arg, arg_type in zip(args, arg_types))
+    return "0x" + (selector + abi_encode(list(arg_types), list(args))).hex()
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """'repay=0.5,default=0.5' -> outcome weights (outcomes not listed get 0)."""
+    weights = {}
+    for entry in filter(None, (part.strip() for part in mix.split(","))):
+        name, _, weight = entry.partition("=")
+        if name not in OUTCOMES:
+            raise ValueError(f"Unknown outcome {name!r} in --mix (known: {', '.join(OUTCOMES)})")
+        weights[name] = float(weight)
+    if sum(weights.values()) <= 0:
+        raise ValueError("--mix needs at least one positive weight")
+    return weights
+
+
+def total_due(principal: int, rate_bps: int) -> int:
+    """P2PLending._calculateTotalDue: principal plus flat interest."""
+    return principal + principal * rate_bps // 10000
+
+
+def simulated_user(seed: int, index: int) -> str:
+    return "0x" + keccak(f"p2p-loadgen:{seed}:{index}".encode())[-20:].hex()
+
+
+@dataclass
+class Tx:
+    sender: str
+    to: str
+    function: str
+    args: tuple
+    tag: object = None  # what the sender of the phase wants back with the receipt
+
+
+@dataclass
+class Loan:
+    lender: str
+    borrower: str
+    principal: int
+    rate_bps: int
+    duration: int
+    outcome: str
+    via_offer: bool
+    approve_modification: bool = True
+    agreement_id: str | None = None
+    due_date: int = 0
+    paid: int = 0
+
+
+@dataclass
+class Deployment:
+    contracts: dict[str, str]
+    deployer: str
+    chain_id: int
+
+
+def deploy(rpc_url: str, chain_id: int) -> Deployment:
+    """Runs script/DeployLocal.s.sol with forge and reads the addresses from its broadcast file."""
+    logger.info(f"Deploying the P2P contracts with forge script {DEPLOY_SCRIPT} to {rpc_url}")
+    subprocess.run(["forge", "script", DEPLOY_SCRIPT, "--rpc-url", rpc_url, "--broadcast"],
+                   cwd=REPO_ROOT, check=True)
+    broadcast = os.path.join(REPO_ROOT, "broadcast", os.path.basename(DEPLOY_SCRIPT), str(chain_id), "run-latest.json")
+    with open(broadcast) as f:
+        transactions = json.load(f)["transactions"]
+    contracts = {tx["contractName"]: tx["contractAddress"] for tx in transactions if tx["transactionType"] == "CREATE"}
+    return Deployment(contracts, transactions[0]["transaction"]["from"], chain_id)
+
+
+class LoadGenerator:
+    """Sends the phases of the simulation through one JSON-RPC connection to anvil."""
+
+    def __init__(self, rpc: JsonRpcClient, deployment: Deployment, rng: random.Random):
+        self.rpc = rpc
+        self.deployment = deployment
+        self.contracts = deployment.contracts
+        self.token = deployment.contracts["MockERC20"]
+        self.rng = rng
+        self.decoder = EventDecoder.for_p2p_contracts()
+        self.events: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.transactions = 0
+
+    async def prepare_chain(self, users: list[str]) -> None:
+        await self.rpc.request("anvil_autoImpersonateAccount", [True])
+        await self.rpc.request("evm_setBlockGasLimit", [hex(BLOCK_GAS_LIMIT)])
+        await self.rpc.batch([("anvil_setBalance", [user, hex(1000 * TOKEN_UNIT)]) for user in users])
+        await self.rpc.request("evm_setAutomine", [False])
+
+    async def restore_chain(self) -> None:
+        await self.rpc.request("evm_setAutomine", [True])
+        await self.rpc.request("anvil_autoImpersonateAccount", [False])
+
+    async def advance_time(self, seconds: int) -> None:
+        await self.rpc.request("evm_increaseTime", [hex(seconds)])
+        await self.rpc.request("evm_mine", [])
+
+    async def run_phase(self, name: str, txs: list[Tx]) -> list[tuple[Tx, list]]:
+        """
+        Sends the transactions as JSON-RPC batches, mines until the pool is empty and returns each
+        successful transaction with its decoded events. Failed transactions are counted per function.
+        """
+        started = time.monotonic()
+        hashes = await self.rpc.batch([
+            ("eth_sendTransaction", [{"from": tx.sender, "to": tx.to, "data": encode_tx(tx.function, *tx.args),
+                                      "gas": hex(GAS_LIMITS.get(tx.function, DEFAULT_GAS_LIMIT))}])
+            for tx in txs
+        ])
+        blocks = 0
+        while blocks < MAX_BLOCKS_PER_PHASE:
+            await self.rpc.request("evm_mine", [])
+            blocks += 1
+            if int((await self.rpc.request("txpool_status", []))["pending"], 16) == 0:
+                break
+        else:
+            logger.warning(f"{name}: transactions still pending after {blocks} blocks")
+        receipts = await self.rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes
+                                         if isinstance(tx_hash, str)])
+        receipts_iter = iter(receipts)
+        results = []
+        for tx, tx_hash in zip(txs, hashes):
+            receipt = next(receipts_iter) if isinstance(tx_hash, str) else None
+            if not isinstance(receipt, dict) or receipt.get("status") != "0x1":
+                self.failures[tx.function] += 1
+                continue
+            events = [event for event in (self.decoder.decode(rpc_log_to_item(log)) for log in receipt["logs"]) if event]
+            self.events.update(event.event for event in events)
+            results.append((tx, events))
+        self.transactions += len(txs)
+        failed = len(txs) - len(results)
+        logger.info(f"{name}: {len(txs)} transactions in {blocks} blocks, {time.monotonic() - started:.1f}s"
+                    + (f", {failed} failed" if failed else ""))
+        return results
+
+    def plan(self, users: list[str], agreements: int, mix: dict[str, float], vouch_rate: float) -> tuple[list[Loan], list[tuple[str, str, int]]]:
+        outcomes, weights = zip(*mix.items())
+        loans = []
+        for _ in range(agreements):
+            lender, borrower = self.rng.sample(users, 2)
+            loans.append(Loan(
+                lender=lender,
+                borrower=borrower,
+                principal=self.rng.randint(100, 10_000) * TOKEN_UNIT,
+                rate_bps=self.rng.choice((0, 250, 500, 800, 1000, 1500, 2000)),
+                duration=self.rng.randint(1, 30) * DAY,
+                outcome=self.rng.choices(outcomes, weights)[0],
+                via_offer=self.rng.random() < 0.5,
+                approve_modification=self.rng.random() < 0.8,
+            ))
+        vouches = []
+        for borrower in sorted({loan.borrower for loan in loans}):
+            if self.rng.random() < vouch_rate:
+                voucher = self.rng.choice([user for user in self.rng.sample(users, 3) if user != borrower])
+                vouches.append((voucher, borrower, self.rng.randint(10, 1000) * TOKEN_UNIT))
+        return loans, vouches
+
+    async def run(self, users: list[str], loans: list[Loan], vouches: list[tuple[str, str, int]]) -> None:
+        lending, reputation, registry = self.contracts["P2PLending"], self.contracts["Reputation"], self.contracts["UserRegistry"]
+        deployer = self.deployment.deployer
+
+        setup = [Tx(deployer, self.token, "mint", (user, MINT_PER_USER)) for user in users]
+        for index, user in enumerate(users):
+            setup += [Tx(user, registry, "registerUser", (f"loadgen-{index}",)),
+                      Tx(user, self.token, "approve", (lending, MAX_UINT256)),
+                      Tx(user, self.token, "approve", (reputation, MAX_UINT256))]
+        await self.run_phase("register, mint, approve", setup)
+
+        market = [Tx(voucher, reputation, "addVouch", (borrower, amount, self.token)) for voucher, borrower, amount in vouches]
+        for loan in loans:
+            if loan.via_offer:
+                market.append(Tx(loan.lender, lending, "createLoanOffer",
+                                 (loan.principal, self.token, loan.rate_bps, loan.duration, 0, "0x" + "00" * 20), loan))
+            else:
+                market.append(Tx(loan.borrower, lending, "createLoanRequest",
+                                 (loan.principal, self.token, loan.rate_bps, loan.duration, 0, "0x" + "00" * 20), loan))
+        matches = []
+        for tx, events in await self.run_phase("vouches, offers, requests", market):
+            for event in events:
+                if event.event == "LoanOfferCreated":
+                    matches.append(Tx(tx.tag.borrower, lending, "acceptLoanOffer", (event.args["offerId"], 0, "0x" + "00" * 20), tx.tag))
+                elif event.event == "LoanRequestCreated":
+                    matches.append(Tx(tx.tag.lender, lending, "fundLoanRequest", (event.args["requestId"],), tx.tag))
+        for tx, events in await self.run_phase("accept offers, fund requests", matches):
+            for event in events:
+                if event.event == "LoanAgreementCreated":
+                    tx.tag.agreement_id = event.args["agreementId"]
+                    tx.tag.due_date = event.args["dueDate"]
+        live = [loan for loan in loans if loan.agreement_id]
+
+        early = []
+        for loan in live:
+            due = total_due(loan.principal, loan.rate_bps)
+            if loan.outcome == "repay":
+                early.append(Tx(loan.borrower, lending, "repayLoan", (loan.agreement_id, due), loan))
+            elif loan.outcome == "partial":
+                early.append(Tx(loan.borrower, lending, "repayLoan", (loan.agreement_id, due // 2), loan))
+            elif loan.outcome == "extension":
+                new_due_date = loan.due_date + self.rng.randint(31, 60) * DAY  # past the time jump below
+                early.append(Tx(loan.borrower, lending, "requestPaymentModification",
+                                (loan.agreement_id, MODIFICATION_TYPE_NAMES.index("DueDateExtension"), new_due_date), loan))
+            elif loan.outcome == "partial_agreement":
+                early.append(Tx(loan.borrower, lending, "requestPaymentModification",
+                                (loan.agreement_id, MODIFICATION_TYPE_NAMES.index("PartialPaymentAgreement"), due // 3), loan))
+        responses = []
+        for tx, _ in await self.run_phase("repayments, modification requests", early):
+            if tx.function == "repayLoan":
+                tx.tag.paid += tx.args[1]
+            else:
+                responses.append(Tx(tx.tag.lender, lending, "respondToPaymentModification",
+                                    (tx.tag.agreement_id, tx.tag.approve_modification), tx.tag))
+        agreed = []
+        for tx, _ in await self.run_phase("modification responses", responses):
+            loan = tx.tag
+            if loan.outcome == "partial_agreement" and loan.approve_modification:
+                agreed.append(Tx(loan.borrower, lending, "repayLoan",
+                                 (loan.agreement_id, total_due(loan.principal, loan.rate_bps) // 3), loan))
+        for tx, _ in await self.run_phase("agreed partial payments", agreed):
+            tx.tag.paid += tx.args[1]
+
+        await self.advance_time(max((loan.duration for loan in live), default=0) + DAY)
+        late = []
+        for loan in live:
+            remaining = total_due(loan.principal, loan.rate_bps) - loan.paid
+            if loan.outcome == "default":
+                late.append(Tx(deployer, lending, "handleP2PDefault", (loan.agreement_id,), loan))
+            elif loan.outcome in ("partial", "extension", "partial_agreement") and remaining > 0:
+                late.append(Tx(loan.borrower, lending, "repayLoan", (loan.agreement_id, remaining), loan))
+        for tx, _ in await self.run_phase("defaults, late repayments", late):
+            if tx.function == "repayLoan":
+                tx.tag.paid += tx.args[1]
+
+
+async def main():
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    parser = argparse.ArgumentParser(description="Generate synthetic P2P lending activity on a local anvil node.")
+    parser.add_argument("--rpc-url", default=DEFAULT_RPC_URL, help="anvil JSON-RPC endpoint.")
+    parser.add_argument("--contracts", help="Output of a previous run to reuse its deployment instead of deploying.")
+    parser.add_argument("--users", type=int, default=1000, help="Number of simulated users.")
+    parser.add_argument("--agreements", type=int, help="Number of loan agreements (default: 2 per user).")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Outcome weights (default: {DEFAULT_MIX}).")
+    parser.add_argument("--vouch-rate", type=float, default=0.3, help="Share of borrowers that get a vouch.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the users and the random plan.")
+    parser.add_argument("--out", default="loadgen.json", help="Where to write the deployment and run summary.")
+    args = parser.parse_args()
+
+    if args.users < 3:
+        print("Error: --users must be at least 3.")
+        return
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    users = [simulated_user(args.seed, index) for index in range(args.users)]
+
+    async with JsonRpcClient(args.rpc_url) as rpc:
+        chain_id = int(await rpc.request("eth_chainId", []), 16)
+        if args.contracts:
+            with open(args.contracts) as f:
+                previous = json.load(f)
+            deployment = Deployment(previous["contracts"], previous["deployer"], chain_id)
+        else:
+            deployment = deploy(args.rpc_url, chain_id)
+        logger.info(f"Contracts: {deployment.contracts}")
+
+        generator = LoadGenerator(rpc, deployment, rng)
+        loans, vouches = generator.plan(users, args.agreements or 2 * args.users, mix, args.vouch_rate)
+        started = time.monotonic()
+        await generator.prepare_chain(users)
+        try:
+            await generator.run(users, loans, vouches)
+        finally:
+            await generator.restore_chain()
+        elapsed = time.monotonic() - started
+
+    by_outcome = {}
+    for outcome in OUTCOMES:
+        ids = [loan.agreement_id for loan in loans if loan.outcome == outcome and loan.agreement_id]
+        by_outcome[outcome] = {"agreements": len(ids), "sample_agreement_ids": ids[:5]}
+    summary = {
+        "rpc_url": args.rpc_url,
+        "chain_id": chain_id,
+        "contracts": deployment.contracts,
+        "deployer": deployment.deployer,
+        "seed": args.seed,
+        "users": len(users),
+        "sample_users": users[:5],
+        "vouches": len(vouches),
+        "outcomes": by_outcome,
+        "events": dict(generator.events.most_common()),
+        "failed_transactions": dict(generator.failures),
+        "transactions": generator.transactions,
+        "elapsed_seconds": round(elapsed, 1),
+    }
+    with open(args.out, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"{generator.transactions} transactions, {sum(generator.events.values())} P2P events in {elapsed:.0f}s "
+          f"({generator.transactions / max(elapsed, 1e-9):.0f} tx/s); summary in {args.out}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+"""
+Columnar P2P loan portfolio analytics: every LoanAgreement is loaded into NumPy arrays (principal,
+rate, start, duration, due date, amount paid, status) and the risk figures are computed for all
+agreements at once, mirroring `_calculateInterest` / `_calculateTotalDue` and the preconditions of
+`handleP2PDefault` in src/P2PLending.sol.
+
+    python p2p_portfolio.py report --network flow-evm-testnet      # from the local event index
+    portfolio = Portfolio.from_index(store, chain)                 # or Portfolio.from_records(reader rows)
+    portfolio.default_candidates()
+
+Amounts are exact integers like on chain: int64 arrays when `principal * max rate` fits, otherwise
+object arrays of Python ints (same expressions, slower), so 18-decimal tokens are never rounded.
+Totals are summed in int64 only when the column cannot overflow it, and are always per loan token:
+raw amounts of different ERC-20s (6 vs 18 decimals, different prices) are never added together.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from networks import load_networks
+from p2p_events import LOAN_STATUS_NAMES, enum_name
+from p2p_indexer import CLOSED_STATUSES, DEFAULT_DB_PATH, IndexStore, default_chain_label
+
+BASIS_POINTS = 10000  # P2PLending.BASIS_POINTS
+MAX_RATE_BPS = 2 ** 16 - 1  # interestRateBPS is a uint16
+SECONDS_PER_DAY = 86400
+
+ACTIVE = LOAN_STATUS_NAMES.index("Active")
+CLOSED_STATUS_CODES = np.array(sorted(LOAN_STATUS_NAMES.index(name) for name in CLOSED_STATUSES), dtype=np.uint8)
+
+
+def _amount_columns(*columns: list[int]) -> list[np.ndarray]:
+    """int64 arrays if no amount times a rate can overflow, else (all) exact Python-int arrays."""
+    largest = max((abs(v) for column in columns for v in column), default=0)
+    if largest * MAX_RATE_BPS < 2 ** 63:
+        return [np.array(column, dtype=np.int64) for column in columns]
+    arrays = []
+    for column in columns:
+        array = np.empty(len(column), dtype=object)
+        array[:] = column
+        arrays.append(array)
+    return arrays
+
+
+def _exact(values: np.ndarray) -> np.ndarray:
+    """`values` for sums: as is when its total fits in int64, else as Python ints."""
+    if values.dtype == object or not len(values):
+        return values
+    if int(np.abs(values).max()) * len(values) < 2 ** 63:
+        return values
+    return values.astype(object)
+
+
+def _status_code(status) -> int:
+    return status if isinstance(status, int) else LOAN_STATUS_NAMES.index(status)
+
+
+class Portfolio:
+    """One row per agreement; all columns are arrays of the same length."""
+
+    def __init__(self, agreement_ids: list[str], lenders: list[str], borrowers: list[str], tokens: list[str | None],
+                 principal: list[int], interest_rate_bps: list[int], start_time: list[int], duration: list[int],
+                 due_date: list[int], amount_paid: list[int], status: list[int | str]):
+        self.agreement_ids = np.array(agreement_ids, dtype=object)
+        self.lenders = np.array([lender.lower() for lender in lenders], dtype=object)
+        self.borrowers = np.array([borrower.lower() for borrower in borrowers], dtype=object)
+        self.tokens = np.array([(token or "").lower() for token in tokens], dtype=object)
+        self.principal, self.amount_paid = _amount_columns(principal, amount_paid)
+        self.interest_rate_bps = np.array(interest_rate_bps, dtype=np.int64)
+        self.start_time = np.array(start_time, dtype=np.int64)
+        self.duration = np.array(duration, dtype=np.int64)
+        self.due_date = np.array(due_date, dtype=np.int64)
+        self.status = np.array([_status_code(s) for s in status], dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.agreement_ids)
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "Portfolio":
+        """From LoanAgreement structs as returned by p2p_state_reader (camelCase field names)."""
+        columns = {key: [] for key in ("id", "lender", "borrower", "loanToken", "principalAmount", "interestRateBPS",
+                                       "startTime", "durationSeconds", "dueDate", "amountPaid", "status")}
+        for record in records:
+            if record is None:
+                continue
+            for key, column in columns.items():
+                column.append(record[key])
+        return cls(columns["id"], columns["lender"], columns["borrower"], columns["loanToken"], columns["principalAmount"],
+                   columns["interestRateBPS"], columns["startTime"], columns["durationSeconds"],
+                   columns["dueDate"], columns["amountPaid"], columns["status"])
+
+    @classmethod
+    def from_index(cls, store: IndexStore, chain: str) -> "Portfolio":
+        """
+        From the local event index: the materialized agreement state (amount paid, status, due date)
+        joined with the terms of each agreement's LoanAgreementCreated event.
+        """
+        rows = store.conn.execute(
+            """SELECT a.agreement_id, a.lender, a.borrower, a.token, a.principal, a.amount_paid, a.status, a.due_date, e.args
+               FROM agreements a JOIN events e
+                 ON e.chain = a.chain AND e.agreement_id = a.agreement_id AND e.event = 'LoanAgreementCreated'
+               WHERE a.chain = ?""",
+            (chain,),
+        ).fetchall()
+        terms = [json.loads(row["args"]) for row in rows]
+        return cls(
+            [row["agreement_id"] for row in rows],
+            [row["lender"] for row in rows],
+            [row["borrower"] for row in rows],
+            [row["token"] or t.get("token") for row, t in zip(rows, terms)],
+            [int(row["principal"]) for row in rows],
+            [int(t["interestRateBPS"]) for t in terms],
+            [int(t["startTime"]) for t in terms],
+            [int(t["durationSeconds"]) for t in terms],
+            [int(row["due_date"] if row["due_date"] is not None else t["dueDate"]) for row, t in zip(rows, terms)],
+            [int(row["amount_paid"]) for row in rows],
+            [row["status"] for row in rows],
+        )
+
+    # --- Per-agreement columns ---
+
+    def interest(self) -> np.ndarray:
+        """_calculateInterest: flat simple interest, principal * rate / BASIS_POINTS (rounded down)."""
+        return self.principal * self.interest_rate_bps // BASIS_POINTS
+
+    def total_due(self) -> np.ndarray:
+        """_calculateTotalDue: principal + interest."""
+        return self.principal + self.interest()
+
+    def remaining(self) -> np.ndarray:
+        """Amount still owed (never negative)."""
+        remaining = self.total_due() - self.amount_paid
+        return np.where(remaining > 0, remaining, 0)
+
+    def is_open(self) -> np.ndarray:
+        return ~np.isin(self.status, CLOSED_STATUS_CODES)
+
+    def seconds_overdue(self, now: float | None = None) -> np.ndarray:
+        now = int(now if now is not None else time.time())
+        late = now - self.due_date
+        return np.where(self.is_open() & (late > 0), late, 0)
+
+    def days_overdue(self, now: float | None = None) -> np.ndarray:
+        return self.seconds_overdue(now) // SECONDS_PER_DAY
+
+    def default_mask(self, now: float | None = None) -> np.ndarray:
+        """The checks of handleP2PDefault: status Active, block.timestamp > dueDate and not fully paid."""
+        now = int(now if now is not None else time.time())
+        return (self.status == ACTIVE) & (now > self.due_date) & (self.amount_paid < self.total_due())
+
+    # --- Reports ---
+
+    def default_candidates(self, now: float | None = None) -> list[dict]:
+        """Agreements handleP2PDefault would accept now, most overdue first."""
+        mask = self.default_mask(now)
+        days = self.days_overdue(now)
+        remaining = self.remaining()
+        order = np.flatnonzero(mask)[np.argsort(-days[mask], kind="stable")]
+        return [{"agreement_id": self.agreement_ids[i], "lender": self.lenders[i], "borrower": self.borrowers[i],
+                 "token": self.tokens[i], "remaining": int(remaining[i]), "days_overdue": int(days[i])} for i in order]
+
+    def lender_exposure(self, now: float | None = None) -> list[dict]:
+        """
+        Per lender and loan token: open agreements, amount outstanding and the part of it that is
+        overdue, largest exposure first. One sort and one reduceat per column.
+        """
+        open_mask = self.is_open()
+        if not open_mask.any():
+            return []
+        lenders, tokens = self.lenders[open_mask], self.tokens[open_mask]
+        order = np.lexsort((tokens, lenders))
+        lenders, tokens = lenders[order], tokens[order]
+        starts = np.flatnonzero(np.r_[True, (lenders[1:] != lenders[:-1]) | (tokens[1:] != tokens[:-1])])
+        remaining = _exact(self.remaining()[open_mask][order])
+        overdue = np.where(self.seconds_overdue(now)[open_mask][order] > 0, remaining, 0)
+        outstanding = np.add.reduceat(remaining, starts)
+        overdue_outstanding = np.add.reduceat(overdue, starts)
+        counts = np.diff(np.r_[starts, len(order)])
+        rows = [{"lender": lenders[start], "token": tokens[start], "open_agreements": int(count),
+                 "outstanding": int(total), "overdue_outstanding": int(late)}
+                for start, count, total, late in zip(starts, counts, outstanding, overdue_outstanding)]
+        return sorted(rows, key=lambda row: row["outstanding"], reverse=True)
+
+    def summary(self, now: float | None = None) -> dict:
+        """Agreement counts, and the open/outstanding/overdue amounts per loan token."""
+        open_mask = self.is_open()
+        remaining = _exact(self.remaining())
+        principal = _exact(self.principal)
+        overdue = self.seconds_overdue(now) > 0
+        statuses, counts = np.unique(self.status, return_counts=True)
+        by_token = {}
+        for token in np.unique(self.tokens[open_mask]):
+            in_token = self.tokens == token
+            by_token[token] = {
+                "open_agreements": int((open_mask & in_token).sum()),
+                "principal_open": int(principal[open_mask & in_token].sum()),
+                "outstanding": int(remaining[open_mask & in_token].sum()),
+                "overdue_outstanding": int(remaining[overdue & in_token].sum()),
+            }
+        return {
+            "agreements": len(self),
+            "by_status": {enum_name(LOAN_STATUS_NAMES, int(s)): int(c) for s, c in zip(statuses, counts)},
+            "overdue_agreements": int(overdue.sum()),
+            "default_candidates": int(self.default_mask(now).sum()),
+            "by_token": by_token,
+        }
+
+
+def main():
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    parser = argparse.ArgumentParser(description="Portfolio risk report over the P2P agreements in the local event index.")
+    parser.add_argument("command", choices=["report", "defaults", "exposure"])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the SQLite index.")
+    parser.add_argument("--chain", help="Chain label of the rows (defaults to the network's Blockscout host).")
+    parser.add_argument("--network", help="Network from networks.json.")
+    parser.add_argument("--now", type=int, help="Unix time to evaluate at (default: now).")
+    parser.add_argument("--top", type=int, default=20, help="Rows of the defaults/exposure lists.")
+    args = parser.parse_args()
+
+    chain = args.chain or default_chain_label(load_networks().get(args.network).blockscout_api_url)
+    store = IndexStore(args.db)
+    try:
+        portfolio = Portfolio.from_index(store, chain)
+    finally:
+        store.close()
+
+    if args.command == "report":
+        print(json.dumps({"chain": chain, **portfolio.summary(args.now)}, indent=2))
+    elif args.command == "defaults":
+        for row in portfolio.default_candidates(args.now)[:args.top]:
+            print(json.dumps(row))
+    else:
+        for row in portfolio.lender_exposure(args.now)[:args.top]:
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
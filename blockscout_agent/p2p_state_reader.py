@@ -0,0 +1,306 @@
+"""
+Reads the current P2PLending state straight from the contract over JSON-RPC, e.g. against a local
+`anvil` node or the network's RPC from networks.json, instead of inferring it from event history.
+
+    python p2p_state_reader.py portfolio 0xBorrower 0xLender --rpc-url http://127.0.0.1:8545 --lending 0x...
+    python p2p_state_reader.py agreement 0xAgreementId --network flow-evm-testnet
+
+A portfolio (agreements as borrower and as lender, offers, requests) takes two rounds of calls for
+any number of users: first the ID lists, then the details of every ID. Each round is sent as one
+Multicall3 `aggregate3` call per chunk when Multicall3 is deployed on the chain, otherwise as a
+JSON-RPC batch of `eth_call`s, and all calls of a round are pinned to the same block. Decoded
+results are cached per block number, so repeated reads at the same block cost nothing.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+from dotenv import load_dotenv
+from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+from eth_hash.auto import keccak
+
+from networks import load_networks
+from p2p_events import LOAN_STATUS_NAMES, MODIFICATION_TYPE_NAMES, enum_name
+
+logger = logging.getLogger(__name__)
+
+# Same address on every chain where it is deployed (https://www.multicall3.com); not on a fresh anvil
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL_CHUNK_SIZE = 200  # calls per aggregate3, well under the eth_call gas cap
+RPC_BATCH_SIZE = 500  # requests per JSON-RPC batch
+DEFAULT_CACHED_BLOCKS = 16
+
+# Struct layouts copied from src/P2PLending.sol (enums are ABI-encoded as uint8)
+LOAN_OFFER_FIELDS = (
+    ("id", "bytes32"), ("lender", "address"), ("amount", "uint256"), ("token", "address"),
+    ("interestRateBPS", "uint16"), ("durationSeconds", "uint256"), ("requiredCollateralAmount", "uint256"),
+    ("collateralToken", "address"), ("isActive", "bool"), ("isFulfilled", "bool"),
+)
+LOAN_REQUEST_FIELDS = (
+    ("id", "bytes32"), ("borrower", "address"), ("amount", "uint256"), ("token", "address"),
+    ("proposedInterestRateBPS", "uint16"), ("proposedDurationSeconds", "uint256"),
+    ("offeredCollateralAmount", "uint256"), ("collateralToken", "address"), ("isActive", "bool"),
+    ("isFulfilled", "bool"),
+)
+LOAN_AGREEMENT_FIELDS = (
+    ("id", "bytes32"), ("originalOfferId", "bytes32"), ("originalRequestId", "bytes32"), ("lender", "address"),
+    ("borrower", "address"), ("principalAmount", "uint256"), ("loanToken", "address"),
+    ("interestRateBPS", "uint16"), ("durationSeconds", "uint256"), ("collateralAmount", "uint256"),
+    ("collateralToken", "address"), ("startTime", "uint256"), ("dueDate", "uint256"), ("amountPaid", "uint256"),
+    ("status", "uint8"), ("requestedModificationType", "uint8"), ("requestedModificationValue", "uint256"),
+    ("modificationApprovedByLender", "bool"),
+)
+
+# View functions of src/P2PLending.sol: name -> (argument types, return type or struct fields)
+VIEW_FUNCTIONS: dict[str, tuple[tuple[str, ...], str | tuple]] = {
+    "getUserLoanAgreementIdsAsBorrower": (("address",), "bytes32[]"),
+    "getUserLoanAgreementIdsAsLender": (("address",), "bytes32[]"),
+    "getUserLoanOfferIds": (("address",), "bytes32[]"),
+    "getUserLoanRequestIds": (("address",), "bytes32[]"),
+    "getLoanAgreementDetails": (("bytes32",), LOAN_AGREEMENT_FIELDS),
+    "getLoanOfferDetails": (("bytes32",), LOAN_OFFER_FIELDS),
+    "getLoanRequestDetails": (("bytes32",), LOAN_REQUEST_FIELDS),
+}
+
+
+class RpcError(Exception):
+    pass
+
+
+def _to_hex(value: Any) -> Any:
+    return "0x" + value.hex() if isinstance(value, bytes) else value
+
+
+def _bytes32(value: str) -> bytes:
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value).rjust(32, b"\0")
+
+
+def encode_call(function: str, args: tuple) -> bytes:
+    arg_types, _ = VIEW_FUNCTIONS[function]
+    selector = keccak(f"{function}({','.join(arg_types)})".encode())[:4]
+    args = tuple(_bytes32(arg) if arg_type == "bytes32" else arg for arg, arg_type in zip(args, arg_types))
+    return selector + abi_encode(list(arg_types), list(args))
+
+
+def decode_result(function: str, data: bytes) -> Any:
+    _, returns = VIEW_FUNCTIONS[function]
+    if isinstance(returns, str):
+        (value,) = abi_decode([returns], data)
+        return [_to_hex(item) for item in value] if isinstance(value, (list, tuple)) else _to_hex(value)
+    # Structs with only static fields are returned inline, as a static tuple
+    (values,) = abi_decode([f"({','.join(field_type for _, field_type in returns)})"], data)
+    record = {name: _to_hex(value) for (name, _), value in zip(returns, values)}
+    if "status" in record:
+        record["status"] = enum_name(LOAN_STATUS_NAMES, record["status"])
+        record["requestedModificationType"] = enum_name(MODIFICATION_TYPE_NAMES, record["requestedModificationType"])
+    return record
+
+
+class JsonRpcClient:
+    """Minimal async JSON-RPC client with batch requests over a pooled HTTP connection."""
+
+    def __init__(self, rpc_url: str, timeout: float = 30.0):
+        self.rpc_url = rpc_url
+        self._http = httpx.AsyncClient(timeout=timeout, headers={"Content-Type": "application/json"})
+        self._next_id = 0
+
+    async def __aenter__(self) -> "JsonRpcClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def request(self, method: str, params: list) -> Any:
+        result = (await self.batch([(method, params)]))[0]
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    async def batch(self, calls: list[tuple[str, list]]) -> list[Any]:
+        """Sends the calls as JSON-RPC batches; returns each result, or an RpcError for failed calls."""
+        results: list[Any] = []
+        for start in range(0, len(calls), RPC_BATCH_SIZE):
+            chunk = calls[start:start + RPC_BATCH_SIZE]
+            payload = []
+            for method, params in chunk:
+                self._next_id += 1
+                payload.append({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params})
+            response = await self._http.post(self.rpc_url, json=payload)
+            response.raise_for_status()
+            body = response.json()
+            if isinstance(body, dict):  # some nodes answer a whole failed batch with a single error
+                raise RpcError(body.get("error", body))
+            by_id = {item.get("id"): item for item in body}
+            for request in payload:
+                item = by_id.get(request["id"], {"error": {"message": "missing response"}})
+                results.append(RpcError(item["error"].get("message", item["error"])) if "error" in item else item["result"])
+        return results
+
+
+class P2PStateReader:
+    """
+    Batched view calls against one P2PLending deployment. `multicall` None detects Multicall3 on
+    first use; False always uses JSON-RPC batches. Results are cached for the last `cached_blocks` blocks.
+    """
+
+    def __init__(self, rpc: JsonRpcClient, lending_address: str, multicall: bool | None = None,
+                 cached_blocks: int = DEFAULT_CACHED_BLOCKS):
+        self.rpc = rpc
+        self.lending_address = lending_address
+        self.multicall = multicall
+        self.cached_blocks = cached_blocks
+        self._cache: OrderedDict[int, dict[tuple, Any]] = OrderedDict()
+        self.round_trips = 0
+
+    async def block_number(self) -> int:
+        self.round_trips += 1
+        return int(await self.rpc.request("eth_blockNumber", []), 16)
+
+    def _block_cache(self, block: int) -> dict[tuple, Any]:
+        if block not in self._cache:
+            self._cache[block] = {}
+            while len(self._cache) > self.cached_blocks:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(block)
+        return self._cache[block]
+
+    async def _use_multicall(self, block_tag: str) -> bool:
+        if self.multicall is None:
+            self.round_trips += 1
+            code = await self.rpc.request("eth_getCode", [MULTICALL3_ADDRESS, block_tag])
+            self.multicall = code not in (None, "0x", "0x0")
+            logger.info(f"Multicall3 {'found' if self.multicall else 'not deployed'} at {self.rpc.rpc_url}")
+        return self.multicall
+
+    async def call_many(self, calls: list[tuple[str, tuple]], block: int) -> list[Any]:
+        """
+        Runs view calls at `block` in one round-trip and returns their decoded results (None for
+        calls that reverted, e.g. details of an unknown ID).
+        """
+        cache = self._block_cache(block)
+        pending = list(dict.fromkeys(call for call in calls if call not in cache))
+        if pending:
+            block_tag = hex(block)
+            encoded = [encode_call(function, args) for function, args in pending]
+            if await self._use_multicall(block_tag):
+                raw = await self._multicall(encoded, block_tag)
+            else:
+                self.round_trips += 1
+                results = await self.rpc.batch([
+                    ("eth_call", [{"to": self.lending_address, "data": "0x" + data.hex()}, block_tag]) for data in encoded
+                ])
+                raw = [None if isinstance(result, RpcError) else bytes.fromhex(result[2:]) for result in results]
+            for (function, args), data in zip(pending, raw):
+                try:
+                    cache[(function, args)] = decode_result(function, data) if data else None
+                except Exception as e:  # empty or malformed return data from a revert
+                    logger.debug(f"Could not decode {function}{args}: {e}")
+                    cache[(function, args)] = None
+        return [cache[call] for call in calls]
+
+    async def _multicall(self, encoded: list[bytes], block_tag: str) -> list[bytes | None]:
+        selector = keccak(b"aggregate3((address,bool,bytes)[])")[:4]
+        requests = []
+        for start in range(0, len(encoded), MULTICALL_CHUNK_SIZE):
+            chunk = [(self.lending_address, True, data) for data in encoded[start:start + MULTICALL_CHUNK_SIZE]]
+            calldata = selector + abi_encode(["(address,bool,bytes)[]"], [chunk])
+            requests.append(("eth_call", [{"to": MULTICALL3_ADDRESS, "data": "0x" + calldata.hex()}, block_tag]))
+        self.round_trips += 1
+        raw: list[bytes | None] = []
+        for result in await self.rpc.batch(requests):
+            if isinstance(result, RpcError):
+                raise result
+            (entries,) = abi_decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))
+            raw.extend(data if success else None for success, data in entries)
+        return raw
+
+    async def portfolios(self, addresses: list[str], block: int | None = None) -> dict:
+        """
+        Agreements (as borrower and lender), offers and requests of every address, read at one block.
+        Two rounds of batched calls (plus one for the block number when `block` is not given).
+        """
+        block = block if block is not None else await self.block_number()
+        addresses = [address.lower() for address in addresses]
+        list_functions = {
+            "agreements_as_borrower": ("getUserLoanAgreementIdsAsBorrower", "getLoanAgreementDetails"),
+            "agreements_as_lender": ("getUserLoanAgreementIdsAsLender", "getLoanAgreementDetails"),
+            "offers": ("getUserLoanOfferIds", "getLoanOfferDetails"),
+            "requests": ("getUserLoanRequestIds", "getLoanRequestDetails"),
+        }
+        id_calls = [(ids_function, (address,)) for address in addresses
+                    for ids_function, _ in list_functions.values()]
+        id_lists = dict(zip(id_calls, await self.call_many(id_calls, block)))
+
+        detail_calls = [(details_function, (item_id,))
+                        for address in addresses
+                        for ids_function, details_function in list_functions.values()
+                        for item_id in id_lists[(ids_function, (address,))] or []]
+        details = dict(zip(detail_calls, await self.call_many(detail_calls, block)))
+
+        result = {"block_number": block, "portfolios": {}}
+        for address in addresses:
+            result["portfolios"][address] = {
+                key: [details[(details_function, (item_id,))]
+                      for item_id in id_lists[(ids_function, (address,))] or []]
+                for key, (ids_function, details_function) in list_functions.items()
+            }
+        return result
+
+    async def portfolio(self, address: str, block: int | None = None) -> dict:
+        result = await self.portfolios([address], block)
+        return {"block_number": result["block_number"], **result["portfolios"][address.lower()]}
+
+    async def agreements(self, agreement_ids: list[str], block: int | None = None) -> dict:
+        block = block if block is not None else await self.block_number()
+        calls = [("getLoanAgreementDetails", (agreement_id.lower(),)) for agreement_id in agreement_ids]
+        return {"block_number": block,
+                "agreements": dict(zip((agreement_id.lower() for agreement_id in agreement_ids),
+                                       await self.call_many(calls, block)))}
+
+
+async def main():
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    parser = argparse.ArgumentParser(description="Read P2PLending state over JSON-RPC with batched view calls.")
+    parser.add_argument("--network", help="Network from networks.json (RPC URL and P2PLending address).")
+    parser.add_argument("--rpc-url", help="JSON-RPC endpoint, e.g. http://127.0.0.1:8545 for anvil (overrides the network's).")
+    parser.add_argument("--lending", help="P2PLending address (overrides the network's).")
+    parser.add_argument("--block", type=int, help="Block number to read at (default: latest).")
+    parser.add_argument("--no-multicall", action="store_true", help="Use JSON-RPC batches even if Multicall3 is deployed.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    portfolio_parser = subparsers.add_parser("portfolio", help="Agreements, offers and requests of one or more addresses.")
+    portfolio_parser.add_argument("addresses", nargs="+")
+    agreement_parser = subparsers.add_parser("agreement", help="Details of one or more loan agreements.")
+    agreement_parser.add_argument("agreement_ids", nargs="+")
+    args = parser.parse_args()
+
+    network = load_networks().get(args.network)
+    rpc_url = args.rpc_url or network.rpc_url
+    lending = args.lending or network.contracts.get("P2PLending")
+    if not rpc_url or not lending:
+        print("Error: no RPC URL or P2PLending address (use --network, or --rpc-url and --lending).")
+        return
+
+    async with JsonRpcClient(rpc_url) as rpc:
+        reader = P2PStateReader(rpc, lending, multicall=False if args.no_multicall else None)
+        if args.command == "portfolio":
+            result = await reader.portfolios(args.addresses, args.block)
+        else:
+            result = await reader.agreements(args.agreement_ids, args.block)
+        print(json.dumps(result, indent=2))
+        logger.info(f"{reader.round_trips} RPC round-trips")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
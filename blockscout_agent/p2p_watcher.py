@@ -0,0 +1,374 @@
+"""
+Long-running watcher that pushes P2P alerts (defaults, vouch slashes, payment-modification requests)
+as soon as their logs are on chain, instead of waiting for someone to ask the agent.
+
+    python p2p_watcher.py --network flow-evm-testnet --sink stdout --sink file:alerts.jsonl
+    python p2p_watcher.py --rpc-url http://127.0.0.1:8545 --lending 0x... --reputation 0x... --sink webhook:https://...
+
+Logs come from an `eth_subscribe("logs")` subscription when a WebSocket RPC URL is available
+(--ws-url or the network's `ws_url`), otherwise from `eth_getLogs` polling of new blocks every
+--poll seconds (default 0.5s, below the block time of the supported chains). Each sink has its own
+bounded queue and delivery task: ingestion only ever does a non-blocking put, and when a slow sink
+(e.g. an unreachable webhook) lets its queue fill up, its oldest pending alerts are dropped and
+counted, so a burst of defaults never stalls the watcher or the other sinks.
+"""
+import abc
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import httpx
+from dotenv import load_dotenv
+
+from networks import NetworkRegistry, load_networks
+from p2p_events import MODIFICATION_TYPE_NAMES, DecodedEvent, EventDecoder, enum_name
+from p2p_indexer import default_chain_label
+from p2p_state_reader import JsonRpcClient, RpcError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALERT_EVENTS = ("LoanAgreementDefaulted", "VouchSlashed", "PaymentModificationRequested")
+DEFAULT_POLL_INTERVAL = 0.5  # seconds
+DEFAULT_QUEUE_SIZE = 1000  # pending alerts per sink
+MAX_BLOCKS_PER_POLL = 1000  # eth_getLogs range cap of most public RPCs
+SEEN_LOGS = 10000  # (tx hash, log index) pairs remembered to drop duplicates after reconnects
+
+
+def rpc_log_to_item(log: dict) -> dict:
+    """Converts an eth_getLogs / eth_subscribe log (hex quantities) to the Blockscout item shape EventDecoder reads."""
+    return {
+        "address": log.get("address"),
+        "topics": log.get("topics"),
+        "data": log.get("data"),
+        "block_number": int(log["blockNumber"], 16) if log.get("blockNumber") else 0,
+        "block_hash": log.get("blockHash"),
+        "transaction_hash": log.get("transactionHash"),
+        "index": int(log["logIndex"], 16) if log.get("logIndex") else 0,
+    }
+
+
+def alert_payload(chain: str, event: DecodedEvent) -> dict:
+    args = dict(event.args)
+    if "modificationType" in args:
+        args["modificationType"] = enum_name(MODIFICATION_TYPE_NAMES, args["modificationType"])
+    return {
+        "chain": chain,
+        "event": event.event,
+        "contract": event.contract,
+        "address": event.address,
+        "block_number": event.block_number,
+        "transaction_hash": event.transaction_hash,
+        "log_index": event.log_index,
+        # uint256 values exceed JSON number precision, so they are strings as in Blockscout's output
+        "args": {name: str(value) if isinstance(value, int) and not isinstance(value, bool) else value
+                 for name, value in args.items()},
+        "observed_at": time.time(),
+    }
+
+
+# --- Sinks ---
+
+class AlertSink(abc.ABC):
+    """Delivers one alert. Implementations may raise; the delivery task logs and moves on."""
+
+    name = "sink"
+
+    @abc.abstractmethod
+    async def send(self, alert: dict) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class StdoutSink(AlertSink):
+    name = "stdout"
+
+    async def send(self, alert: dict) -> None:
+        print(json.dumps(alert), flush=True)
+
+
+class FileSink(AlertSink):
+    """Appends alerts as JSON lines."""
+
+    def __init__(self, path: str):
+        self.name = f"file:{path}"
+        self._file = open(path, "a")
+
+    async def send(self, alert: dict) -> None:
+        self._file.write(json.dumps(alert) + "\n")
+        self._file.flush()
+
+    async def aclose(self) -> None:
+        self._file.close()
+
+
+class WebhookSink(AlertSink):
+    """POSTs each alert as JSON, retrying transient failures."""
+
+    def __init__(self, url: str, retries: int = 3, timeout: float = 10.0):
+        self.name = f"webhook:{url}"
+        self.url = url
+        self.retries = retries
+        self._http = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, alert: dict) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._http.post(self.url, json=alert)
+                if response.status_code < 500 and response.status_code != 429:
+                    response.raise_for_status()
+                    return
+                error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def make_sink(spec: str) -> AlertSink:
+    """'stdout', 'file:PATH' or 'webhook:URL'."""
+    kind, _, target = spec.partition(":")
+    if kind == "stdout":
+        return StdoutSink()
+    if kind == "file" and target:
+        return FileSink(target)
+    if kind == "webhook" and target:
+        return WebhookSink(target)
+    raise ValueError(f"Unknown sink {spec!r} (use stdout, file:PATH or webhook:URL)")
+
+
+class SinkQueue:
+    """A sink behind its own bounded queue, drained by one delivery task (alerts stay in order)."""
+
+    def __init__(self, sink: AlertSink, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.sink = sink
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._deliver(), name=f"alert-sink-{self.sink.name}")
+
+    def offer(self, alert: dict) -> None:
+        """Never blocks: when the queue is full the oldest pending alert makes room."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+            logger.warning(f"Alert queue of {self.sink.name} is full, dropped the oldest alert ({self.dropped} so far)")
+        self.queue.put_nowait(alert)
+
+    async def _deliver(self) -> None:
+        while True:
+            alert = await self.queue.get()
+            try:
+                await self.sink.send(alert)
+                self.delivered += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Could not deliver {alert['event']} alert to {self.sink.name}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def aclose(self, drain_timeout: float = 5.0) -> None:
+        """Gives pending alerts `drain_timeout` seconds to go out, then stops the delivery task."""
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self.queue.qsize()} alerts to {self.sink.name} not delivered on shutdown")
+            self._task.cancel()
+        await self.sink.aclose()
+
+    def stats(self) -> dict:
+        return {"delivered": self.delivered, "failed": self.failed, "dropped": self.dropped,
+                "pending": self.queue.qsize()}
+
+
+# --- Watcher ---
+
+class P2PWatcher:
+    """Decodes the watched events from new logs of the P2P contracts and fans them out to the sinks."""
+
+    def __init__(self, rpc: JsonRpcClient, addresses: list[str], sinks: list[SinkQueue], chain: str,
+                 events: tuple[str, ...] = DEFAULT_ALERT_EVENTS, decoder: EventDecoder | None = None):
+        self.rpc = rpc
+        self.addresses = [address.lower() for address in addresses]
+        self.sinks = sinks
+        self.chain = chain
+        self.decoder = decoder or EventDecoder.for_p2p_contracts()
+        self.topics = [topic0 for topic0, spec in self.decoder.specs_by_topic0.items() if spec.name in events]
+        unknown = set(events) - {spec.name for spec in self.decoder.specs_by_topic0.values()}
+        if unknown:
+            raise ValueError(f"Unknown events: {', '.join(sorted(unknown))}")
+        self.alerts = 0
+        self._seen: OrderedDict[tuple[str, int], None] = OrderedDict()
+
+    def log_filter(self) -> dict:
+        return {"address": self.addresses, "topics": [self.topics]}
+
+    def handle_log(self, log: dict) -> None:
+        """Decodes one RPC log and offers the alert to every sink (non-blocking)."""
+        if log.get("removed"):
+            logger.warning(f"Log {log.get('transactionHash')}:{log.get('logIndex')} was removed by a reorg")
+            return
+        event = self.decoder.decode(rpc_log_to_item(log))
+        if event is None:
+            return
+        key = (event.transaction_hash, event.log_index)
+        if key in self._seen:
+            return
+        self._seen[key] = None
+        if len(self._seen) > SEEN_LOGS:
+            self._seen.popitem(last=False)
+        alert = alert_payload(self.chain, event)
+        self.alerts += 1
+        for sink in self.sinks:
+            sink.offer(alert)
+
+    async def poll(self, interval: float = DEFAULT_POLL_INTERVAL, from_block: int | None = None) -> None:
+        """Polls eth_getLogs for every new block range. Starts after the current head unless `from_block` is given."""
+        next_block = from_block if from_block is not None else int(await self.rpc.request("eth_blockNumber", []), 16) + 1
+        logger.info(f"Polling {self.chain} for {len(self.topics)} events from block {next_block} every {interval}s")
+        while True:
+            started = time.monotonic()
+            try:
+                head = int(await self.rpc.request("eth_blockNumber", []), 16)
+                while next_block <= head:
+                    to_block = min(head, next_block + MAX_BLOCKS_PER_POLL - 1)
+                    logs = await self.rpc.request("eth_getLogs", [{**self.log_filter(),
+                                                                   "fromBlock": hex(next_block), "toBlock": hex(to_block)}])
+                    for log in logs:
+                        self.handle_log(log)
+                    next_block = to_block + 1
+            except (httpx.HTTPError, RpcError) as e:
+                logger.warning(f"Polling {self.chain} failed, retrying: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def subscribe(self, ws_url: str, reconnect_delay: float = 1.0) -> None:
+        """
+        Receives logs over an eth_subscribe("logs") WebSocket subscription, reconnecting on errors.
+        Blocks mined while disconnected are backfilled over HTTP before resubscribing.
+        """
+        try:
+            import websockets
+        except ImportError:
+            raise SystemExit("WebSocket subscriptions require websockets (pip install websockets); "
+                             "omit --ws-url to poll instead")
+
+        last_block = int(await self.rpc.request("eth_blockNumber", []), 16)
+        resubscribing = False
+        while True:
+            try:
+                async with websockets.connect(ws_url) as ws:
+                    await ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe",
+                                              "params": ["logs", self.log_filter()]}))
+                    reply = json.loads(await ws.recv())
+                    if "error" in reply:
+                        raise RpcError(reply["error"].get("message", reply["error"]))
+                    if resubscribing:  # logs seen twice are dropped by handle_log
+                        last_block = max(last_block, await self._backfill(last_block + 1))
+                    resubscribing = True
+                    logger.info(f"Subscribed to {len(self.topics)} events on {self.chain} ({reply['result']})")
+                    async for message in ws:
+                        log = json.loads(message).get("params", {}).get("result")
+                        if log:
+                            self.handle_log(log)
+                            last_block = max(last_block, int(log["blockNumber"], 16))
+            except (OSError, RpcError, websockets.WebSocketException, httpx.HTTPError) as e:
+                logger.warning(f"WebSocket subscription on {self.chain} lost ({e}), reconnecting in {reconnect_delay}s")
+                await asyncio.sleep(reconnect_delay)
+
+    async def _backfill(self, from_block: int) -> int:
+        """Replays the logs of blocks `from_block`..head over HTTP. Returns the head."""
+        head = int(await self.rpc.request("eth_blockNumber", []), 16)
+        for start in range(from_block, head + 1, MAX_BLOCKS_PER_POLL):
+            logs = await self.rpc.request("eth_getLogs", [{**self.log_filter(), "fromBlock": hex(start),
+                                                           "toBlock": hex(min(head, start + MAX_BLOCKS_PER_POLL - 1))}])
+            for log in logs:
+                self.handle_log(log)
+        return head
+
+
+async def rpc_chain_label(rpc: JsonRpcClient, networks: NetworkRegistry) -> str:
+    """
+    Chain label for a node given only by its RPC URL: the Blockscout host of the configured
+    network with the node's eth_chainId, else "chain-<id>" (e.g. chain-31337 for a local anvil).
+    """
+    chain_id = int(await rpc.request("eth_chainId", []), 16)
+    for network in networks:
+        if network.chain_id == chain_id:
+            return default_chain_label(network.blockscout_api_url)
+    return f"chain-{chain_id}"
+
+
+async def main():
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    parser = argparse.ArgumentParser(description="Push alerts for P2P defaults, vouch slashes and payment modifications.")
+    parser.add_argument("--network", help="Network from networks.json (RPC URLs and contract addresses).")
+    parser.add_argument("--rpc-url", help="HTTP JSON-RPC endpoint (overrides the network's).")
+    parser.add_argument("--ws-url", help="WebSocket JSON-RPC endpoint for eth_subscribe (overrides the network's ws_url).")
+    parser.add_argument("--lending", help="P2PLending address (overrides the network's).")
+    parser.add_argument("--reputation", help="Reputation address (overrides the network's).")
+    parser.add_argument("--chain", help="Chain label in the alerts (defaults to the network's Blockscout host, or to the --rpc-url node's chain id).")
+    parser.add_argument("--events", nargs="+", default=list(DEFAULT_ALERT_EVENTS), help="Event names to alert on.")
+    parser.add_argument("--sink", action="append", dest="sinks",
+                        help="stdout, file:PATH or webhook:URL (repeatable; default: stdout).")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL, help="Polling interval in seconds without --ws-url.")
+    parser.add_argument("--from-block", type=int, help="Replay alerts from this block before following the head (polling only).")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Pending alerts kept per sink.")
+    args = parser.parse_args()
+
+    networks = load_networks()
+    network = networks.get(args.network)
+    rpc_url = args.rpc_url or network.rpc_url
+    ws_url = args.ws_url or (network.ws_url if not args.rpc_url else None)
+    addresses = [args.lending or network.contracts.get("P2PLending"),
+                 args.reputation or network.contracts.get("Reputation")]
+    addresses = [address for address in addresses if address]
+    if not rpc_url or not addresses:
+        print("Error: no RPC URL or contract addresses (use --network, or --rpc-url with --lending/--reputation).")
+        return
+
+    async with JsonRpcClient(rpc_url) as rpc:
+        if args.chain:
+            chain = args.chain
+        elif args.rpc_url and not args.network:
+            # Not the default network's node: label the alerts by what the node says it is
+            chain = await rpc_chain_label(rpc, networks)
+        else:
+            chain = default_chain_label(network.blockscout_api_url)
+        sinks = [SinkQueue(make_sink(spec), args.queue_size) for spec in args.sinks or ["stdout"]]
+        for sink in sinks:
+            sink.start()
+        watcher = P2PWatcher(rpc, addresses, sinks, chain, tuple(args.events))
+        try:
+            if ws_url and args.from_block is None:
+                await watcher.subscribe(ws_url)
+            else:
+                await watcher.poll(args.poll, args.from_block)
+        finally:
+            for sink in sinks:
+                await sink.aclose()
+            logger.info(f"{watcher.alerts} alerts: " + ", ".join(f"{s.sink.name} {s.stats()}" for s in sinks))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,175 @@
+"""
+Python-side trimming of Blockscout tool results before they reach the model context.
+
+Mirrors the slim profile of blockscout-mcp-server/src/projection.ts so that the same budget
+applies when the agent runs against a server without projection support (e.g. the published
+`npx blockscout-mcp`): address objects become their hash, icons/raw input/empty values are
+dropped, decoded calls become name=value maps, and list pages are cut to a byte budget with
+a note on how to continue.
+"""
+import json
+import os
+from typing import Any
+
+DEFAULT_MAX_BYTES = int(os.getenv("BLOCKSCOUT_MAX_RESPONSE_BYTES", "24000"))
+
+DROPPED_KEYS = {
+    "icon_url", "raw_input", "token_type_icon", "metadata", "private_tags", "public_tags",
+    "watchlist_names", "ens_domain_name", "implementations",
+}
+
+
+def slim_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [slim_value(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if isinstance(value.get("hash"), str) and "is_contract" in value:  # address object
+        return f"{value['hash']} ({value['name']})" if value.get("name") else value["hash"]
+    if "method_call" in value and isinstance(value.get("parameters"), list):  # decoded input/log
+        return {
+            "method_call": value["method_call"],
+            "parameters": {p.get("name"): slim_value(p.get("value")) for p in value["parameters"]},
+        }
+    slim = {}
+    for key, entry in value.items():
+        if key in DROPPED_KEYS or entry is None:
+            continue
+        if key == "token" and isinstance(entry, dict):
+            slim["token"] = {"address": entry.get("address") or entry.get("address_hash"),
+                             "symbol": entry.get("symbol"), "decimals": entry.get("decimals")}
+            continue
+        slim_entry = slim_value(entry)
+        if slim_entry == []:
+            continue
+        slim[key] = slim_entry
+    return slim
+
+
+def _largest_fitting(high: int, fits) -> int:
+    """Largest n in [0, high] with fits(n), for a predicate that holds up to some n and fails after it."""
+    low = 0
+    while low < high:
+        mid = (low + high + 1) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _encode(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _truncated_preview(encoded: str, max_bytes: int) -> str:
+    """A JSON object holding the start of `encoded` as a string, within `max_bytes`."""
+    def render(length: int) -> str:
+        return _encode({"truncated": {"bytes": len(encoded),
+                                      "hint": "Response exceeded the size budget; request specific fields"},
+                        "preview": encoded[:length]})
+    return render(_largest_fitting(len(encoded), lambda length: len(render(length)) <= max_bytes))
+
+
+def _budget_result(entry: Any, max_bytes: int) -> Any:
+    """One batch_call entry ({tool, args, ok, result}) with its `result` slimmed to fit `max_bytes`."""
+    if len(_encode(entry)) <= max_bytes or not (isinstance(entry, dict) and "result" in entry):
+        return entry
+    overhead = len(_encode({**entry, "result": None}))
+    result = entry["result"]
+    text = result if isinstance(result, str) else _encode(result)
+    slim = slim_tool_output(text, max(max_bytes - overhead, 0))
+    if not isinstance(result, str):
+        slim = json.loads(slim)
+    return {**entry, "result": slim}
+
+
+def _budget_results(results: list, max_bytes: int) -> list:
+    """
+    Shares `max_bytes` between batch_call entries: smallest first, each gets an equal part of what
+    the previous ones left, so small results stay whole and large ones split the rest.
+    """
+    budgeted = list(results)
+    remaining = max_bytes
+    order = sorted(range(len(results)), key=lambda i: len(_encode(results[i])))
+    for position, index in enumerate(order):
+        budgeted[index] = _budget_result(results[index], remaining // (len(order) - position))
+        remaining -= len(_encode(budgeted[index]))
+    return budgeted
+
+
+def _page_cursor(data: dict, last_item: Any, omitted: int) -> dict | None:
+    """
+    A keyset cursor that continues right after `last_item` of a cut page, built like the page's
+    next_page_params from the item's own fields. None when that is not possible: page-numbered
+    cursors, cursor fields the items don't carry, or a page without a cursor.
+    """
+    params = data.get("next_page_params")
+    if not isinstance(params, dict) or "page" in params or not isinstance(last_item, dict):
+        return None
+    keys = [key for key in params if key != "items_count"]
+    if not keys or not all(isinstance(last_item.get(key), (str, int, float)) for key in keys):
+        return None
+    cursor = {key: last_item[key] for key in keys}
+    if "items_count" in params:
+        # items_count counts the items returned so far, so it loses the omitted ones
+        cursor["items_count"] = params["items_count"] - omitted if isinstance(params["items_count"], int) else None
+    return cursor
+
+
+def slim_tool_output(text: str, max_bytes: int = DEFAULT_MAX_BYTES) -> str:
+    """
+    Slims a tool's JSON text output and keeps it under `max_bytes`. Pages keep as many leading
+    items as fit, with next_page_params rebuilt to continue after the last one (see _page_cursor)
+    or dropped when it can't be, so following it never skips the omitted items; batch_call results each get an equal share of the
+    budget (see _budget_results), then trailing results are omitted. JSON output stays valid JSON (other payloads become
+    a truncated preview string); non-JSON output is only cut to the budget.
+    Output that is already small (e.g. projected by the server) is returned unchanged.
+    """
+    if len(text) <= max_bytes:
+        return text
+    try:
+        data = json.loads(text)
+    except ValueError:
+        notice = f"... [truncated {len(text) - max_bytes} bytes]"
+        return text[:max(max_bytes - len(notice), 0)] + notice
+
+    data = slim_value(data)
+    encoded = _encode(data)
+    if len(encoded) <= max_bytes:
+        return encoded
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        key, count_keys = "items", ("returned_items", "page_items")
+        omitted = ("items of this page were omitted and next_page_params was dropped, since it would skip them. "
+                   "Use the tool's fields/format options or narrower filters to see them")
+    elif isinstance(data, dict) and isinstance(data.get("results"), list) and data["results"]:
+        key, count_keys = "results", ("returned_calls", "calls")
+        omitted = "call results were omitted. Run those calls again in a smaller batch"
+        data = {**data, "results": _budget_results(data["results"], max_bytes)}
+    else:
+        return _truncated_preview(encoded, max_bytes)
+
+    entries = data[key]
+
+    def with_notice(count: int) -> str:
+        hint = f"Response exceeded the size budget; {len(entries) - count} {omitted}"
+        extra = {}
+        if key == "items":
+            cursor = _page_cursor(data, entries[count - 1], len(entries) - count) if count else None
+            extra["next_page_params"] = cursor
+            if cursor is not None:
+                hint = "Response exceeded the size budget; call again with next_page_params to get the remaining items"
+        return _encode({
+            **data,
+            key: entries[:count],
+            **extra,
+            "truncated": {
+                count_keys[0]: count,
+                count_keys[1]: len(entries),
+                "hint": hint,
+            },
+        })
+
+    if len(_encode(data)) <= max_bytes:
+        return _encode(data)
+    return with_notice(_largest_fitting(len(entries), lambda count: len(with_notice(count)) <= max_bytes))
@@ -0,0 +1,253 @@
+"""
+Local stand-in for a Blockscout explorer that records real API responses to disk and replays them,
+so the agents, the indexer and the analyzer can run (and be benchmarked) without a live explorer.
+
+    # proxy to the real explorer, saving every successful response under fixtures/flow
+    python replay_server.py record --upstream https://evm-testnet.flowscan.io --fixtures fixtures/flow
+    # serve only the recorded responses, with explorer-like latency and rate limiting
+    python replay_server.py replay --fixtures fixtures/flow --latency-ms 150 --jitter-ms 50 --rate-limit 10
+
+Point BLOCKSCOUT_API_URL (or a networks.json entry) at http://127.0.0.1:8765/api. Both the REST v2
+paths and the Etherscan-style /api?module=... calls are keyed by method, path and sorted query string.
+Request counters are served at /__stats__.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+# Responses worth replaying; 429/5xx are transient and are passed through without being recorded
+RECORDED_STATUSES = {200, 404, 422}
+
+
+def fixture_key(method: str, path_and_query: str) -> str:
+    parts = urlsplit(path_and_query)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return hashlib.sha256(f"{method} {parts.path}?{query}".encode()).hexdigest()
+
+
+class FixtureStore:
+    """One JSON file per recorded request: {request, status, content_type, body}."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, fixture: dict) -> None:
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, self._path(key))  # concurrent handlers never see half-written files
+
+
+class RateLimiter:
+    """Thread-safe token bucket that rejects instead of waiting, like an explorer returning 429."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class ReplayServer:
+    """
+    Threaded HTTP server in `record` mode (proxy to `upstream`, saving responses; already recorded
+    requests are served from disk) or `replay` mode (fixtures only, misses answer 404).
+    `latency`/`jitter` (seconds) delay every response and `rate_limit` (requests/s) answers 429
+    with Retry-After when exceeded.
+    """
+
+    def __init__(self, fixtures_dir: str, mode: str = "replay", upstream: str | None = None,
+                 host: str = "127.0.0.1", port: int = DEFAULT_PORT, latency: float = 0.0,
+                 jitter: float = 0.0, rate_limit: float | None = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"mode must be 'record' or 'replay', not {mode!r}")
+        if mode == "record" and not upstream:
+            raise ValueError("record mode needs an upstream explorer URL")
+        self.mode = mode
+        self.store = FixtureStore(fixtures_dir)
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self._upstream_client = httpx.Client(timeout=60.0, follow_redirects=True) if self.upstream else None
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "recorded": 0, "rate_limited": 0, "bytes_sent": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def reset_stats(self) -> dict:
+        with self._stats_lock:
+            stats, self.stats = dict(self.stats), {name: 0 for name in self.stats}
+        return stats
+
+    def respond(self, method: str, path_and_query: str) -> tuple[int, dict[str, str], bytes]:
+        self.count(requests=1)
+        if self.rate_limiter:
+            wait = self.rate_limiter.try_acquire()
+            if wait:
+                self.count(rate_limited=1)
+                body = json.dumps({"message": "Too Many Requests"}).encode()
+                return 429, {"Content-Type": "application/json", "Retry-After": f"{wait:.3f}"}, body
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        key = fixture_key(method, path_and_query)
+        fixture = self.store.get(key)
+        if fixture is not None:
+            self.count(hits=1)
+            return fixture["status"], {"Content-Type": fixture["content_type"]}, fixture["body"].encode()
+
+        self.count(misses=1)
+        if self.mode == "replay":
+            body = json.dumps({"message": f"No recorded response for {method} {path_and_query}"}).encode()
+            return 404, {"Content-Type": "application/json"}, body
+
+        response = self._upstream_client.request(method, self.upstream + path_and_query,
+                                                 headers={"Accept": "application/json"})
+        content_type = response.headers.get("content-type", "application/json")
+        if response.status_code in RECORDED_STATUSES:
+            self.store.put(key, {
+                "request": f"{method} {path_and_query}",
+                "status": response.status_code,
+                "content_type": content_type,
+                "body": response.text,
+            })
+            self.count(recorded=1)
+        headers = {"Content-Type": content_type}
+        if "retry-after" in response.headers:
+            headers["Retry-After"] = response.headers["retry-after"]
+        return response.status_code, headers, response.content
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, as the MCP server and httpx pool connections
+
+            def _send(self, status: int, headers: dict[str, str], body: bytes) -> None:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.count(bytes_sent=len(body))
+
+            def do_GET(self):
+                if self.path == "/__stats__":
+                    with server._stats_lock:
+                        body = json.dumps(server.stats).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                try:
+                    self._send(*server.respond("GET", self.path))
+                except httpx.HTTPError as e:
+                    self._send(502, {"Content-Type": "application/json"},
+                               json.dumps({"message": f"Upstream error: {e!r}"}).encode())
+
+            def log_message(self, format, *args):
+                logger.debug("%s - %s", self.address_string(), format % args)
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        """Serves from a background thread (for in-process benchmarks)."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Blockscout {self.mode} server listening on {self.url} (fixtures: {self.store.directory})")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._upstream_client:
+            self._upstream_client.close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def serve_forever(self) -> None:
+        logger.info(f"Blockscout {self.mode} server listening on {self.url} (fixtures: {self.store.directory})")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.info(f"Stats: {self.stats}")
+            self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay Blockscout API responses.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--fixtures", required=True, help="Directory of recorded responses.")
+    parser.add_argument("--upstream", help="Explorer origin to record from, e.g. https://evm-testnet.flowscan.io")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added delay per response.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay per response (uniform).")
+    parser.add_argument("--rate-limit", type=float, help="Requests per second before answering 429.")
+    args = parser.parse_args()
+
+    ReplayServer(args.fixtures, mode=args.mode, upstream=args.upstream, host=args.host, port=args.port,
+                 latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                 rate_limit=args.rate_limit).serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
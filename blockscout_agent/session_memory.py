@@ -0,0 +1,219 @@
+"""
+Bounded context and session memory for long ADK agent sessions.
+
+Every tool result stays in the session and is re-sent to the model on each later turn, so a few
+`get_address_logs` pages from the Blockscout MCP toolset make every following turn slower and
+more expensive. `SessionCompactor`
+keeps that in check with two ADK callbacks:
+
+- `after_tool_callback`: a result larger than `max_inline_bytes` is saved in a `ResultStore` and the
+  session keeps its slimmed version (see projection.py) plus a `result_ref`, which caps what any
+  one tool call adds to the session.
+- `before_model_callback`: when the request's contents exceed `token_budget` (estimated at ~4 bytes
+  per token), the oldest tool results, except the ones the model is about to read, are replaced by
+  a digest (item count, block range, event names, top-level fields) and their `result_ref`.
+
+The agent gets a `get_stored_result` tool to page through a stored result again when a digest is
+not enough. The store keeps results in memory up to `max_bytes` in total, evicting the least
+recently used, so a long-running service does not grow without bound.
+
+    compactor = SessionCompactor()
+    LlmAgent(..., tools=[*tools, *compactor.functions()],
+             before_model_callback=compactor.before_model_callback,
+             after_tool_callback=compactor.after_tool_callback)
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable
+
+from projection import DEFAULT_MAX_BYTES, slim_tool_output
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("BLOCKSCOUT_CONTEXT_TOKEN_BUDGET") or 32000)
+DEFAULT_RESULT_STORE_BYTES = int(os.getenv("BLOCKSCOUT_RESULT_STORE_BYTES") or 64 * 1024 * 1024)
+BYTES_PER_TOKEN = 4  # rough average for JSON-heavy contents
+DIGEST_FIELDS = 20
+
+
+def estimate_tokens(value: Any) -> int:
+    return len(json.dumps(value, default=str)) // BYTES_PER_TOKEN
+
+
+def _response_payload(response: Any) -> Any:
+    """The JSON inside an ADK tool response: {"result": "<json>"} from function tools, MCP text content, or the dict itself."""
+    if isinstance(response, dict):
+        text = None
+        if isinstance(response.get("result"), str):
+            text = response["result"]
+        elif isinstance(response.get("content"), list):
+            text = "".join(part.get("text", "") for part in response["content"] if isinstance(part, dict))
+        if text is not None:
+            try:
+                return json.loads(text)
+            except ValueError:
+                return text
+    return response
+
+
+def digest(payload: Any) -> dict:
+    """A few hundred bytes describing a tool result: what it contains, not the content itself."""
+    if isinstance(payload, str):
+        return {"type": "text", "bytes": len(payload), "preview": payload[:200]}
+    if isinstance(payload, list):
+        payload = {"items": payload}
+    if not isinstance(payload, dict):
+        return {"value": payload}
+
+    summary: dict[str, Any] = {}
+    items = payload.get("items")
+    if isinstance(items, list):
+        summary["item_count"] = len(items)
+        blocks = [int(item["block_number"]) for item in items
+                  if isinstance(item, dict) and str(item.get("block_number", "")).isdigit()]
+        if blocks:
+            summary["block_range"] = [min(blocks), max(blocks)]
+        names = Counter(
+            item["decoded"]["method_call"].split("(")[0] for item in items
+            if isinstance(item, dict) and isinstance(item.get("decoded"), dict) and item["decoded"].get("method_call")
+        )
+        if names:
+            summary["events"] = dict(names.most_common(10))
+        if payload.get("next_page_params"):
+            summary["has_next_page"] = True
+    scalars = {key: value for key, value in payload.items()
+               if key != "items" and isinstance(value, (str, int, float, bool)) and len(str(value)) <= 80}
+    summary["fields"] = dict(list(scalars.items())[:DIGEST_FIELDS])
+    others = [key for key in payload if key != "items" and key not in scalars]
+    if others:
+        summary["other_fields"] = others[:DIGEST_FIELDS]
+    return summary
+
+
+class ResultStore:
+    """In-memory LRU of full tool results by reference, capped at `max_bytes` of JSON in total. Thread-safe."""
+
+    def __init__(self, max_bytes: int = DEFAULT_RESULT_STORE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evicted = 0
+        self._results: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, tool_name: str, payload: Any) -> str:
+        text = json.dumps(payload, default=str)
+        ref = "res_" + hashlib.sha256(f"{tool_name}:{text}".encode()).hexdigest()[:12]
+        with self._lock:
+            if ref in self._results:
+                self._results.move_to_end(ref)
+                return ref
+            self._results[ref] = (tool_name, text)
+            self.bytes += len(text)
+            while self.bytes > self.max_bytes and len(self._results) > 1:
+                _, (_, evicted) = self._results.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evicted += 1
+        return ref
+
+    def get(self, ref: str) -> tuple[str, str] | None:
+        """(tool name, JSON text) of a stored result, or None once evicted."""
+        with self._lock:
+            entry = self._results.get(ref)
+            if entry is not None:
+                self._results.move_to_end(ref)
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"results": len(self._results), "bytes": self.bytes, "evicted": self.evicted}
+
+
+class SessionCompactor:
+    """ADK callbacks that keep tool results in the model context under a token budget (see the module docstring)."""
+
+    def __init__(self, store: ResultStore | None = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 max_inline_bytes: int = DEFAULT_MAX_BYTES):
+        self.store = store or ResultStore()
+        self.token_budget = token_budget
+        self.max_inline_bytes = max_inline_bytes
+        self.compacted = 0
+
+    def after_tool_callback(self, tool, args: dict, tool_context, tool_response: Any) -> dict | None:
+        """Stores oversized results and keeps only their slimmed version (with a `result_ref`) in the session."""
+        if getattr(tool, "name", None) == "get_stored_result":
+            return None
+        if isinstance(tool_response, dict) and tool_response.get("isError"):
+            return None  # MCP errors are short and the model needs them verbatim
+        payload = _response_payload(tool_response)
+        text = json.dumps(payload, default=str)
+        if len(text) <= self.max_inline_bytes:
+            return None
+        ref = self.store.put(tool.name, payload)
+        return {"result": slim_tool_output(text, self.max_inline_bytes), "result_ref": ref,
+                "note": "Slimmed; call get_stored_result with result_ref for the full result."}
+
+    def before_model_callback(self, callback_context, llm_request) -> None:
+        """Replaces the oldest tool results in the request by digests until it fits the token budget."""
+        contents = llm_request.contents or []
+        tokens = estimate_tokens([content.model_dump(exclude_none=True) for content in contents])
+        if tokens <= self.token_budget:
+            return None
+
+        # The last content holds the results the model has not read yet: those are always sent in full.
+        for index, content in enumerate(contents[:-1]):
+            if tokens <= self.token_budget:
+                break
+            if not any(part.function_response for part in content.parts or []):
+                continue
+            compacted = copy.deepcopy(content)  # session events share these objects; never edit them in place
+            for part in compacted.parts:
+                response = part.function_response
+                if response is None or (response.response or {}).get("compacted"):
+                    continue
+                before = estimate_tokens(response.response)
+                ref = (response.response or {}).get("result_ref")
+                stored = self.store.get(ref) if ref else None
+                if stored is not None:  # slimmed by after_tool_callback: digest the full result
+                    payload = json.loads(stored[1])
+                else:
+                    payload = _response_payload(response.response)
+                    ref = self.store.put(response.name, payload)
+                response.response = {"compacted": True, "result_ref": ref, "digest": digest(payload)}
+                tokens -= before - estimate_tokens(response.response)
+                self.compacted += 1
+            contents[index] = compacted
+        if tokens > self.token_budget:
+            logger.info(f"Context still ~{tokens} tokens after compaction (budget {self.token_budget})")
+        return None
+
+    async def get_stored_result(self, result_ref: str, offset: int = 0, limit: int = 20) -> str:
+        """
+        Returns a tool result that was replaced in the conversation by a digest or a slimmed version.
+        For results with an `items` list, only items[offset:offset + limit] are returned.
+
+        Args:
+            result_ref: The result_ref of the compacted result (res_...).
+            offset: Index of the first item to return.
+            limit: Maximum number of items to return.
+        """
+        entry = self.store.get(result_ref)
+        if entry is None:
+            return json.dumps({"error": f"{result_ref} is no longer stored; call the original tool again."})
+        tool_name, text = entry
+        payload = json.loads(text)
+        if isinstance(payload, dict) and isinstance(payload.get("items"), list):
+            items = payload["items"]
+            payload = {**payload, "items": items[offset:offset + limit],
+                       "stored_items": {"offset": offset, "returned": len(items[offset:offset + limit]), "total": len(items)}}
+        return slim_tool_output(json.dumps({"tool": tool_name, "result": payload}, default=str), self.max_inline_bytes)
+
+    def functions(self) -> list[Callable]:
+        return [self.get_stored_result]
+
+    def stats(self) -> dict:
+        return {"compacted_results": self.compacted, **self.store.stats()}
@@ -0,0 +1,245 @@
+"""
+Response cache for Blockscout MCP tool calls.
+
+Results are keyed by chain (Blockscout API URL), tool name and canonicalized arguments.
+Data that can no longer change (a transaction or block mined more than FINALITY_SECONDS ago,
+and the logs/transfers of such a transaction) is kept permanently; everything else, including
+data of recent transactions a reorg could still drop, gets a short per-tool TTL. Entries live in an
+in-memory LRU bounded by a byte budget and are persisted to SQLite so restarts start warm.
+
+Used through `mcp_wrappers.CachingMCPServer`.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "BLOCKSCOUT_TOOL_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_cache.db")
+)
+DEFAULT_MEMORY_BUDGET = int(os.getenv("BLOCKSCOUT_TOOL_CACHE_MB", "64")) * 1024 * 1024
+DEFAULT_TTL = float(os.getenv("BLOCKSCOUT_TOOL_CACHE_TTL", "30"))  # seconds, for mutable data
+# Blocks older than this are treated as final (no reorg will replace them).
+FINALITY_SECONDS = float(os.getenv("BLOCKSCOUT_FINALITY_SECONDS", "900"))
+
+# Tools whose result is fixed once the transaction is mined.
+TRANSACTION_TOOLS = {
+    "get_transaction_info",
+    "get_transaction_logs",
+    "get_transaction_token_transfers",
+    "get_transaction_internal_txs",
+    "get_transaction_raw_trace",
+    "get_transaction_state_changes",
+    "get_transaction_summary",
+}
+# Tools whose result is fixed once the block is final.
+BLOCK_TOOLS = {
+    "get_block_info",
+    "get_block_transactions",
+    "get_block_withdrawals",
+}
+# TTLs (seconds) for mutable data; tools not listed use DEFAULT_TTL.
+MUTABLE_TTLS = {
+    "get_stats": 60,
+    "get_indexing_status": 60,
+    "get_address_logs": 30,
+    "get_address_info": 30,
+    "get_address_counters": 30,
+    "get_smart_contract": 3600,  # only changes when the contract gets verified
+    "get_token_info": 300,
+    "get_transaction_chart": 600,
+    "get_market_chart": 600,
+    "get_main_page_transactions": 5,
+    "get_main_page_blocks": 5,
+}
+# Never cached (tools that return endpoints/config rather than chain data are cheap anyway).
+UNCACHED_TOOLS = {"get_json_rpc_url"}
+
+
+def canonical_key(namespace: str, tool_name: str, arguments: dict | None) -> str:
+    """Stable key for a tool call: argument order, address/hash casing and empty values don't matter."""
+    def normalize(value):
+        if isinstance(value, str) and value.startswith("0x"):
+            return value.lower()
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items() if v is not None}
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        return value
+
+    payload = json.dumps([namespace, tool_name, normalize(arguments or {})], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _result_payload(result_text: str) -> dict | None:
+    try:
+        payload = json.loads(result_text)
+    except (TypeError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _block_is_final(block: dict) -> bool:
+    """Whether a block, transaction or token transfer (anything with a `timestamp`) was mined long enough ago."""
+    timestamp = block.get("timestamp")
+    if not isinstance(timestamp, str) or not timestamp:
+        return False
+    try:
+        mined_at = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return False
+    return time.time() - mined_at > FINALITY_SECONDS
+
+
+def ttl_for(tool_name: str, result_text: str, transaction_final: bool = False) -> float | None:
+    """
+    Seconds to keep a result, 0 to not cache it, or None to keep it forever.
+    Transaction/block results only become permanent once the data is actually final: the block
+    or transaction timestamp is older than FINALITY_SECONDS. Per-transaction results without a
+    timestamp (logs) rely on `transaction_final`, i.e. the transaction itself is known to be final.
+    """
+    if tool_name in UNCACHED_TOOLS:
+        return 0
+    if tool_name in TRANSACTION_TOOLS or tool_name in BLOCK_TOOLS:
+        payload = _result_payload(result_text)
+        if payload is None:
+            # Lists of logs/transfers: fine to keep briefly, but we can't prove finality
+            return DEFAULT_TTL
+        if tool_name in BLOCK_TOOLS and "height" in payload:
+            return None if _block_is_final(payload) else DEFAULT_TTL
+        if tool_name == "get_transaction_info":
+            mined = payload.get("block") is not None or payload.get("block_number") is not None
+            confirmed = mined and payload.get("status") in ("ok", "error") and payload.get("confirmations", 1) > 0
+            if not confirmed:
+                return 0
+            return None if _block_is_final(payload) else DEFAULT_TTL
+        # Other per-transaction tools only return data for mined transactions, but a recent one can be reorged out
+        items = payload.get("items")
+        if isinstance(items, list) and items and isinstance(items[0], dict) and "timestamp" in items[0]:
+            return None if _block_is_final(items[0]) else DEFAULT_TTL
+        return None if transaction_final else DEFAULT_TTL
+    return MUTABLE_TTLS.get(tool_name, DEFAULT_TTL)
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    expires_at: float | None  # None = immutable
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+
+class ToolResultCache:
+    """
+    LRU cache of serialized tool results bounded by `memory_budget` bytes, backed by SQLite.
+    Thread-safe; all operations are quick and synchronous.
+    """
+
+    def __init__(self, db_path: str | None = DEFAULT_CACHE_PATH, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results ("
+                "key TEXT PRIMARY KEY, tool TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL, stored_at REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "DELETE FROM tool_results WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            self.conn.commit()
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old.value)
+        if len(entry.value) > self.memory_budget:
+            return
+        self._entries[key] = entry
+        self._size += len(entry.value)
+        while self._size > self.memory_budget:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.value)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT value, expires_at FROM tool_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = CacheEntry(row[0], row[1])
+                    self._remember(key, entry)
+            if entry is None or entry.expired:
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+            if key in self._entries:  # may be over budget and only on disk
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: str, tool_name: str, value: str, ttl: float | None) -> None:
+        if ttl is not None and ttl <= 0:
+            return
+        now = time.time()
+        entry = CacheEntry(value, None if ttl is None else now + ttl)
+        with self._lock:
+            self._remember(key, entry)
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO tool_results (key, tool, value, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, tool_name, value, entry.expires_at, now),
+                )
+                self.conn.commit()
+
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.value)
+        if self.conn is not None:
+            self.conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM tool_results")
+                self.conn.commit()
+
+    def is_permanent(self, key: str) -> bool:
+        """Whether `key` holds an unexpired result that was stored to be kept forever."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.conn is not None:
+                row = self.conn.execute("SELECT expires_at FROM tool_results WHERE key = ?", (key,)).fetchone()
+                return row is not None and row[0] is None
+            return entry is not None and entry.expires_at is None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._size}
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
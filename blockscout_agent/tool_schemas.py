@@ -0,0 +1,131 @@
+"""
+Versioned cache of the Blockscout MCP server's tool schemas, and named subsets of its tools.
+
+The schemas only change with the server version, so they are saved once per `blockscout-mcp`
+version in tool_schemas.json (BLOCKSCOUT_TOOL_SCHEMAS) and read from there afterwards, without
+asking the server for its tool list. For the version of the local blockscout-mcp-server checkout,
+the key also carries a hash of its sources, so edited schemas are listed again:
+
+    python list_mcp_tools.py refresh               # connect once and save the current version's schemas
+    python list_mcp_tools.py show --subset logs-only
+
+A subset keeps only the tools a workload needs, so their schemas are all the model sees on each turn
+(e.g. "logs-only" for the P2P test queries, which are told to use get_address_logs only).
+"""
+import hashlib
+import json
+import os
+import time
+
+from mcp.types import Tool
+
+DEFAULT_SCHEMA_CACHE_PATH = os.getenv(
+    "BLOCKSCOUT_TOOL_SCHEMAS", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tool_schemas.json')
+)
+SERVER_NAME = "blockscout-mcp"
+LOCAL_SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "blockscout-mcp-server")
+LOCAL_SERVER_PACKAGE = os.path.join(LOCAL_SERVER_DIR, "package.json")
+
+# None keeps every tool
+TOOL_SUBSETS: dict[str, tuple[str, ...] | None] = {
+    "all": None,
+    "logs-only": ("get_address_logs",),
+    "p2p": ("get_address_logs", "get_transaction_logs", "get_transaction_info", "get_address_info",
+            "get_smart_contract", "batch_call"),
+}
+
+
+def expected_server_version() -> str | None:
+    """The server version to look up before connecting: BLOCKSCOUT_MCP_VERSION, else the local package's."""
+    return os.getenv("BLOCKSCOUT_MCP_VERSION") or local_server_version()
+
+
+def subset_tool_names(subset: str | None) -> list[str] | None:
+    """The tool names of a subset, or None for every tool."""
+    if subset is None:
+        return None
+    if subset not in TOOL_SUBSETS:
+        raise ValueError(f"Unknown tool subset {subset!r} (known: {', '.join(TOOL_SUBSETS)})")
+    names = TOOL_SUBSETS[subset]
+    return list(names) if names is not None else None
+
+
+def select_tools(tools: list[Tool], subset: str | None) -> list[Tool]:
+    names = subset_tool_names(subset)
+    if names is None:
+        return list(tools)
+    return [tool for tool in tools if tool.name in names]
+
+
+def local_server_fingerprint() -> str | None:
+    """Short hash of the local server's package.json and sources, or None without a local checkout."""
+    source_dir = os.path.join(LOCAL_SERVER_DIR, "src")
+    try:
+        paths = [LOCAL_SERVER_PACKAGE] + sorted(
+            os.path.join(source_dir, name) for name in os.listdir(source_dir) if name.endswith(".ts"))
+        sha = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f:
+                sha.update(f.read())
+    except OSError:
+        return None
+    return sha.hexdigest()[:12]
+
+
+def local_server_version() -> str | None:
+    try:
+        with open(LOCAL_SERVER_PACKAGE) as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+class ToolSchemaCache:
+    """JSON file of tool schemas per server name and version: {"servers": {"name@version": {...}}}."""
+
+    def __init__(self, path: str = DEFAULT_SCHEMA_CACHE_PATH):
+        self.path = path
+        self._entries = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("servers", {})
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            return {}  # a corrupt cache is rebuilt from the server
+
+    @staticmethod
+    def key(server: str, version: str | None) -> str:
+        """
+        "name@version". When the version is the local checkout's, its source fingerprint is
+        appended, so tool schema edits made without a version bump still miss the cache.
+        """
+        key = f"{server}@{version or 'unknown'}"
+        if version is not None and version == local_server_version():
+            fingerprint = local_server_fingerprint()
+            if fingerprint:
+                key += f"+{fingerprint}"
+        return key
+
+    def get(self, server: str, version: str | None) -> list[Tool] | None:
+        entry = self._entries.get(self.key(server, version))
+        if entry is None:
+            return None
+        return [Tool.model_validate(tool) for tool in entry["tools"]]
+
+    def put(self, server: str, version: str | None, tools: list[Tool]) -> None:
+        self._entries[self.key(server, version)] = {
+            "server": server,
+            "version": version,
+            "fetched_at": int(time.time()),
+            "tools": [tool.model_dump(by_alias=True, exclude_none=True) for tool in tools],
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"servers": self._entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def versions(self) -> list[str]:
+        return list(self._entries)
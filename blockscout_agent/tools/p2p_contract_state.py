@@ -0,0 +1,48 @@
+"""
+Agent tools that read the P2PLending contract's current state over JSON-RPC (see p2p_state_reader.py),
+for questions the explorer tools can only answer by replaying event history.
+"""
+import json
+from typing import Callable
+
+from p2p_state_reader import P2PStateReader
+
+
+class P2PContractTools:
+    """Live contract reads for one P2PLending deployment, as async functions returning JSON text."""
+
+    def __init__(self, reader: P2PStateReader, chain: str):
+        self.reader = reader
+        self.chain = chain
+
+    async def get_onchain_portfolio(self, address: str) -> str:
+        """
+        Reads the address's P2P portfolio directly from the P2PLending contract at the latest block:
+        every agreement as borrower and as lender (principal, interest rate, due date, amount paid,
+        status), and its loan offers and requests.
+
+        Args:
+            address: The user's address (0x...).
+        """
+        return json.dumps({"chain": self.chain, "address": address.lower(), **await self.reader.portfolio(address)})
+
+    async def get_onchain_agreement(self, agreement_id: str) -> str:
+        """
+        Reads one loan agreement directly from the P2PLending contract at the latest block.
+
+        Args:
+            agreement_id: The bytes32 agreement ID (0x...).
+        """
+        result = await self.reader.agreements([agreement_id])
+        agreement = result["agreements"][agreement_id.lower()]
+        return json.dumps({"chain": self.chain, "block_number": result["block_number"],
+                           "found": agreement is not None, "agreement": agreement})
+
+    def functions(self) -> list[Callable]:
+        """The reads as plain async callables (e.g. for Google ADK's `tools=`)."""
+        return [self.get_onchain_portfolio, self.get_onchain_agreement]
+
+    def openai_tools(self) -> list:
+        """The reads as OpenAI Agents SDK function tools."""
+        from agents import function_tool
+        return [function_tool(function) for function in self.functions()]
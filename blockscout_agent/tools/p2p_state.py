@@ -0,0 +1,98 @@
+"""
+Agent tools over the materialized P2P state kept by the local event index (see p2p_indexer.py).
+
+Each lookup reads a single row (or one indexed range) of the state tables, so questions such as
+"latest reputation score and defaulted loans of X" need no paging through the Reputation and
+P2PLending log histories. The index is only as fresh as its last sync: run
+`python p2p_indexer.py sync --poll 30` next to the agent to keep it current.
+"""
+import json
+import threading
+from typing import Callable
+
+from p2p_indexer import IndexStore
+
+
+class P2PStateTools:
+    """Read-only lookups for one chain of an IndexStore, as plain functions returning JSON text."""
+
+    def __init__(self, store: IndexStore, chain: str):
+        self.store = store
+        self.chain = chain
+        # Sync tools run in worker threads and share the store's connection
+        self._lock = threading.Lock()
+
+    def _result(self, **result) -> str:
+        return json.dumps({"chain": self.chain, **result})
+
+    def get_reputation_score(self, user_address: str) -> str:
+        """
+        Returns the current P2P reputation score of a user (from their latest ReputationUpdated event),
+        with the reason and block of that update.
+
+        Args:
+            user_address: The user's address (0x...).
+        """
+        with self._lock:
+            state = self.store.reputation(self.chain, user_address)
+        return self._result(user=user_address.lower(), found=state is not None, reputation=state)
+
+    def get_user_agreements(self, address: str, role: str = "borrower", status: str = "all") -> str:
+        """
+        Returns the current state of the P2P loan agreements where the address is the borrower or the
+        lender: principal, amount paid, remaining balance, status, due date and whether it is overdue.
+
+        Args:
+            address: The borrower's or lender's address (0x...).
+            role: "borrower" or "lender".
+            status: "all", "open", "closed", or a LoanStatus name such as "Repaid" or "Defaulted".
+        """
+        with self._lock:
+            agreements = self.store.agreements_for(self.chain, address, role=role,
+                                                   status=None if status == "all" else status)
+        return self._result(address=address.lower(), role=role, status=status, agreements=agreements)
+
+    def get_agreement_state(self, agreement_id: str) -> str:
+        """
+        Returns the current state of one P2P loan agreement.
+
+        Args:
+            agreement_id: The bytes32 agreement ID (0x...).
+        """
+        with self._lock:
+            state = self.store.agreement_state(self.chain, agreement_id)
+        return self._result(agreement_id=agreement_id.lower(), found=state is not None, agreement=state)
+
+    def get_vouches(self, address: str, role: str = "voucher") -> str:
+        """
+        Returns the active vouch stakes given by (role="voucher") or backing (role="borrower") an address.
+
+        Args:
+            address: The voucher's or borrower's address (0x...).
+            role: "voucher" or "borrower".
+        """
+        with self._lock:
+            vouches = self.store.vouches_for(self.chain, address, role=role)
+        return self._result(address=address.lower(), role=role, vouches=vouches)
+
+    def get_pending_modifications(self, address: str = "") -> str:
+        """
+        Returns the payment-modification requests (due date extensions, partial payment agreements)
+        that the lender has not answered yet.
+
+        Args:
+            address: Only requests where this address is the borrower or lender; empty for all.
+        """
+        with self._lock:
+            pending = self.store.pending_modifications(self.chain, address or None)
+        return self._result(address=address.lower() or None, pending_modifications=pending)
+
+    def functions(self) -> list[Callable[..., str]]:
+        """The lookups as plain callables (e.g. for Google ADK's `tools=`)."""
+        return [self.get_reputation_score, self.get_user_agreements, self.get_agreement_state,
+                self.get_vouches, self.get_pending_modifications]
+
+    def openai_tools(self) -> list:
+        """The lookups as OpenAI Agents SDK function tools."""
+        from agents import function_tool
+        return [function_tool(function) for function in self.functions()]
@@ -0,0 +1,425 @@
+"""
+Structured spans for agent runs: one trace per query with nested spans for model turns, tool calls,
+MCP server round-trips and Blockscout HTTP requests, each with its duration, payload sizes and
+(for model turns) token counts.
+
+    tracer = configure_tracing(jsonl_path="traces.jsonl", otlp_path="traces.otlp.jsonl")
+    with trace_span("What is the latest block?", "query") as span:
+        ...
+    python tracing.py summary traces.jsonl      # p50/p95 per tool and per span kind
+
+Spans are written as they finish, one JSON object per line (`traces.jsonl`), and optionally as
+OTLP/JSON export requests, one per line, as read by the OpenTelemetry Collector's
+`otlpjsonfile` receiver. When tracing is not configured, `trace_span` is a cheap no-op.
+
+Span kinds: query, agent, model_turn, tool_call (as the agent sees it: cache, rate limit and
+projection included), mcp_call (round-trip to the MCP server process) and http (Blockscout requests;
+the local blockscout-mcp-server appends these to BLOCKSCOUT_TRACE_FILE, without a parent).
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+SPAN_KINDS = ("query", "agent", "model_turn", "tool_call", "mcp_call", "http")
+# OTLP SpanKind: tool calls and HTTP requests leave the process, the rest is internal work
+OTLP_SPAN_KINDS = {"mcp_call": 3, "http": 3}
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: float  # epoch seconds
+    end: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float | None:
+        return None if self.end is None else (self.end - self.start) * 1000
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "duration_ms": self.duration_ms}
+
+
+class JsonlSpanExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)  # one write per span: lines from several processes don't interleave
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, default=str)}
+
+
+class OtlpJsonFileExporter:
+    """Writes each finished span as an OTLP/JSON ExportTraceServiceRequest line."""
+
+    def __init__(self, path: str, service_name: str = "blockscout-agent"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": OTLP_SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(int(span.start * 1e9)),
+            "endTimeUnixNano": str(int((span.end or span.start) * 1e9)),
+            "attributes": [{"key": key, "value": _otlp_value(value)}
+                           for key, value in {"span.kind": span.kind, **span.attributes}.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "blockscout_agent.tracing"}, "spans": [otlp_span]}],
+        }]}
+        line = json.dumps(request) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+
+class Tracer:
+    def __init__(self, exporters: list | None = None):
+        self.exporters = exporters or []
+
+    def start_span(self, name: str, kind: str, parent: Span | None = None, **attributes) -> Span:
+        parent = parent or _current_span.get()
+        return Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span, error: BaseException | str | None = None) -> None:
+        span.end = time.time()
+        if error is not None and span.error is None:
+            span.error = error if isinstance(error, str) else repr(error)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except OSError as e:
+                logger.warning(f"Could not export span {span.name}: {e}")
+
+
+_tracer: Tracer | None = None
+
+
+def configure_tracing(jsonl_path: str | None = None, otlp_path: str | None = None) -> Tracer | None:
+    """Enables tracing to the given files (returns None and leaves tracing off when neither is set)."""
+    global _tracer
+    exporters = []
+    if jsonl_path:
+        exporters.append(JsonlSpanExporter(jsonl_path))
+    if otlp_path:
+        exporters.append(OtlpJsonFileExporter(otlp_path))
+    _tracer = Tracer(exporters) if exporters else None
+    return _tracer
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def trace_span(name: str, kind: str, **attributes) -> Iterator[Span]:
+    """
+    Records a span around the block, nested under the current span of this task. The yielded
+    span's `attributes` can be filled in inside the block (sizes, status, ...).
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield Span(name, kind, "", "", None, 0.0, attributes=attributes)  # discarded
+        return
+    span = tracer.start_span(name, kind, **attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        tracer.end_span(span, error=e)
+        raise
+    else:
+        tracer.end_span(span)
+    finally:
+        _current_span.reset(token)
+
+
+class AgentsTraceBridge:
+    """
+    OpenAI Agents SDK trace processor (`agents.add_trace_processor(AgentsTraceBridge())`) that turns
+    the SDK's agent, model response and function spans into our spans, nested under the current
+    query span, with token usage and tool payload sizes. The SDK's own export is left untouched.
+    """
+
+    def __init__(self):
+        self._spans: dict[str, tuple[Span, Span | None]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _kind_and_name(span_data) -> tuple[str, str] | None:
+        span_type = getattr(span_data, "type", None)
+        if span_type == "agent":
+            return "agent", span_data.name
+        if span_type in ("response", "generation"):
+            return "model_turn", getattr(span_data, "model", None) or span_type
+        if span_type == "function":
+            return "tool_call", span_data.name
+        return None
+
+    def on_trace_start(self, trace) -> None:
+        pass
+
+    def on_trace_end(self, trace) -> None:
+        pass
+
+    def on_span_start(self, sdk_span) -> None:
+        tracer = _tracer
+        kind_and_name = self._kind_and_name(sdk_span.span_data)
+        if tracer is None or kind_and_name is None:
+            return
+        with self._lock:
+            parent_entry = self._spans.get(sdk_span.parent_id) if sdk_span.parent_id else None
+        parent = parent_entry[0] if parent_entry else _current_span.get()
+        span = tracer.start_span(kind_and_name[1], kind_and_name[0], parent=parent)
+        with self._lock:
+            self._spans[sdk_span.span_id] = (span, _current_span.get())
+        # Called from the task running the agent, so MCP and HTTP spans of this turn nest under it
+        _current_span.set(span)
+
+    def on_span_end(self, sdk_span) -> None:
+        tracer = _tracer
+        with self._lock:
+            entry = self._spans.pop(sdk_span.span_id, None)
+        if tracer is None or entry is None:
+            return
+        span, previous = entry
+        data = sdk_span.span_data
+        if span.kind == "model_turn":
+            usage = getattr(data, "usage", None) or getattr(getattr(data, "response", None), "usage", None)
+            if usage is not None:
+                usage = usage if isinstance(usage, dict) else usage.model_dump()
+                span.attributes.update({key: usage[key] for key in ("input_tokens", "output_tokens", "total_tokens")
+                                        if usage.get(key) is not None})
+        elif span.kind == "tool_call":
+            span.attributes.update({
+                "tool": data.name,
+                "input_bytes": len(data.input or ""),
+                "output_bytes": len(data.output if isinstance(data.output, str) else json.dumps(data.output, default=str) if data.output is not None else ""),
+            })
+        error = getattr(sdk_span, "error", None)
+        tracer.end_span(span, error=error.get("message") if isinstance(error, dict) else error)
+        if _current_span.get() is span:
+            _current_span.set(previous)
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+
+class AdkEventTracer:
+    """
+    Derives model turn and tool call spans from the events of one Google ADK run (inside its query
+    span): the time up to each model event is a model turn, and each function call is a tool call
+    until the function response with the same id arrives.
+    """
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self._turn_start = time.time()
+        self._tool_spans: dict[str, Span] = {}
+
+    def on_event(self, event) -> None:
+        tracer = _tracer
+        if tracer is None:
+            return
+        function_responses = event.get_function_responses()
+        if function_responses:
+            for response in function_responses:
+                span = self._tool_spans.pop(response.id or response.name, None)
+                if span is not None:
+                    span.attributes["output_bytes"] = len(json.dumps(response.response, default=str))
+                    tracer.end_span(span)
+            self._turn_start = time.time()
+            return
+        if event.author != self.agent_name:
+            return
+
+        turn = tracer.start_span(self.agent_name, "model_turn")
+        turn.start = self._turn_start
+        usage = getattr(event, "usage_metadata", None)
+        if usage is not None:
+            for attribute, key in (("prompt_token_count", "input_tokens"), ("candidates_token_count", "output_tokens"),
+                                   ("total_token_count", "total_tokens")):
+                if getattr(usage, attribute, None) is not None:
+                    turn.attributes[key] = getattr(usage, attribute)
+        tracer.end_span(turn)
+        self._turn_start = time.time()
+        for call in event.get_function_calls():
+            self._tool_spans[call.id or call.name] = tracer.start_span(
+                call.name, "tool_call", tool=call.name, input_bytes=len(json.dumps(call.args or {}, default=str)))
+
+    def close(self) -> None:
+        """Ends the tool calls that never got a response (timeouts, cancelled runs)."""
+        tracer = _tracer
+        for span in self._tool_spans.values():
+            if tracer is not None:
+                tracer.end_span(span, error="no function response")
+        self._tool_spans.clear()
+
+
+# --- Summary report ---
+
+def load_spans(path: str) -> list[dict]:
+    spans = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue  # torn last line of a run that is still writing
+    return spans
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def _stats(spans: list[dict]) -> dict:
+    durations = [s["duration_ms"] for s in spans if s.get("duration_ms") is not None]
+    return {
+        "count": len(spans),
+        "errors": sum(1 for s in spans if s.get("error")),
+        "p50_ms": percentile(durations, 50),
+        "p95_ms": percentile(durations, 95),
+        "total_ms": sum(durations),
+    }
+
+
+def summarize(spans: list[dict]) -> dict:
+    """Latency stats per span kind and per tool, and a per-query breakdown of where the time went."""
+    by_kind: dict[str, list[dict]] = {}
+    by_tool: dict[str, list[dict]] = {}
+    for span in spans:
+        by_kind.setdefault(span["kind"], []).append(span)
+        if span["kind"] in ("tool_call", "mcp_call"):
+            by_tool.setdefault(f"{span['kind']}:{span['attributes'].get('tool', span['name'])}", []).append(span)
+
+    tools = {}
+    for key, tool_spans in sorted(by_tool.items()):
+        tools[key] = _stats(tool_spans)
+        tools[key]["output_bytes"] = sum(s["attributes"].get("output_bytes", 0) for s in tool_spans)
+
+    # Busy time per kind inside each query; parallel tool calls are summed, so kinds can exceed the wall time
+    children: dict[str, list[dict]] = {}
+    for span in spans:
+        if span.get("parent_id"):
+            children.setdefault(span["parent_id"], []).append(span)
+
+    def busy(span_id: str, totals: dict[str, float]) -> dict[str, float]:
+        for child in children.get(span_id, []):
+            if child["kind"] in ("model_turn", "tool_call", "mcp_call", "http"):
+                totals[child["kind"]] = totals.get(child["kind"], 0.0) + (child.get("duration_ms") or 0.0)
+            busy(child["span_id"], totals)
+        return totals
+
+    queries = []
+    for query in by_kind.get("query", []):
+        turns = [s for s in spans if s["trace_id"] == query["trace_id"] and s["kind"] == "model_turn"]
+        queries.append({
+            "name": query["name"],
+            "wall_ms": query.get("duration_ms"),
+            "busy_ms": busy(query["span_id"], {}),
+            "input_tokens": sum(s["attributes"].get("input_tokens", 0) for s in turns),
+            "output_tokens": sum(s["attributes"].get("output_tokens", 0) for s in turns),
+            "error": query.get("error"),
+        })
+    return {"kinds": {kind: _stats(kind_spans) for kind, kind_spans in by_kind.items()},
+            "tools": tools, "queries": queries}
+
+
+def format_summary(summary: dict) -> str:
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value:.0f}"
+
+    lines = [f"{'span kind':<30} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'total ms':>10}"]
+    for kind, s in summary["kinds"].items():
+        lines.append(f"{kind:<30} {s['count']:>6} {s['errors']:>6} {ms(s['p50_ms']):>9} {ms(s['p95_ms']):>9} {ms(s['total_ms']):>10}")
+    lines += ["", f"{'tool':<40} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'out bytes':>10}"]
+    for tool, s in summary["tools"].items():
+        lines.append(f"{tool:<40} {s['count']:>6} {s['errors']:>6} {ms(s['p50_ms']):>9} {ms(s['p95_ms']):>9} {s['output_bytes']:>10}")
+    if summary["queries"]:
+        lines += ["", "queries (busy time per kind; parallel calls are summed):"]
+        for q in summary["queries"]:
+            busy = ", ".join(f"{kind} {ms(value)}" for kind, value in q["busy_ms"].items())
+            lines.append(f"- {q['name'][:80]}: wall {ms(q['wall_ms'])} ms; {busy or 'no child spans'}; "
+                         f"tokens in/out {q['input_tokens']}/{q['output_tokens']}{'; ERROR' if q['error'] else ''}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize agent trace files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Latency percentiles per tool and span kind.")
+    summary_parser.add_argument("paths", nargs="+", help="JSONL span files (e.g. the agent's and the MCP server's).")
+    summary_parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    spans = [span for path in args.paths for span in load_spans(path)]
+    summary = summarize(spans)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+// SPDX-License-Identifier: UNLICENSED
+pragma solidity ^0.8.20;
+
+import {Script, console} from "forge-std/Script.sol";
+import {UserRegistry} from "../src/UserRegistry.sol";
+import {Reputation} from "../src/Reputation.sol";
+import {P2PLending} from "../src/P2PLending.sol";
+import {MockERC20} from "../test/mocks/MockERC20.sol";
+
+/**
+ * @title DeployLocal
+ * @dev Deploys the P2P contracts and a mintable loan token to a local anvil node for
+ *      synthetic load (see blockscout_agent/p2p_loadgen.py). Defaults to anvil's first account.
+ *      forge script script/DeployLocal.s.sol --rpc-url http://127.0.0.1:8545 --broadcast
+ */
+contract DeployLocal is Script {
+    // anvil's well-known account #0 (test mnemonic), never holds real funds
+    uint256 constant ANVIL_DEFAULT_KEY = 0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80;
+
+    function run() public {
+        uint256 deployerPrivateKey = vm.envOr("PRIVATE_KEY", ANVIL_DEFAULT_KEY);
+        address deployer = vm.addr(deployerPrivateKey);
+
+        vm.startBroadcast(deployerPrivateKey);
+
+        UserRegistry userRegistry = new UserRegistry();
+        Reputation reputation = new Reputation(address(userRegistry));
+        P2PLending p2pLending = new P2PLending(
+            address(userRegistry),
+            address(reputation),
+            payable(deployer), // Deployer as platform wallet (the constructor rejects address(0))
+            address(0) // No cross-chain functionality
+        );
+        reputation.setP2PLendingContractAddress(address(p2pLending));
+        MockERC20 loanToken = new MockERC20("Mock Dollar", "mUSD", 18);
+
+        vm.stopBroadcast();
+
+        console.log("\n=== LOCAL DEPLOYMENT SUMMARY ===");
+        console.log("UserRegistry:", address(userRegistry));
+        console.log("Reputation:", address(reputation));
+        console.log("P2PLending:", address(p2pLending));
+        console.log("MockERC20:", address(loanToken));
+        console.log("================================");
+    }
+}